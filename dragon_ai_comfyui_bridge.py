@@ -4,15 +4,25 @@ Dragon Ai ↔ ComfyUI Integration Bridge
 Handles communication and workflow conversion between systems
 """
 
-import requests
 import json
+import random
+import shutil
+import threading
 import time
+import uuid
 import asyncio
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FutureTimeoutError, wait
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from omniflow.comfy_cache import ComfyResultCache, workflow_cache_key
+from omniflow.comfy_client import ComfyOutput, fetch_outputs
+from omniflow.comfy_pool import ComfyNodePool, parse_urls, workflow_checkpoint
+from omniflow.http_client import HTTPConnectionError, HTTPTimeoutError, get_http_client
+
 class VideoQuality(Enum):
     """Video output quality options"""
     HD_1080P = ("1080p", 5)      # 5 min per video
@@ -33,30 +43,61 @@ class GeneratorConfig:
             self.effects = []
 
 class DragonAiComfyUIBridge:
-    """Bridge between Dragon Ai and ComfyUI"""
+    """Bridge between Dragon Ai and ComfyUI
+    
+    Job completion is tracked through ComfyUI's /ws event stream (requires
+    websocket-client); /history is polled only as a fallback. With several
+    ComfyUI servers, each workflow goes to the least-loaded healthy one.
+    Results are cached per workflow, so an identical workflow (same prompt,
+    checkpoint and seed) is answered from disk instead of re-running.
+    """
+    
+    # Seconds between /history checks while events are flowing (catches missed events)
+    FALLBACK_POLL_INTERVAL = 15
+    # Seconds between /history checks when no event stream is available
+    POLL_INTERVAL = 2
+    # Finished jobs whose state (outputs, errors) is kept after completion
+    FINISHED_JOBS_KEPT = 256
     
     def __init__(self, 
                  dragon_ai_url: str = "http://localhost:8501",
                  comfyui_url: str = "http://localhost:8188",
-                 output_dir: str = "C:/workspace/outputs/"):
+                 output_dir: str = "C:/workspace/outputs/",
+                 comfyui_urls: Optional[List[str]] = None,
+                 cache_results: bool = True):
         """
         Initialize the bridge
         
         Args:
             dragon_ai_url: URL to Dragon Ai server
-            comfyui_url: URL to ComfyUI server
+            comfyui_url: URL to ComfyUI server (comma-separate several to load-balance)
             output_dir: Directory for output videos
+            comfyui_urls: ComfyUI servers to balance across (overrides comfyui_url)
+            cache_results: Reuse output images of identical workflows
         """
+        urls = comfyui_urls or parse_urls(comfyui_url)
         self.dragon_ai_url = dragon_ai_url
-        self.comfyui_url = comfyui_url
+        self.comfyui_url = urls[0].rstrip("/")
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         self.workflow_dir = self.output_dir / "workflows"
         self.workflow_dir.mkdir(exist_ok=True)
         
-        self.session = requests.Session()
-        self.processing_jobs = {}
+        self.http = get_http_client()  # Shared asyncio client: pooled, retried, circuit-broken
+        self.node_pool = ComfyNodePool(urls, http=self.http)
+        self.result_cache = ComfyResultCache() if cache_results else None
+        self.processing_jobs = {}  # prompt_id -> job state of unfinished prompts (see _job)
+        # Finished (or abandoned) prompts, kept a while so their outputs can be fetched
+        self._finished_jobs = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        
+        # Unique per instance so ComfyUI routes events for our prompts only to us
+        self.client_id = f"dragon-ai-bridge-{uuid.uuid4().hex}"
+        self._events_lock = threading.Lock()
+        self._events_threads = {}  # ComfyUI URL -> event reader thread
+        self._events_retry_at = {}  # ComfyUI URL -> monotonic time of next connect attempt
+        self._events_connecting = set()  # ComfyUI URLs with a connect attempt in progress
     
     def health_check(self) -> Tuple[bool, bool]:
         """
@@ -69,21 +110,14 @@ class DragonAiComfyUIBridge:
         comfyui_alive = False
         
         try:
-            r = self.session.get(f"{self.dragon_ai_url}/", timeout=2)
+            r = self.http.get(f"{self.dragon_ai_url}/", timeout=2, retries=0)
             dragon_ai_alive = r.status_code < 500
         except:
             pass
         
-        try:
-            # Try multiple endpoints as ComfyUI API varies by version
-            r = self.session.get(f"{self.comfyui_url}/", timeout=2)
-            comfyui_alive = r.status_code == 200
-        except:
-            try:
-                r = self.session.get(f"{self.comfyui_url}/queue", timeout=2)
-                comfyui_alive = r.status_code == 200
-            except:
-                pass
+        # Any reachable node will do; the pool routes around the others
+        self.node_pool.refresh(force=True)
+        comfyui_alive = any(node.healthy for node in self.node_pool.nodes)
         
         return dragon_ai_alive, comfyui_alive
     
@@ -122,7 +156,7 @@ class DragonAiComfyUIBridge:
             "5": {
                 "class_type": "KSampler",
                 "inputs": {
-                    "seed": 12345,
+                    "seed": self._seed(config, 12345),
                     "steps": 20,
                     "cfg": 7.0,
                     "sampler_name": "euler",
@@ -148,6 +182,14 @@ class DragonAiComfyUIBridge:
         }
         return workflow
     
+    @staticmethod
+    def _seed(config: GeneratorConfig, default: int) -> int:
+        """Sampler seed from config.params["seed"] ("random" for a new one every run)"""
+        seed = config.params.get("seed", default)
+        if seed == "random":
+            return random.randint(0, 2**32 - 1)
+        return int(seed)
+    
     def create_tech_workflow(self, config: GeneratorConfig) -> Dict:
         """Create ComfyUI workflow for Tech Explained video"""
         topic = config.params.get("topic", "ai_basics")
@@ -179,7 +221,7 @@ class DragonAiComfyUIBridge:
             "5": {
                 "class_type": "KSampler",
                 "inputs": {
-                    "seed": 54321,
+                    "seed": self._seed(config, 54321),
                     "steps": 20,
                     "cfg": 7.0,
                     "sampler_name": "euler",
@@ -263,14 +305,32 @@ class DragonAiComfyUIBridge:
         else:
             return self.create_tech_workflow(config)  # Default to tech
     
-    def submit_workflow(self, workflow: Dict) -> Optional[str]:
+    def submit_workflow(self, workflow: Dict, use_cache: bool = True) -> Optional[str]:
         """
         Submit workflow to ComfyUI
         
+        If an identical workflow already ran, its cached images are used and
+        the returned job is complete immediately (nothing is sent to ComfyUI).
+        
+        Args:
+            workflow: ComfyUI API workflow
+            use_cache: Look up and store results (disable for unpinned seeds)
+        
         Returns:
             prompt_id if successful, None otherwise
         """
         try:
+            cache_key = None
+            if use_cache and self.result_cache is not None:
+                cache_key = workflow_cache_key(workflow)
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    prompt_id = f"cached-{uuid.uuid4().hex}"
+                    self._job(prompt_id)["cached"] = cached
+                    self._finish_job(prompt_id, True)
+                    print(f"♻️  Identical workflow already rendered, reusing cached result: {prompt_id}")
+                    return prompt_id
+            
             # Convert string keys to integers and fix node references
             workflow_converted = {}
             for key, node in workflow.items():
@@ -297,25 +357,53 @@ class DragonAiComfyUIBridge:
             # Prepare the request payload
             payload = {
                 "prompt": workflow_converted,
-                "client_id": "dragon-ai-bridge"
+                "client_id": self.client_id
             }
             
-            print(f"📤 Submitting workflow...")
-            response = self.session.post(
-                f"{self.comfyui_url}/api/prompt",
-                json=payload,
-                timeout=30
-            )
+            checkpoint = workflow_checkpoint(workflow)
+            for _ in range(len(self.node_pool.nodes)):
+                node = self.node_pool.acquire(checkpoint)
+                submitted = False  # Once bound to a prompt, the slot is freed when the prompt finishes
+                try:
+                    # Subscribe before submitting so no event for this prompt is missed
+                    self._ensure_event_stream(node.url)
+                    
+                    print(f"📤 Submitting workflow to {node.url}...")
+                    try:
+                        response = self.http.post(
+                            f"{node.url}/api/prompt",
+                            json=payload,
+                            timeout=30
+                        )
+                    except (HTTPConnectionError, HTTPTimeoutError) as e:
+                        self.node_pool.mark_failed(node, e)
+                        continue  # Fail over to the next node
+                    
+                    if response.status_code >= 500:
+                        self.node_pool.mark_failed(node, f"HTTP {response.status_code}")
+                        continue  # Server-side failure: another node may take it
+                    
+                    if response.status_code == 200:
+                        prompt_id = response.json().get("prompt_id")
+                        if not prompt_id:
+                            print(f"❌ ComfyUI reply has no prompt_id: {response.text}")
+                            return None
+                        self._job(prompt_id)["cache_key"] = cache_key
+                        self._bind_job(prompt_id, node.url)
+                        submitted = True
+                        print(f"✅ Workflow submitted: {prompt_id}")
+                        return prompt_id
+                    else:
+                        # 4xx: the workflow itself was rejected, so other nodes would reject it too
+                        print(f"❌ ComfyUI error: {response.status_code}")
+                        print(f"Response: {response.text}")
+                        return None
+                finally:
+                    if not submitted:
+                        self.node_pool.release(node)
             
-            if response.status_code == 200:
-                result = response.json()
-                prompt_id = result.get("prompt_id")
-                print(f"✅ Workflow submitted: {prompt_id}")
-                return prompt_id
-            else:
-                print(f"❌ ComfyUI error: {response.status_code}")
-                print(f"Response: {response.text}")
-                return None
+            print("❌ No ComfyUI node accepted the workflow")
+            return None
                 
         except Exception as e:
             print(f"❌ Workflow submission failed: {e}")
@@ -323,9 +411,169 @@ class DragonAiComfyUIBridge:
             traceback.print_exc()
             return None
     
+    def _ensure_event_stream(self, comfyui_url: Optional[str] = None) -> bool:
+        """
+        Connect to a ComfyUI server's /ws event stream (once per server)
+        
+        Returns:
+            True if events are being received
+        """
+        comfyui_url = (comfyui_url or self.comfyui_url).rstrip("/")
+        with self._events_lock:
+            thread = self._events_threads.get(comfyui_url)
+            if thread and thread.is_alive():
+                return True
+            if time.monotonic() < self._events_retry_at.get(comfyui_url, 0.0):
+                return False
+            if comfyui_url in self._events_connecting:
+                return False  # Another thread is connecting; poll until it has
+            
+            try:
+                import websocket  # websocket-client
+            except ImportError:
+                print("⚠️  websocket-client not installed, polling /history instead")
+                for node in self.node_pool.nodes:
+                    self._events_retry_at[node.url] = float("inf")
+                return False
+            self._events_connecting.add(comfyui_url)
+        
+        # Connect without the lock, so a dead server doesn't stall every submitter and monitor
+        ws_url = comfyui_url.replace("http", "ws", 1)
+        try:
+            ws = websocket.create_connection(f"{ws_url}/ws?clientId={self.client_id}", timeout=5)
+            ws.settimeout(None)
+        except Exception as e:
+            print(f"⚠️  ComfyUI event stream unavailable ({e}), polling /history instead")
+            with self._events_lock:
+                self._events_connecting.discard(comfyui_url)
+                self._events_retry_at[comfyui_url] = time.monotonic() + 30
+            return False
+        
+        thread = threading.Thread(
+            target=self._event_loop, args=(ws,), name="comfyui-events", daemon=True
+        )
+        with self._events_lock:
+            self._events_connecting.discard(comfyui_url)
+            self._events_threads[comfyui_url] = thread
+        thread.start()
+        return True
+    
+    def _event_loop(self, ws):
+        """Read ComfyUI events until the connection drops"""
+        try:
+            while True:
+                message = ws.recv()
+                if not message:
+                    break
+                if isinstance(message, bytes):
+                    continue  # Binary frames are latent previews
+                self._dispatch_event(json.loads(message))
+        except Exception as e:
+            print(f"⚠️  ComfyUI event stream closed: {e}")
+        finally:
+            ws.close()
+    
+    def _dispatch_event(self, event: Dict):
+        """Route one ComfyUI event to the job it belongs to"""
+        kind = event.get("type")
+        data = event.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return  # e.g. queue "status" broadcasts
+        
+        job = self._job(prompt_id)
+        if kind == "progress":
+            job["progress"] = (data.get("value"), data.get("max"))
+        elif kind == "executing":
+            job["node"] = data.get("node")
+            if data.get("node") is None:
+                # Older ComfyUI signals the end of a prompt with an empty node
+                self._finish_job(prompt_id, True)
+        elif kind == "executed":
+            job["outputs"][str(data.get("node"))] = data.get("output") or {}
+        elif kind == "execution_success":
+            self._finish_job(prompt_id, True)
+        elif kind in ("execution_error", "execution_interrupted"):
+            self._finish_job(prompt_id, False, data.get("exception_message") or kind)
+    
+    def _job(self, prompt_id: str) -> Dict:
+        """Get (or create) the tracked state for a prompt"""
+        with self._jobs_lock:
+            if prompt_id in self._finished_jobs:
+                self._finished_jobs.move_to_end(prompt_id)
+                return self._finished_jobs[prompt_id]
+            if prompt_id not in self.processing_jobs:
+                self.processing_jobs[prompt_id] = {
+                    "future": Future(),
+                    "node": None,
+                    "progress": None,
+                    "outputs": {},
+                    "error": None,
+                    "comfyui_url": None,
+                    "cache_key": None,  # Where to store the outputs once fetched
+                    "cached": None,  # (node_id, path) pairs when answered from the cache
+                    "submitted_at": time.monotonic(),
+                }
+            return self.processing_jobs[prompt_id]
+    
+    def _bind_job(self, prompt_id: str, comfyui_url: str):
+        """Record which node runs a prompt (its pool slot is freed when it finishes)"""
+        job = self._job(prompt_id)
+        with self._jobs_lock:
+            job["comfyui_url"] = comfyui_url
+            finished = job["future"].done()
+        if finished:
+            self.node_pool.release(self.node_pool.node(comfyui_url))
+    
+    def _finish_job(self, prompt_id: str, success: bool, error: Optional[str] = None):
+        """Resolve a prompt, free its node slot and move it to the bounded finished list"""
+        job = self._job(prompt_id)
+        with self._jobs_lock:
+            if job["future"].done():
+                return
+            job["error"] = error
+            job["future"].set_result(success)
+            comfyui_url = job["comfyui_url"]
+            self.processing_jobs.pop(prompt_id, None)
+            self._finished_jobs[prompt_id] = job
+            while len(self._finished_jobs) > self.FINISHED_JOBS_KEPT:
+                self._finished_jobs.popitem(last=False)
+        if comfyui_url:
+            self.node_pool.release(self.node_pool.node(comfyui_url))
+    
+    def _abandon_job(self, prompt_id: str, reason: str):
+        """Stop waiting for a prompt: fail it and free its node slot
+        
+        Late events for it land on its finished state instead of re-creating it.
+        """
+        self._finish_job(prompt_id, False, reason)
+    
+    def _poll_history(self, prompt_id: str):
+        """Check /history once and finish the job if ComfyUI is done with it"""
+        comfyui_url = self._job(prompt_id)["comfyui_url"] or self.comfyui_url
+        try:
+            response = self.http.get(f"{comfyui_url}/history/{prompt_id}", timeout=10)
+            entry = response.json().get(prompt_id)
+        except Exception as e:
+            print(f"⚠️  Monitoring error: {e}")
+            return
+        if not entry:
+            return  # Still queued or running
+        
+        status = (entry.get("status") or {}).get("status_str")
+        if status == "error":
+            self._finish_job(prompt_id, False, "ComfyUI reported an execution error")
+        elif entry.get("outputs") or status == "success":
+            self._job(prompt_id)["outputs"].update(entry.get("outputs") or {})
+            self._finish_job(prompt_id, True)
+    
     def monitor_progress(self, prompt_id: str, timeout: int = 600) -> bool:
         """
-        Monitor ComfyUI processing status
+        Wait for a ComfyUI job to finish
+        
+        Completion arrives through the event stream; /history is only polled
+        as a fallback (every POLL_INTERVAL seconds without a stream).
+        On timeout the job is dropped and its node slot freed.
         
         Args:
             prompt_id: ID of the processing job
@@ -334,38 +582,39 @@ class DragonAiComfyUIBridge:
         Returns:
             True if completed successfully
         """
-        start_time = time.time()
-        last_status = None
+        job = self._job(prompt_id)
+        deadline = time.monotonic() + timeout
+        streaming = self._ensure_event_stream(job["comfyui_url"])
+        if not streaming:
+            self._poll_history(prompt_id)
+        last_progress = None
         
-        while time.time() - start_time < timeout:
+        while not job["future"].done():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                print(f"❌ Processing timeout: {prompt_id}")
+                self._abandon_job(prompt_id, f"no result after {timeout}s")
+                return False
+            
+            interval = self.FALLBACK_POLL_INTERVAL if streaming else self.POLL_INTERVAL
             try:
-                response = self.session.get(
-                    f"{self.comfyui_url}/history/{prompt_id}",
-                    timeout=10
-                )
-                
-                history = response.json()
-                
-                if prompt_id in history:
-                    status = history[prompt_id]
-                    # Check for outputs
-                    if "outputs" in status and len(status["outputs"]) > 0:
-                        print(f"✅ Processing complete: {prompt_id}")
-                        return True
-                    
-                    # Print status if changed
-                    current_status = json.dumps(status, indent=2)
-                    if current_status != last_status:
-                        last_status = current_status
-                        print(f"⏳ Processing... {prompt_id}")
-                
-                time.sleep(2)
-                
-            except Exception as e:
-                print(f"⚠️  Monitoring error: {e}")
-                time.sleep(2)
+                job["future"].result(timeout=min(interval, remaining))
+                break
+            except FutureTimeoutError:
+                pass
+            
+            if job["progress"] != last_progress:
+                last_progress = job["progress"]
+                value, maximum = last_progress or (0, 0)
+                print(f"⏳ Processing... {prompt_id} ({value}/{maximum})")
+            
+            self._poll_history(prompt_id)
+            streaming = self._ensure_event_stream(job["comfyui_url"])
         
-        print(f"❌ Processing timeout: {prompt_id}")
+        if job["future"].result():
+            print(f"✅ Processing complete: {prompt_id}")
+            return True
+        print(f"❌ Processing failed: {prompt_id} ({job['error']})")
         return False
     
     def process_video(self, config: GeneratorConfig) -> Optional[Dict]:
@@ -377,33 +626,54 @@ class DragonAiComfyUIBridge:
         """
         print(f"\n🚀 Starting {config.generator_type} video generation...")
         
-        # Check servers
+        if not self._servers_ready():
+            return None
+        
+        prompt_id = self._prepare_and_submit(config)
+        if not prompt_id:
+            return None
+        
+        # Step 3: Monitor processing
+        print(f"⏳ Processing (ID: {prompt_id})...")
+        success = self.monitor_progress(prompt_id)
+        
+        if success:
+            print("✅ Video generation complete!")
+            return self._job_result(prompt_id, config)
+        else:
+            return None
+    
+    def _servers_ready(self) -> bool:
+        """Health-check both servers and explain what is missing"""
         dragon_ai_up, comfyui_up = self.health_check()
         if not dragon_ai_up:
             print("❌ Dragon Ai server not responding")
-            return None
+            return False
         if not comfyui_up:
             print("❌ ComfyUI server not responding")
-            return None
+            return False
         
         print("✅ Servers online")
         print("⚠️  IMPORTANT: This requires AI models to be installed in ComfyUI")
         print("   Models Directory: C:\\workspace\\ComfyUI\\models\\checkpoints\\")
         print("   Download a model like Stable Diffusion first!")
-        
+        return True
+    
+    def _prepare_and_submit(self, config: GeneratorConfig) -> Optional[str]:
+        """Build, save and submit the workflow for a config; returns the prompt_id"""
         # Step 1: Create workflow
         print("🔧 Creating workflow...")
         workflow = self.get_workflow(config)
         
         # Save workflow for reference
-        workflow_file = self.workflow_dir / f"{config.generator_type}_{int(time.time())}.json"
+        workflow_file = self.workflow_dir / f"{config.generator_type}_{int(time.time())}_{uuid.uuid4().hex[:8]}.json"
         with open(workflow_file, 'w') as f:
             json.dump(workflow, f, indent=2)
         print(f"   Saved to: {workflow_file}")
         
         # Step 2: Submit to ComfyUI
         print("📤 Submitting workflow...")
-        prompt_id = self.submit_workflow(workflow)
+        prompt_id = self.submit_workflow(workflow, use_cache=config.params.get("seed") != "random")
         if not prompt_id:
             print("\n⚠️  ERROR: Model not found or workflow validation failed")
             print("   This usually means:") 
@@ -413,37 +683,134 @@ class DragonAiComfyUIBridge:
             print("\n   To fix: Download and install a model file to:")
             print("   C:\\workspace\\ComfyUI\\models\\checkpoints\\")
             return None
+        return prompt_id
+    
+    def fetch_outputs(self, prompt_id: str, dest_dir: Optional[str] = None) -> List[ComfyOutput]:
+        """
+        Download a finished job's images from ComfyUI
         
-        # Step 3: Monitor processing
-        print(f"⏳ Processing (ID: {prompt_id})...")
-        success = self.monitor_progress(prompt_id)
+        Images are streamed from /view straight to disk, so a batch of large
+        frames is never held in memory; decode one with `.load()` when needed.
         
-        if success:
-            print("✅ Video generation complete!")
-            return {
-                "prompt_id": prompt_id,
-                "generator_type": config.generator_type,
-                "quality": config.quality.value[0],
-                "status": "complete"
-            }
-        else:
-            return None
+        Args:
+            prompt_id: ID of a completed job
+            dest_dir: Where to save the images (default: <output_dir>/<prompt_id>)
+            
+        Returns:
+            Handles for the saved images
+        """
+        job = self._job(prompt_id)
+        dest_dir = Path(dest_dir) if dest_dir else self.output_dir / prompt_id
+        
+        if job["cached"] is not None:
+            dest_dir.mkdir(parents=True, exist_ok=True)
+            images = []
+            for node_id, path in job["cached"]:
+                target = dest_dir / path.name
+                shutil.copyfile(path, target)
+                images.append(ComfyOutput(target, node_id))
+            print(f"🖼️  Copied {len(images)} cached image(s) to {dest_dir}")
+            return images
+        
+        if not job["outputs"]:
+            self._poll_history(prompt_id)  # Events may not carry outputs (or were missed)
+        
+        images = fetch_outputs(
+            job["comfyui_url"] or self.comfyui_url,
+            dict(job["outputs"]),
+            dest_dir,
+            http=self.http,
+        )
+        if images and job["cache_key"] and self.result_cache is not None:
+            self.result_cache.put(job["cache_key"], [(img.node_id, img.path) for img in images])
+        print(f"🖼️  Saved {len(images)} image(s) to {dest_dir}")
+        return images
     
-    def process_batch(self, configs: List[GeneratorConfig]) -> List[Dict]:
+    def _job_result(self, prompt_id: str, config: GeneratorConfig) -> Dict:
+        try:
+            outputs = [str(img.path) for img in self.fetch_outputs(prompt_id)]
+        except Exception as e:
+            print(f"⚠️  Could not download outputs for {prompt_id}: {e}")
+            outputs = []
+        return {
+            "prompt_id": prompt_id,
+            "generator_type": config.generator_type,
+            "quality": config.quality.value[0],
+            "outputs": outputs,
+            "seconds": round(time.monotonic() - self._job(prompt_id)["submitted_at"], 3),  # Submit to downloaded
+            "status": "complete"
+        }
+    
+    def process_batch(
+        self,
+        configs: List[GeneratorConfig],
+        max_in_flight: Optional[int] = 8,
+        timeout: int = 600,
+    ) -> List[Dict]:
         """
         Process batch of videos
         
+        Servers are checked once, then workflows are kept queued in ComfyUI
+        (up to `max_in_flight` at a time) so the GPU never waits on us.
+        Completions are tracked concurrently.
+        
+        Args:
+            configs: Videos to generate
+            max_in_flight: Maximum workflows queued in ComfyUI at once (None = all)
+            timeout: Give up on the remaining jobs if none completes for this many seconds
+        
         Returns:
-            List of results
+            List of results for successful jobs, in completion order
         """
         print(f"\n🎬 Starting batch processing ({len(configs)} videos)...")
+        if not self._servers_ready():
+            return []
+        
+        window = max_in_flight or len(configs)
+        queued = list(enumerate(configs, 1))
+        in_flight = {}  # prompt_id -> (index, config)
         results = []
+        last_completion = time.monotonic()
         
-        for i, config in enumerate(configs, 1):
-            print(f"\n[{i}/{len(configs)}] Processing {config.generator_type}...")
-            result = self.process_video(config)
-            if result:
-                results.append(result)
+        while queued or in_flight:
+            # Keep the ComfyUI queue topped up
+            while queued and len(in_flight) < window:
+                i, config = queued.pop(0)
+                print(f"\n[{i}/{len(configs)}] Submitting {config.generator_type}...")
+                prompt_id = self._prepare_and_submit(config)
+                if prompt_id:
+                    in_flight[prompt_id] = (i, config)
+            if not in_flight:
+                continue
+            
+            streaming = all(
+                self._ensure_event_stream(self._job(prompt_id)["comfyui_url"])
+                for prompt_id in in_flight
+            )
+            interval = self.FALLBACK_POLL_INTERVAL if streaming else self.POLL_INTERVAL
+            futures = {self._job(prompt_id)["future"]: prompt_id for prompt_id in in_flight}
+            done, _ = wait(futures, timeout=interval, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                for prompt_id in in_flight:
+                    self._poll_history(prompt_id)
+                done = [f for f in futures if f.done()]
+            
+            for future in done:
+                prompt_id = futures[future]
+                i, config = in_flight.pop(prompt_id)
+                last_completion = time.monotonic()
+                if future.result():
+                    print(f"✅ [{i}/{len(configs)}] Complete: {prompt_id}")
+                    results.append(self._job_result(prompt_id, config))
+                else:
+                    print(f"❌ [{i}/{len(configs)}] Failed: {prompt_id} ({self._job(prompt_id)['error']})")
+            
+            if in_flight and time.monotonic() - last_completion > timeout:
+                print(f"❌ No job finished in {timeout}s, giving up on {len(in_flight)} queued jobs")
+                for prompt_id in in_flight:
+                    self._abandon_job(prompt_id, f"no job finished in {timeout}s")
+                break
         
         print(f"\n📊 Batch complete: {len(results)}/{len(configs)} successful")
         return results
@@ -453,11 +820,14 @@ class DragonAiComfyUIBridge:
         info = {
             "dragon_ai": "unknown",
             "comfyui": "unknown",
+            "comfyui_nodes": self.node_pool.status(),
+            "comfyui_cache": self.result_cache.stats() if self.result_cache else None,
+            "http_hosts": self.http.status(),
             "timestamp": time.time()
         }
         
         try:
-            r = self.session.get(f"{self.comfyui_url}/api/systeminfo", timeout=2)
+            r = self.http.get(f"{self.comfyui_url}/api/systeminfo", timeout=2, retries=0)
             if r.status_code == 200:
                 info["comfyui"] = r.json()
         except:
@@ -0,0 +1,187 @@
+"""Run many productions at once while keeping GPU, TTS and CPU busy.
+
+Each pipeline stage declares the resource it occupies (see
+`VideoProductionOrchestrator.STAGE_RESOURCES`):
+- "gpu": ComfyUI image generation (one slot per ComfyUI node by default)
+- "tts": narration synthesis (each stage already sends several chunk requests)
+- "cpu": the ffmpeg composition encode
+
+`BatchScheduler` starts several videos together and their stages queue for
+these pools instead of running videos one after another. While the GPU
+renders video N+1, the CPU encodes video N and narration runs further ahead.
+Slots are granted in video order, so earlier videos finish first.
+Per-resource utilization is reported at the end.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .comfy_pool import parse_urls
+
+
+def default_capacities(comfyui_url: str = "http://localhost:8188") -> Dict[str, int]:
+    """One GPU slot per ComfyUI node, one narration at a time, a quarter of the cores for encodes."""
+    return {
+        "gpu": len(parse_urls(comfyui_url)) or 1,
+        "tts": 1,  # A voice stage already has VOICE_CHUNKING["max_concurrency"] requests in flight
+        "cpu": max(1, (os.cpu_count() or 2) // 4),  # x264 spreads each encode over several cores
+    }
+
+
+class ResourcePool:
+    """Counting semaphore that serves waiters by priority and tracks busy time."""
+
+    def __init__(self, name: str, capacity: int):
+        if capacity < 1:
+            raise ValueError(f"Resource '{name}' needs a capacity of at least 1")
+        self.name = name
+        self.capacity = capacity
+        self.tasks = 0
+        self.busy_seconds = 0.0  # Slot-seconds in use
+        self.wait_seconds = 0.0  # Total time stages spent queued for a slot
+        self.peak_waiting = 0
+        self._in_use = 0
+        self._waiters: List[tuple] = []  # Heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._last_change = time.monotonic()
+
+    def _account(self):
+        now = time.monotonic()
+        self.busy_seconds += self._in_use * (now - self._last_change)
+        self._last_change = now
+
+    @contextmanager
+    def slot(self, priority: int = 0) -> Iterator[None]:
+        """Hold one slot for the duration of the block (lower priority values go first)."""
+        ticket = (priority, next(self._sequence))
+        queued_at = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            self.peak_waiting = max(self.peak_waiting, len(self._waiters))
+            while self._in_use >= self.capacity or self._waiters[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._account()
+            self._in_use += 1
+            self.tasks += 1
+            self.wait_seconds += time.monotonic() - queued_at
+            self._cond.notify_all()  # The next waiter may fit in a remaining slot
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._account()
+                self._in_use -= 1
+                self._cond.notify_all()
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        with self._cond:
+            self._account()
+            return {
+                "capacity": self.capacity,
+                "tasks": self.tasks,
+                "busy_seconds": round(self.busy_seconds, 2),
+                "wait_seconds": round(self.wait_seconds, 2),
+                "peak_waiting": self.peak_waiting,
+                "utilization": round(self.busy_seconds / (self.capacity * elapsed), 3) if elapsed > 0 else 0.0,
+            }
+
+
+class ResourceScheduler:
+    """The set of resource pools shared by every production in a batch."""
+
+    def __init__(self, capacities: Dict[str, int]):
+        """
+        Args:
+            capacities: Slots per resource class, e.g. {"gpu": 1, "tts": 1, "cpu": 2}.
+        """
+        self.pools = {name: ResourcePool(name, capacity) for name, capacity in capacities.items()}
+        self.started_at = time.monotonic()
+
+    def __contains__(self, resource: str) -> bool:
+        return resource in self.pools
+
+    def slot(self, resource: str, priority: int = 0):
+        """Context manager holding one slot of `resource`."""
+        return self.pools[resource].slot(priority)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-resource capacity, task count, busy/wait time and utilization (0-1)."""
+        elapsed = time.monotonic() - self.started_at
+        return {name: pool.stats(elapsed) for name, pool in self.pools.items()}
+
+
+class BatchScheduler:
+    """Produce a list of videos concurrently on shared resource pools."""
+
+    def __init__(
+        self,
+        capacities: Optional[Dict[str, int]] = None,
+        max_in_flight: Optional[int] = None,
+        output_dir: str = "projects/",
+        comfyui_url: str = "http://localhost:8188",
+    ):
+        """
+        Args:
+            capacities: Slots per resource (default: `default_capacities(comfyui_url)`).
+            max_in_flight: Videos started at once (default: total slots + 1, so every
+                resource has a video waiting for it).
+            output_dir: Base directory for the project folders.
+            comfyui_url: ComfyUI endpoint(s) passed to each orchestrator.
+        """
+        self.capacities = capacities or default_capacities(comfyui_url)
+        self.max_in_flight = max_in_flight or sum(self.capacities.values()) + 1
+        self.output_dir = output_dir
+        self.comfyui_url = comfyui_url
+
+    def run(self, videos: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Produce every video; one failure doesn't stop the others.
+
+        Args:
+            videos: `produce_video` keyword arguments per video, optionally
+                with a "project_name" (default: batch_0000, batch_0001, ...).
+
+        Returns:
+            Dict with "results" (per video, in input order: the production
+            result or {"status": "failed", "error": ...}), "elapsed" seconds,
+            "videos_per_hour" and per-resource "utilization".
+        """
+        from .orchestrator import VideoProductionOrchestrator
+
+        resources = ResourceScheduler(self.capacities)
+
+        def produce(index: int, video: Dict[str, Any]) -> Dict[str, Any]:
+            options = dict(video)
+            orchestrator = VideoProductionOrchestrator(
+                options.pop("project_name", None) or f"batch_{index:04d}",
+                output_dir=self.output_dir,
+                comfyui_url=self.comfyui_url,
+            )
+            try:
+                return orchestrator.produce_video(**options, resources=resources, priority=index)
+            except Exception as e:
+                return {"status": "failed", "project_name": orchestrator.project_name, "error": str(e)}
+
+        print(f"\n🎬 Scheduling {len(videos)} videos on {self.capacities} ({self.max_in_flight} in flight)")
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="video") as pool:
+            results = list(pool.map(produce, range(len(videos)), videos))
+
+        elapsed = time.monotonic() - resources.started_at
+        utilization = resources.report()
+        succeeded = sum(1 for r in results if r.get("status") == "success")
+        print(f"📊 Batch complete: {succeeded}/{len(videos)} successful in {elapsed:.1f}s")
+        for name, stats in utilization.items():
+            print(f"   {name}: {stats['utilization']:.0%} busy ({stats['tasks']} stages, "
+                  f"{stats['wait_seconds']:.1f}s queued)")
+        return {
+            "results": results,
+            "elapsed": round(elapsed, 2),
+            "videos_per_hour": round(succeeded * 3600 / elapsed, 1) if elapsed > 0 else 0.0,
+            "utilization": utilization,
+        }
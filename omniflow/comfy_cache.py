@@ -0,0 +1,95 @@
+"""Reuse ComfyUI results for workflows that were already run.
+
+A workflow's cache key is the hash of its canonical JSON (node ids and node
+references normalized, keys sorted), so it covers the checkpoint, prompts,
+sampler settings and seed. Output images are stored content-addressed in a
+`DiskCache` (identical images are kept once); a small manifest per key lists
+them. Evicting any image invalidates the manifests that refer to it.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .disk_cache import DEFAULT_CACHE_DIR, DiskCache
+from .stage_cache import hash_file, hash_inputs
+
+
+COMFY_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "comfyui")
+COMFY_CACHE_MAX_BYTES = int(os.getenv("OMNIFLOW_COMFY_CACHE_MB", "2000")) * 1024 * 1024
+MANIFEST_CACHE_MAX_BYTES = 20 * 1024 * 1024
+
+
+def canonical_workflow(workflow: Dict) -> Dict[str, Dict]:
+    """Workflow with string node ids and `[str(node_id), output]` references.
+
+    ComfyUI accepts either ints or digit strings for both, so they are
+    normalized before hashing.
+    """
+    canonical = {}
+    for node_id, node in workflow.items():
+        inputs = {}
+        for name, value in (node.get("inputs") or {}).items():
+            if (isinstance(value, list) and len(value) == 2
+                    and str(value[0]).isdigit() and isinstance(value[1], int)):
+                value = [str(value[0]), value[1]]
+            inputs[name] = value
+        canonical[str(node_id)] = {**node, "inputs": inputs}
+    return canonical
+
+
+def workflow_cache_key(workflow: Dict) -> str:
+    """Cache key for a ComfyUI API workflow."""
+    return hash_inputs("comfyui-workflow", canonical_workflow(workflow))
+
+
+class ComfyResultCache:
+    """On-disk cache of output images per workflow."""
+
+    def __init__(self, directory: Union[str, Path] = COMFY_CACHE_DIR, max_bytes: int = COMFY_CACHE_MAX_BYTES):
+        """
+        Args:
+            directory: Cache root (images/ and prompts/ are created under it).
+            max_bytes: Size limit for cached images (least recently used go first).
+        """
+        directory = Path(directory)
+        self.images = DiskCache(directory / "images", max_bytes)
+        self.manifests = DiskCache(directory / "prompts", MANIFEST_CACHE_MAX_BYTES, suffix=".json")
+
+    def get(self, key: str) -> Optional[List[Tuple[str, Path]]]:
+        """Return `(node_id, image_path)` pairs for a workflow key, or None on a miss."""
+        manifest_path = self.manifests.get(key)
+        if manifest_path is None:
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        outputs = []
+        for entry in manifest["images"]:
+            path = self.images.get(entry["key"])
+            if path is None:
+                return None  # An image was evicted; the workflow has to run again
+            outputs.append((entry["node_id"], path))
+        return outputs
+
+    def put(self, key: str, outputs: Sequence[Tuple[Optional[str], Union[str, Path]]]):
+        """Store a workflow's output images (`(node_id, path)` pairs)."""
+        entries = []
+        for node_id, path in outputs:
+            # Content-addressed, keeping the extension so entries open as images
+            image_key = hash_file(str(path)) + Path(path).suffix.lower()
+            if self.images.get(image_key) is None:
+                self.images.put_file(image_key, path)
+            entries.append({"node_id": node_id, "key": image_key})
+        self.manifests.put_bytes(key, json.dumps({"images": entries}).encode("utf-8"))
+
+    def stats(self) -> Dict:
+        """Hit/miss counters (per workflow) and image storage size."""
+        stats = self.manifests.stats()
+        images = self.images.stats()
+        stats["bytes"] = images["bytes"]
+        stats["max_bytes"] = images["max_bytes"]
+        return stats
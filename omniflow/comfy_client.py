@@ -1,42 +1,181 @@
+import base64
+import io
+import mimetypes
 import os
-import requests
-from typing import List
-from io import BytesIO
+import shutil
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from urllib.parse import parse_qs, urlparse
+
 from PIL import Image
 
+from .comfy_pool import ComfyNodePool, get_node_pool, parse_urls
+from .http_client import HTTPClient, get_http_client
+
+
+DEFAULT_OUTPUT_DIR = os.getenv("OMNIFLOW_COMFY_OUTPUT_DIR", "outputs/comfyui")
+
+
+@dataclass(frozen=True)
+class ComfyOutput:
+    """A generated image saved on disk; pixels are only decoded by `load`."""
+    path: Path
+    node_id: Optional[str] = None  # ComfyUI node that produced it (None for /run results)
+
+    def __fspath__(self) -> str:
+        return str(self.path)
+
+    def load(self) -> Image.Image:
+        """Decode the image as RGB (the caller owns the returned copy)."""
+        with Image.open(self.path) as img:
+            return img.convert("RGB")
+
+    def save(self, path: Union[str, Path]):
+        """Copy the encoded file to `path` without decoding it."""
+        if Path(path).resolve() != self.path.resolve():
+            shutil.copyfile(self.path, path)
+
+
+def download_file(
+    url: str,
+    dest_path: Union[str, Path],
+    params: Optional[Dict] = None,
+    http: Optional[HTTPClient] = None,
+    timeout: float = 60,
+) -> Path:
+    """Stream a URL to `dest_path` in chunks (never holding the whole body in memory)."""
+    (http or get_http_client()).download(url, dest_path, params=params, timeout=timeout)
+    return Path(dest_path)
+
 
-def run_pipeline(prompt: str, style: str, comfy_api: str = "http://localhost:8188") -> List[Image.Image]:
+def fetch_outputs(
+    comfy_url: str,
+    outputs: Dict[str, Dict],
+    dest_dir: Union[str, Path],
+    http: Optional[HTTPClient] = None,
+    prefix: Optional[str] = None,
+) -> List[ComfyOutput]:
+    """Download a prompt's output images from ComfyUI's /view endpoint.
+
+    `outputs` is the prompt's "outputs" mapping from /history (or the
+    "executed" events): node id -> {"images": [{"filename", "subfolder", "type"}]}.
+    Images keep their ComfyUI file names unless `prefix` is given, in which
+    case they are numbered (`<prefix>0000.png`, ...) in node order.
+    Temporary previews are skipped. All images download concurrently.
+    """
+    http = http or get_http_client()
+    dest_dir = Path(dest_dir)
+    downloads = []
+    for node_id in sorted(outputs, key=lambda n: (len(n), n)):
+        for item in outputs[node_id].get("images") or []:
+            if item.get("type") == "temp" or not item.get("filename"):
+                continue
+            filename = item["filename"]
+            if prefix is not None:
+                filename = f"{prefix}{len(downloads):04d}{Path(filename).suffix}"
+            path = dest_dir / filename
+            future = http.submit(
+                "GET",
+                f"{comfy_url.rstrip('/')}/view",
+                params={
+                    "filename": item["filename"],
+                    "subfolder": item.get("subfolder", ""),
+                    "type": item.get("type", "output"),
+                },
+                dest_path=path,
+            )
+            downloads.append((future, ComfyOutput(path, node_id)))
+
+    for future, output in downloads:
+        future.result().raise_for_status()
+    return [output for _, output in downloads]
+
+
+def run_pipeline(
+    prompt: str,
+    style: str,
+    comfy_api: str = "http://localhost:8188",
+    pool: Optional[ComfyNodePool] = None,
+    output_dir: Optional[Union[str, Path]] = None,
+) -> List[ComfyOutput]:
     """Call a local ComfyUI HTTP API to run a predefined pipeline.
 
     This function assumes ComfyUI or a small wrapper exposes an endpoint like `/run` that accepts
-    JSON payload with `prompt` and `pipeline` fields and returns a list of base64 images or image bytes.
+    JSON payload with `prompt` and `pipeline` fields and returns a list of base64 images or image URLs.
 
     If you don't have such an API, use the PowerShell setup script to run ComfyUI locally and add a lightweight
     HTTP wrapper/plugin for ComfyUI. This module gracefully raises if the endpoint is not available.
+
+    `comfy_api` may list several servers separated by commas; each call then goes to the
+    least-loaded healthy one (see `comfy_pool.ComfyNodePool`), or pass a `pool` directly.
+
+    Images are written to `output_dir` as frame_0000.<ext>, ... (default: a new
+    directory under outputs/comfyui) and returned as `ComfyOutput` handles. The
+    extension follows the image: the URL's file name (or /view `filename`), its
+    Content-Type, or the encoded bytes. Image URLs download concurrently.
+    Requests go through the shared asyncio client (`http_client.get_http_client`).
     """
-    endpoint = os.path.join(comfy_api.rstrip('/'), "run")
+    pool = pool or get_node_pool(parse_urls(comfy_api))
+    http = get_http_client()
+    output_dir = Path(output_dir or Path(DEFAULT_OUTPUT_DIR) / uuid.uuid4().hex[:12])
+    output_dir.mkdir(parents=True, exist_ok=True)
     payload = {
         "prompt": prompt,
         "style": style,
         "pipeline": "ultimate_pipeline.json",
     }
 
-    resp = requests.post(endpoint, json=payload, timeout=60)
+    # The pipeline name stands in for the checkpoint: same pipeline, same models.
+    # No HTTP-level retries: the pool fails over to another node instead.
+    resp = pool.run(
+        lambda node: http.post(f"{node.url}/run", json=payload, timeout=60, retries=0),
+        checkpoint=payload["pipeline"],
+    )
     if resp.status_code != 200:
         raise RuntimeError(f"ComfyUI API returned {resp.status_code}: {resp.text}")
 
-    data = resp.json()
     images = []
-    for item in data.get("images", []):
+    downloads = []
+    for i, item in enumerate(resp.json().get("images", [])):
         # item expected to be base64 bytes or a URL; handle common cases
         if isinstance(item, str) and item.startswith("http"):
-            r = requests.get(item)
-            images.append(Image.open(BytesIO(r.content)).convert("RGB"))
+            path = output_dir / f"frame_{i:04d}{_url_suffix(item)}"
+            downloads.append((http.submit("GET", item, dest_path=path, timeout=60), len(images)))
         else:
-            # assume base64-encoded bytes
-            import base64
+            # assume base64-encoded bytes; written as-is, not decoded to pixels
+            data = base64.b64decode(item)
+            path = output_dir / f"frame_{i:04d}{_image_suffix(data)}"
+            with open(path, "wb") as f:
+                f.write(data)
+        images.append(ComfyOutput(path))
 
-            b = base64.b64decode(item)
-            images.append(Image.open(BytesIO(b)).convert("RGB"))
+    for future, index in downloads:
+        response = future.result()
+        response.raise_for_status()
+        path = images[index].path
+        if not path.suffix:
+            # Neither the URL nor a /view filename named the format; ask the response
+            content_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+            path = path.rename(path.with_suffix(mimetypes.guess_extension(content_type) or ".png"))
+            images[index] = ComfyOutput(path)
 
     return images
+
+
+def _url_suffix(url: str) -> str:
+    """File extension named by an image URL: its /view `filename`, else its path ("" if neither has one)."""
+    parsed = urlparse(url)
+    filename = parse_qs(parsed.query).get("filename", [""])[0] or parsed.path
+    return Path(filename).suffix.lower()
+
+
+def _image_suffix(data: bytes) -> str:
+    """File extension for encoded image bytes, sniffed from their header (".png" if unknown)."""
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            image_format = img.format
+    except Exception:
+        return ".png"
+    return mimetypes.guess_extension(Image.MIME.get(image_format, "")) or ".png"
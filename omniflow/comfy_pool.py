@@ -0,0 +1,245 @@
+"""Load balancing across several ComfyUI servers.
+
+Each node's queue depth and health come from its /queue endpoint. Work is
+routed to the least-loaded healthy node, preferring a node that last ran
+the same checkpoint so the model doesn't have to be reloaded. Nodes that
+fail are taken out of rotation and retried with exponential backoff; when
+every node has failed, work still goes to the one that failed longest ago
+rather than being refused.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from .http_client import HTTPClient, HTTPTimeoutError, RequestError, get_http_client
+
+T = TypeVar("T")
+
+# Errors that mean the node itself is unreachable or stuck (not that the request was bad)
+FAILOVER_ERRORS = (ConnectionError, HTTPTimeoutError)
+
+
+@dataclass
+class ComfyNode:
+    """State of one ComfyUI server."""
+    url: str
+    healthy: bool = True
+    queue_depth: int = 0  # Running + pending prompts, as reported by /queue
+    in_flight: int = 0  # Work we routed here that hasn't finished yet
+    failures: int = 0  # Consecutive failures (drives the backoff)
+    retry_at: float = 0.0  # Monotonic time before which a failed node is skipped
+    checkpoint: Optional[str] = None  # Checkpoint most recently routed here
+    checked_at: float = 0.0
+
+    @property
+    def load(self) -> int:
+        # /queue already counts our submitted prompts, so take whichever is larger
+        return max(self.queue_depth, self.in_flight)
+
+
+def workflow_checkpoint(workflow: Dict) -> Optional[str]:
+    """Name of the checkpoint a ComfyUI API workflow loads, if any."""
+    for node in workflow.values():
+        ckpt_name = (node.get("inputs") or {}).get("ckpt_name")
+        if isinstance(ckpt_name, str):
+            return ckpt_name
+    return None
+
+
+class ComfyNodePool:
+    """Route ComfyUI work to the least-loaded healthy node."""
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        http: Optional[HTTPClient] = None,
+        refresh_interval: float = 2.0,
+        base_backoff: float = 5.0,
+        max_backoff: float = 300.0,
+        affinity_slack: int = 2,
+    ):
+        """
+        Args:
+            urls: ComfyUI base URLs.
+            http: HTTP client for /queue checks (default: the shared client).
+            refresh_interval: Seconds a node's /queue reading stays fresh.
+            base_backoff: Seconds a node sits out after its first failure (doubles per failure).
+            max_backoff: Upper bound for the backoff.
+            affinity_slack: Extra queued prompts accepted to stay on a node that
+                already has the requested checkpoint loaded.
+        """
+        if not urls:
+            raise ValueError("ComfyNodePool needs at least one URL")
+        self.nodes = [ComfyNode(url.rstrip("/")) for url in urls]
+        self.http = http or get_http_client()
+        self.refresh_interval = refresh_interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.affinity_slack = affinity_slack
+        self._lock = threading.Lock()
+
+    def node(self, url: str) -> ComfyNode:
+        """Look up a node by URL."""
+        url = url.rstrip("/")
+        for node in self.nodes:
+            if node.url == url:
+                return node
+        raise KeyError(url)
+
+    def _check(self, node: ComfyNode):
+        """Read one node's queue depth; a connection error or 5xx marks it failed."""
+        try:
+            resp = self.http.get(f"{node.url}/queue", timeout=2, retries=0)
+        except RequestError as e:
+            self.mark_failed(node, e)
+            return
+        if resp.status_code >= 500 and resp.status_code != 501:  # 501: no /queue, but alive
+            self.mark_failed(node, f"HTTP {resp.status_code}")
+            return
+
+        depth = None
+        if resp.status_code == 200:
+            try:
+                queue = resp.json()
+                depth = len(queue.get("queue_running", [])) + len(queue.get("queue_pending", []))
+            except ValueError:
+                pass
+        with self._lock:
+            # Servers without /queue (e.g. a /run wrapper) are balanced on in-flight work only
+            node.queue_depth = depth or 0
+            node.checked_at = time.monotonic()
+            node.healthy = True
+            node.failures = 0
+
+    def refresh(self, force: bool = False):
+        """Re-read /queue on every node whose reading is stale (or all, with `force`)."""
+        now = time.monotonic()
+        stale = [
+            n for n in self.nodes
+            if (force or now - n.checked_at >= self.refresh_interval)
+            and (n.healthy or now >= n.retry_at)
+        ]
+        if len(stale) == 1:
+            self._check(stale[0])
+        elif stale:
+            with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+                list(pool.map(self._check, stale))
+
+    def select(self, checkpoint: Optional[str] = None) -> ComfyNode:
+        """Pick the node for the next piece of work.
+
+        If every node is failed and still backing off, the one that failed
+        longest ago is used anyway, so a single flaky node (or an outage of
+        all of them) slows work down instead of refusing it.
+        """
+        self.refresh()
+        with self._lock:
+            candidates = [n for n in self.nodes if n.healthy]
+            if not candidates:
+                return min(self.nodes, key=lambda n: n.checked_at)
+            least_loaded = min(candidates, key=lambda n: n.load)
+            if checkpoint:
+                warm = [
+                    n for n in candidates
+                    if n.checkpoint == checkpoint
+                    and n.load <= least_loaded.load + self.affinity_slack
+                ]
+                if warm:
+                    return min(warm, key=lambda n: n.load)
+            return least_loaded
+
+    def acquire(self, checkpoint: Optional[str] = None) -> ComfyNode:
+        """Select a node and count the new work against it until `release`."""
+        node = self.select(checkpoint)
+        with self._lock:
+            node.in_flight += 1
+            if checkpoint:
+                node.checkpoint = checkpoint
+        return node
+
+    def release(self, node: ComfyNode):
+        """Mark work routed with `acquire` as finished."""
+        with self._lock:
+            node.in_flight = max(0, node.in_flight - 1)
+
+    def mark_failed(self, node: ComfyNode, error=None):
+        """Drain a node and schedule its next retry with exponential backoff."""
+        with self._lock:
+            node.failures += 1
+            node.healthy = False
+            node.checked_at = time.monotonic()
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (node.failures - 1))
+            node.retry_at = node.checked_at + delay
+        print(f"⚠️  ComfyUI node {node.url} failed ({error}); retrying in {delay:.0f}s")
+
+    @contextmanager
+    def lease(self, checkpoint: Optional[str] = None) -> Iterator[ComfyNode]:
+        """Context manager around `acquire`/`release`; connection errors and timeouts fail the node."""
+        node = self.acquire(checkpoint)
+        try:
+            yield node
+        except FAILOVER_ERRORS as e:
+            self.mark_failed(node, e)
+            raise
+        finally:
+            self.release(node)
+
+    def run(
+        self,
+        func: Callable[[ComfyNode], T],
+        checkpoint: Optional[str] = None,
+        attempts: Optional[int] = None,
+    ) -> T:
+        """Call `func(node)` on the best node, failing over to others on connection errors and timeouts.
+
+        Args:
+            func: Work to run; should raise ConnectionError (e.g. http_client.HTTPConnectionError)
+                if the node is unreachable, or http_client.HTTPTimeoutError if it stops answering.
+            checkpoint: Checkpoint the work needs (for affinity).
+            attempts: Nodes to try at most (default: all of them).
+        """
+        attempts = attempts or len(self.nodes)
+        for attempt in range(attempts):
+            try:
+                with self.lease(checkpoint) as node:
+                    return func(node)
+            except FAILOVER_ERRORS:
+                if attempt == attempts - 1:
+                    raise
+        raise AssertionError("unreachable")
+
+    def status(self) -> List[Dict]:
+        """Snapshot of every node (for logs and dashboards)."""
+        with self._lock:
+            return [
+                {
+                    "url": n.url,
+                    "healthy": n.healthy,
+                    "queue_depth": n.queue_depth,
+                    "in_flight": n.in_flight,
+                    "checkpoint": n.checkpoint,
+                    "failures": n.failures,
+                }
+                for n in self.nodes
+            ]
+
+
+def parse_urls(urls: str) -> List[str]:
+    """Split a comma-separated URL list (e.g. $COMFYUI_URL)."""
+    return [u.strip() for u in urls.split(",") if u.strip()]
+
+
+_pools: Dict[Tuple[str, ...], ComfyNodePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_node_pool(urls: Sequence[str]) -> ComfyNodePool:
+    """Shared pool for a set of URLs, so queue and health state persist between calls."""
+    key = tuple(u.rstrip("/") for u in urls)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ComfyNodePool(key)
+        return _pools[key]
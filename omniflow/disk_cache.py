@@ -0,0 +1,154 @@
+"""Size-bounded on-disk cache for generated media.
+
+Entries are plain files named after their cache key, so cached audio or
+images can be copied or served straight from disk. Reads refresh an entry's
+mtime; when the cache grows past `max_bytes` the least recently used
+entries are deleted first. Several processes (e.g. job workers) may share
+a cache directory, so eviction works from a fresh scan of the directory,
+not only from this process's running total.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from . import telemetry
+
+
+DEFAULT_CACHE_DIR = os.getenv("OMNIFLOW_CACHE_DIR", "outputs/cache")
+
+# Seconds after which the directory is rescanned even if this process's own
+# writes stay under the limit (other processes may have filled it)
+RESCAN_INTERVAL = 60.0
+
+
+class DiskCache:
+    """LRU file cache keyed by hex digests (see `stage_cache.hash_inputs`)."""
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int, suffix: str = ""):
+        """
+        Args:
+            directory: Where entries are stored (created if missing).
+            max_bytes: Total size above which old entries are evicted.
+            suffix: File extension for entries (e.g. ".mp3").
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._size = 0
+        self._scanned_at = 0.0
+        self._scan()
+
+    def _entries(self):
+        # In-progress writes (`_store` temp files) are not entries
+        return (
+            p for p in self.directory.glob(f"*/*{self.suffix}")
+            if p.suffix != ".tmp" and p.is_file()
+        )
+
+    def _scan(self):
+        """(mtime, size, path) of every entry, oldest first; resets the size total."""
+        entries = []
+        for path in self._entries():
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process meanwhile
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        self._size = sum(size for _, size, _ in entries)
+        self._scanned_at = time.monotonic()
+        return entries
+
+    def path_for(self, key: str) -> Path:
+        """Location of the entry for `key` (whether or not it exists)."""
+        return self.directory / key[:2] / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the entry's path and mark it recently used, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            telemetry.record_cache(False)
+            return None
+        with self._lock:
+            self.hits += 1
+        telemetry.record_cache(True)
+        return path
+
+    def put_file(self, key: str, source: Union[str, Path]) -> Path:
+        """Copy `source` into the cache under `key`."""
+        def copy(f):
+            with open(source, "rb") as src:
+                shutil.copyfileobj(src, f)
+
+        return self._store(key, copy)
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        """Store `data` in the cache under `key`."""
+        return self._store(key, lambda f: f.write(data))
+
+    def _store(self, key: str, write) -> Path:
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            with self._lock:
+                old_size = path.stat().st_size if path.exists() else 0
+                os.replace(tmp_path, path)
+                self._size += path.stat().st_size - old_size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+        return path
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in `max_bytes`."""
+        with self._lock:
+            if self._size <= self.max_bytes and time.monotonic() - self._scanned_at < RESCAN_INTERVAL:
+                return
+            # Other processes write to the same directory: count what is really there
+            entries = self._scan()
+            for _, size, path in entries:
+                if self._size <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                self._size -= size
+
+    def clear(self):
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            for path in self._entries():
+                path.unlink()
+            self._size = 0
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
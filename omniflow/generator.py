@@ -3,11 +3,13 @@ from . import comfy_client
 from .dummy_generator import dummy_generate
 
 
-def generate_visuals(channel: str, style: str, prompt: str, use_comfyui: bool = False, comfy_url: str = None):
-    """High-level generator interface. Returns list of image byte arrays or PIL images suitable for Streamlit `st.image`.
+def generate_visuals(channel: str, style: str, prompt: str, use_comfyui: bool = False, comfy_url: str = None,
+                     output_dir: str = None):
+    """High-level generator interface. Returns a list of images.
 
-    - If `use_comfyui` is True, attempts to use the `comfy_client` to run a pipeline.
-    - Otherwise falls back to `dummy_generate` for quick testing.
+    - If `use_comfyui` is True, attempts to use the `comfy_client` to run a pipeline. Images are saved to
+      `output_dir` and returned as `comfy_client.ComfyOutput` handles (use `.path`, or `.load()` for pixels).
+    - Otherwise falls back to `dummy_generate` for quick testing (PIL images).
     """
     if not prompt:
         prompt = f"{channel} - {style} example visual"
@@ -15,7 +17,7 @@ def generate_visuals(channel: str, style: str, prompt: str, use_comfyui: bool =
     if use_comfyui:
         comfy_api = comfy_url or os.getenv("COMFYUI_API_URL", "http://localhost:8188")
         try:
-            imgs = comfy_client.run_pipeline(prompt=prompt, style=style, comfy_api=comfy_api)
+            imgs = comfy_client.run_pipeline(prompt=prompt, style=style, comfy_api=comfy_api, output_dir=output_dir)
             return imgs
         except Exception as e:
             # Bubble up error to UI
@@ -0,0 +1,396 @@
+"""Shared asyncio HTTP layer for every remote call (ComfyUI, ElevenLabs, webhooks).
+
+One aiohttp session runs on a background event loop, so connections are
+pooled and kept alive per host, and any number of requests can be in flight
+without a thread each. Per host there is:
+- a concurrency limit (requests beyond it wait for a free slot),
+- retries with jittered exponential backoff for transient failures
+  (connection errors, timeouts, 429 and 502/503/504),
+- a circuit breaker that fails fast after repeated failures and lets a
+  single probe request through once the cool-down has passed.
+
+Synchronous code uses `HTTPClient` (see `get_http_client`), whose methods
+mirror `requests` closely: `get`/`post` return a buffered `HTTPResponse`,
+`submit` returns a `concurrent.futures.Future`, and `download` streams the
+body to a file. Async code can use `AsyncHTTPClient` directly.
+
+Every request is recorded as a telemetry span (kind "http") with its
+status, retries and bytes sent/received.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from . import telemetry
+
+
+MAX_CONNECTIONS = int(os.getenv("OMNIFLOW_HTTP_MAX_CONNECTIONS", "100"))
+MAX_PER_HOST = int(os.getenv("OMNIFLOW_HTTP_MAX_PER_HOST", "16"))
+KEEPALIVE_SECONDS = 30.0
+DEFAULT_TIMEOUT = (10, 60)  # (connect, read) seconds, like requests
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Methods that are safe to resend; POSTs are only retried when the caller says so
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class RequestError(Exception):
+    """Base class for errors raised by the HTTP layer."""
+
+
+class HTTPConnectionError(RequestError, ConnectionError):
+    """The host could not be reached (or dropped the connection)."""
+
+
+class HTTPTimeoutError(RequestError, TimeoutError):
+    """Connecting or reading took longer than the timeout."""
+
+
+class CircuitOpenError(HTTPConnectionError):
+    """The host failed repeatedly and is being skipped until its cool-down ends."""
+
+
+class HTTPStatusError(RequestError):
+    """Raised by `HTTPResponse.raise_for_status` for 4xx/5xx responses."""
+
+    def __init__(self, message: str, response: "HTTPResponse"):
+        super().__init__(message)
+        self.response = response
+
+
+@dataclass
+class HTTPResponse:
+    """A completed response (the body is buffered unless it was downloaded to a file)."""
+    status_code: int
+    url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    content: bytes = b""
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise HTTPStatusError(f"HTTP {self.status_code} for {self.url}: {self.text[:200]}", self)
+
+
+@dataclass
+class RetryPolicy:
+    """How often and how patiently transient failures are retried."""
+    retries: int = 3
+    backoff: float = 0.5  # Seconds before the first retry; doubles per attempt
+    max_backoff: float = 20.0
+
+    def delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full-jitter backoff for retry number `attempt` (0-based), honouring Retry-After."""
+        if retry_after:
+            try:
+                return min(self.max_backoff, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per-host failure counter: closed -> open (fail fast) -> half-open (one probe)."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_request(self, host: str):
+        """Raise CircuitOpenError unless a request may go to the host now."""
+        state = self.state
+        if state == "open":
+            remaining = max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+            raise CircuitOpenError(f"{host} is failing; skipping it for another {remaining:.0f}s")
+        if state == "half-open":
+            self._probing = True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+def _body_size(json_body: Any, data: Any) -> int:
+    """Approximate request body size in bytes (exact for bytes and str bodies)."""
+    if json_body is not None:
+        return len(json.dumps(json_body).encode("utf-8"))
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    if isinstance(data, str):
+        return len(data.encode("utf-8"))
+    return 0
+
+
+def _client_timeout(timeout: Optional[Timeout]) -> aiohttp.ClientTimeout:
+    connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+    return aiohttp.ClientTimeout(total=None, sock_connect=connect, sock_read=read)
+
+
+class AsyncHTTPClient:
+    """Pooled aiohttp client with per-host limits, retries and circuit breakers.
+
+    Create and use it on a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = MAX_CONNECTIONS,
+        max_per_host: int = MAX_PER_HOST,
+        host_limits: Optional[Dict[str, int]] = None,
+        retry: Optional[RetryPolicy] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        """
+        Args:
+            max_connections: Open connections across all hosts.
+            max_per_host: Concurrent requests per host (netloc) unless overridden.
+            host_limits: Per-host overrides, e.g. {"api.elevenlabs.io": 4}.
+            retry: Default retry policy.
+            failure_threshold: Consecutive failures that open a host's circuit.
+            reset_timeout: Seconds an open circuit waits before a probe request.
+        """
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.host_limits = dict(host_limits or {})
+        self.retry = retry or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=0,  # Per-host concurrency is enforced by our semaphores
+                keepalive_timeout=KEEPALIVE_SECONDS,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    def _host_state(self, url: str) -> Tuple[str, asyncio.Semaphore, CircuitBreaker]:
+        host = urlsplit(url).netloc
+        if host not in self._semaphores:
+            hostname = host.rsplit(":", 1)[0]
+            limit = self.host_limits.get(host, self.host_limits.get(hostname, self.max_per_host))
+            self._semaphores[host] = asyncio.Semaphore(limit)
+            self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return host, self._semaphores[host], self.breakers[host]
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        params: Optional[Dict] = None,
+        json: Any = None,
+        data: Any = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Timeout] = DEFAULT_TIMEOUT,
+        retries: Optional[int] = None,
+        dest_path: Optional[Union[str, Path]] = None,
+    ) -> HTTPResponse:
+        """Send a request and return the response.
+
+        Args:
+            method: HTTP method.
+            url: Absolute URL.
+            params: Query parameters.
+            json: JSON body.
+            data: Raw body.
+            headers: Extra headers.
+            timeout: Seconds, or (connect, read) seconds.
+            retries: Retries for transient failures (default: the client's policy
+                for idempotent methods, none for POST/PATCH).
+            dest_path: Stream a successful body to this file (via a .part file)
+                instead of buffering it; `content` is then empty.
+
+        Raises:
+            HTTPConnectionError, HTTPTimeoutError, CircuitOpenError: When every attempt failed.
+        """
+        method = method.upper()
+        if retries is None:
+            retries = self.retry.retries if method in IDEMPOTENT_METHODS else 0
+        host, semaphore, breaker = self._host_state(url)
+
+        # CPU time means little for a coroutine sharing the loop thread, so only wall time is kept
+        with telemetry.span(f"{method} {host}", kind="http", measure_cpu=False, path=urlsplit(url).path) as span:
+            request_size = _body_size(json, data)
+            for attempt in range(retries + 1):
+                if attempt:
+                    span.add(retries=1)
+                breaker.before_request(host)
+                try:
+                    async with semaphore:
+                        response = await self._send(
+                            method, url, params, json, data, headers, timeout, dest_path
+                        )
+                except (HTTPConnectionError, HTTPTimeoutError):
+                    breaker.record_failure()
+                    if attempt == retries:
+                        raise
+                    await asyncio.sleep(self.retry.delay(attempt))
+                    continue
+                finally:
+                    span.add(bytes_out=request_size)
+
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                if response.status_code in RETRY_STATUSES and attempt < retries:
+                    await asyncio.sleep(self.retry.delay(attempt, response.headers.get("Retry-After")))
+                    continue
+                span.add(bytes_in=len(response.content) if dest_path is None or not response.ok
+                         else os.path.getsize(dest_path))
+                span.set(status_code=response.status_code)
+                return response
+            raise AssertionError("unreachable")
+
+    async def _send(self, method, url, params, json, data, headers, timeout, dest_path) -> HTTPResponse:
+        try:
+            async with self._get_session().request(
+                method,
+                url,
+                params=params,
+                json=json,
+                data=data,
+                headers=headers,
+                timeout=_client_timeout(timeout),
+            ) as resp:
+                response = HTTPResponse(resp.status, str(resp.url), dict(resp.headers))
+                if dest_path is None or resp.status >= 400:
+                    response.content = await resp.read()
+                else:
+                    await self._stream_to_file(resp, Path(dest_path))
+                return response
+        except asyncio.TimeoutError as e:
+            raise HTTPTimeoutError(f"{method} {url} timed out") from e
+        except (aiohttp.ClientConnectionError, OSError) as e:
+            raise HTTPConnectionError(f"{method} {url} failed: {e}") from e
+        except aiohttp.ClientError as e:
+            raise RequestError(f"{method} {url} failed: {e}") from e
+
+    @staticmethod
+    async def _stream_to_file(resp: aiohttp.ClientResponse, dest_path: Path):
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        part_path = dest_path.with_name(dest_path.name + ".part")
+        try:
+            with open(part_path, "wb") as f:
+                async for chunk in resp.content.iter_chunked(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+            os.replace(part_path, dest_path)
+        finally:
+            if part_path.exists():
+                part_path.unlink()
+
+    def status(self) -> Dict[str, Dict]:
+        """Circuit state and failure count per host."""
+        return {
+            host: {"state": breaker.state, "failures": breaker.failures}
+            for host, breaker in self.breakers.items()
+        }
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+
+class HTTPClient:
+    """Blocking facade over `AsyncHTTPClient`, running it on a background event loop."""
+
+    def __init__(self, **options):
+        """
+        Args:
+            **options: Passed to `AsyncHTTPClient`.
+        """
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="omniflow-http", daemon=True)
+        self._thread.start()
+        self.client = AsyncHTTPClient(**options)
+
+    def submit(self, method: str, url: str, **kwargs) -> "Future[HTTPResponse]":
+        """Start a request without waiting for it (see `AsyncHTTPClient.request`)."""
+        return asyncio.run_coroutine_threadsafe(self.client.request(method, url, **kwargs), self._loop)
+
+    def request(self, method: str, url: str, **kwargs) -> HTTPResponse:
+        """Send a request and wait for the response."""
+        return self.submit(method, url, **kwargs).result()
+
+    def get(self, url: str, **kwargs) -> HTTPResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> HTTPResponse:
+        return self.request("POST", url, **kwargs)
+
+    def download(self, url: str, dest_path: Union[str, Path], method: str = "GET", **kwargs) -> HTTPResponse:
+        """Stream a response body to `dest_path`; raises HTTPStatusError on 4xx/5xx."""
+        response = self.request(method, url, dest_path=dest_path, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def status(self) -> Dict[str, Dict]:
+        """Circuit state and failure count per host."""
+        return self.client.status()
+
+    def close(self):
+        """Close pooled connections and stop the event loop."""
+        asyncio.run_coroutine_threadsafe(self.client.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+_client: Optional[HTTPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """The process-wide client (created on first use)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HTTPClient()
+        return _client
@@ -0,0 +1,244 @@
+"""Durable job queue for batch video production, backed by SQLite.
+
+Jobs are rows in a single database file, so they survive restarts and can
+be shared by several worker processes (see `job_worker`):
+- `enqueue`/`enqueue_many` add jobs (a JSON payload each)
+- `claim` hands the oldest queued job to a worker under a time-limited lease
+- workers `heartbeat` to extend the lease while they work, then `complete` or `fail`
+- a job whose lease ran out (its worker crashed or was killed) is claimed again
+
+A job is attempted at most `max_attempts` times before it is marked failed.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+
+DEFAULT_QUEUE_PATH = os.getenv("OMNIFLOW_QUEUE_PATH", "outputs/jobs.sqlite3")
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+STATUSES = ("queued", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT,
+    status TEXT NOT NULL DEFAULT 'queued',
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch);
+"""
+
+
+@dataclass
+class Job:
+    """One queued production."""
+    id: int
+    batch: Optional[str]
+    status: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_expires: Optional[float] = None
+    created_at: Optional[float] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "Job":
+        fields = dict(row)
+        fields["payload"] = json.loads(fields["payload"])
+        if fields["result"] is not None:
+            fields["result"] = json.loads(fields["result"])
+        return cls(**fields)
+
+
+class JobQueue:
+    """Persistent FIFO queue with leases, safe to use from several processes."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_QUEUE_PATH):
+        """
+        Args:
+            path: SQLite database file (created if missing).
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")  # Readers (the UI) never block workers
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection per call keeps the queue usable from any thread or process
+        db = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that takes the database lock up front."""
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def enqueue(
+        self,
+        payload: Dict[str, Any],
+        batch: Optional[str] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> int:
+        """Add one job and return its id."""
+        return self.enqueue_many([payload], batch, max_attempts)[0]
+
+    def enqueue_many(
+        self,
+        payloads: Iterable[Dict[str, Any]],
+        batch: Optional[str] = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    ) -> List[int]:
+        """Add several jobs in one transaction and return their ids (in order)."""
+        now = time.time()
+        ids = []
+        with self._transaction() as db:
+            for payload in payloads:
+                cursor = db.execute(
+                    "INSERT INTO jobs (batch, payload, max_attempts, created_at) VALUES (?, ?, ?, ?)",
+                    (batch, json.dumps(payload, default=str), max_attempts, now),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Job]:
+        """Lease the oldest runnable job to `worker_id`, or return None if there is none.
+
+        Running jobs whose lease has expired are runnable again; ones that
+        have used up their attempts are marked failed instead.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'Worker lost (lease expired)'),"
+                " lease_owner = NULL, finished_at = ?"
+                " WHERE status = 'running' AND lease_expires < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = db.execute(
+                "SELECT id FROM jobs"
+                " WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?)"
+                " ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            db.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?,"
+                " lease_expires = ?, started_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, row["id"]),
+            )
+            return Job.from_row(db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id: int, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> bool:
+        """Extend a lease; False if the worker no longer holds it."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+        """Mark a leased job done; False if the lease was lost."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL,"
+                " lease_expires = NULL, finished_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result, default=str), time.time(), job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str, retry: bool = True) -> bool:
+        """Record a failed attempt; the job is queued again while attempts remain."""
+        with self._transaction() as db:
+            cursor = db.execute(
+                "UPDATE jobs SET"
+                " status = CASE WHEN ? AND attempts < max_attempts THEN 'queued' ELSE 'failed' END,"
+                " finished_at = CASE WHEN ? AND attempts < max_attempts THEN NULL ELSE ? END,"
+                " error = ?, lease_owner = NULL, lease_expires = NULL"
+                " WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (retry, retry, time.time(), error, job_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def retry_failed(self, batch: Optional[str] = None) -> int:
+        """Queue failed jobs again with a fresh set of attempts; returns how many."""
+        query = "UPDATE jobs SET status = 'queued', attempts = 0, finished_at = NULL WHERE status = 'failed'"
+        params: tuple = ()
+        if batch is not None:
+            query += " AND batch = ?"
+            params = (batch,)
+        with self._transaction() as db:
+            return db.execute(query, params).rowcount
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._connect() as db:
+            row = db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def jobs(self, batch: Optional[str] = None, status: Optional[str] = None, limit: int = 1000) -> List[Job]:
+        """Jobs in queue order, optionally filtered by batch and status."""
+        query, params = "SELECT * FROM jobs WHERE 1 = 1", []
+        if batch is not None:
+            query += " AND batch = ?"
+            params.append(batch)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+        with self._connect() as db:
+            return [Job.from_row(row) for row in db.execute(query, params)]
+
+    def counts(self, batch: Optional[str] = None) -> Dict[str, int]:
+        """Number of jobs per status."""
+        query, params = "SELECT status, COUNT(*) FROM jobs", ()
+        if batch is not None:
+            query += " WHERE batch = ?"
+            params = (batch,)
+        with self._connect() as db:
+            counts = dict(db.execute(query + " GROUP BY status", params).fetchall())
+        return {status: counts.get(status, 0) for status in STATUSES}
+
+    def batches(self) -> List[str]:
+        """Batch names, newest first."""
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT batch FROM jobs WHERE batch IS NOT NULL GROUP BY batch ORDER BY MAX(id) DESC"
+            ).fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,312 @@
+"""Worker daemon that produces the videos waiting in the job queue.
+
+Run it alongside the Streamlit app (which only enqueues and reads status):
+
+    python -m omniflow.job_worker --workers 4
+    python -m omniflow.job_worker --enqueue scripts.csv --batch overnight [--publish]
+    python -m omniflow.job_worker --status
+    python -m omniflow.job_worker --workers 4 --metrics-port 9100
+
+Each worker is a long-lived process that claims one job at a time, runs it
+through `VideoProductionOrchestrator` and records the outcome. Every job
+gets a stable project directory, so a retried job resumes from its cached
+stages instead of starting over. Ctrl+C (or SIGTERM) lets running jobs
+finish; a second Ctrl+C stops immediately, and the interrupted jobs are
+picked up again once their leases expire. A worker that loses its lease
+(e.g. it stalled past the expiry and another worker reclaimed the job)
+cancels its production instead of racing the new owner.
+
+With --metrics-port, worker i serves Prometheus metrics (see `telemetry`)
+on port + i.
+"""
+import argparse
+import csv
+import multiprocessing
+import os
+import re
+import signal
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from .job_queue import DEFAULT_LEASE_SECONDS, DEFAULT_QUEUE_PATH, Job, JobQueue
+
+
+POLL_INTERVAL = 5.0  # Seconds an idle worker waits before looking for work again
+
+# CSV columns passed through to produce_video, besides script/title/description
+_TEXT_OPTIONS = ("channel_template", "visual_style", "voice_id", "schedule_publish_at",
+                 "encode_profile", "tts_backend", "project_name")
+_BOOL_OPTIONS = ("publish_to_youtube", "enhance_script")
+
+
+def default_worker_count() -> int:
+    """Half the cores: each production also runs multi-threaded ffmpeg encodes."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def payload_from_row(row: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Turn a CSV row into a job payload (None if it has no script).
+
+    Recognized columns: script, title, description, tags (comma-separated),
+    plus the produce_video options in _TEXT_OPTIONS and _BOOL_OPTIONS.
+    Empty cells fall back to `defaults`.
+    """
+    def cell(name):
+        value = row.get(name)
+        if value is None or value != value:  # Missing, or NaN from pandas
+            return None
+        value = str(value).strip()
+        return value or None
+
+    script = cell("script")
+    if not script:
+        return None
+
+    payload = dict(defaults or {})
+    payload["script"] = script
+    payload["title"] = (cell("title") or script.split("\n", 1)[0])[:100]
+    payload["description"] = cell("description") or ""
+    if cell("tags"):
+        payload["tags"] = [tag.strip() for tag in cell("tags").split(",") if tag.strip()]
+    for name in _TEXT_OPTIONS:
+        if cell(name):
+            payload[name] = cell(name)
+    for name in _BOOL_OPTIONS:
+        if cell(name):
+            payload[name] = cell(name).lower() in ("1", "true", "yes", "y")
+    return payload
+
+
+def enqueue_csv(path: str, queue: JobQueue, batch: Optional[str] = None, **defaults) -> List[int]:
+    """Queue one job per CSV row with a script; returns the job ids."""
+    with open(path, newline="", encoding="utf-8") as f:
+        payloads = [p for p in (payload_from_row(row, defaults) for row in csv.DictReader(f)) if p]
+    return queue.enqueue_many(payloads, batch=batch)
+
+
+def run_job(job: Job, cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """Produce the video described by a job payload (aborted once `cancel_event` is set)."""
+    from .orchestrator import VideoProductionOrchestrator
+
+    options = dict(job.payload)
+    project_name = options.pop("project_name", None) or f"{job.batch or 'job'}_{job.id:05d}"
+    project_name = re.sub(r"[^\w.-]+", "_", project_name)
+    orchestrator = VideoProductionOrchestrator(
+        project_name,
+        output_dir=options.pop("output_dir", "projects/"),
+        comfyui_url=options.pop("comfyui_url", os.getenv("COMFYUI_URL", "http://localhost:8188")),
+    )
+    result = orchestrator.produce_video(**options, cancel_event=cancel_event)
+    return {
+        "project_name": result["project_name"],
+        "video_path": result["video"].get("video_path"),
+        "youtube": result.get("youtube") or {},
+        "logs": result["logs"],
+    }
+
+
+def _keep_leased(
+    queue: JobQueue,
+    job: Job,
+    worker_id: str,
+    lease_seconds: float,
+    done: threading.Event,
+    lost: threading.Event,
+):
+    """Extend the job's lease until `done` is set; set `lost` if the lease is lost."""
+    interval = lease_seconds / 3
+    expires = time.monotonic() + lease_seconds
+    while not done.wait(interval):
+        try:
+            held = queue.heartbeat(job.id, worker_id, lease_seconds)
+        except sqlite3.Error as e:
+            if time.monotonic() < expires:
+                # E.g. "database is locked": retry soon, well before the lease runs out
+                print(f"⚠️  [{worker_id}] Heartbeat for job {job.id} failed ({e}), retrying")
+                interval = min(5.0, lease_seconds / 10)
+                continue
+            held = False  # Expired meanwhile: another worker may have claimed the job
+        if not held:
+            print(f"⚠️  [{worker_id}] Lost the lease on job {job.id}, cancelling it")
+            lost.set()
+            return
+        expires = time.monotonic() + lease_seconds
+        interval = lease_seconds / 3
+
+
+def worker_loop(
+    queue_path: str,
+    worker_id: str,
+    stop: Optional[Any] = None,
+    poll_interval: float = POLL_INTERVAL,
+    lease_seconds: float = DEFAULT_LEASE_SECONDS,
+    metrics_port: Optional[int] = None,
+):
+    """Claim and run jobs until `stop` (a multiprocessing Event) is set."""
+    if stop is not None:
+        # The supervisor handles Ctrl+C; a pool worker only stops between jobs. Its own
+        # session keeps the terminal's Ctrl+C away from the ffmpeg processes it runs too.
+        if hasattr(os, "setsid"):
+            os.setsid()
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if metrics_port is not None:
+        from .telemetry import start_metrics_server
+        start_metrics_server(metrics_port)
+    queue = JobQueue(queue_path)
+    while stop is None or not stop.is_set():
+        job = queue.claim(worker_id, lease_seconds)
+        if job is None:
+            if stop is None:
+                return  # Single pass (used by tests and --once)
+            stop.wait(poll_interval)
+            continue
+
+        print(f"🎬 [{worker_id}] Job {job.id} (attempt {job.attempts}/{job.max_attempts}): {job.payload.get('title', '')}")
+        done, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(
+            target=_keep_leased, args=(queue, job, worker_id, lease_seconds, done, lost), daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = run_job(job, cancel_event=lost)
+        except Exception as e:
+            if lost.is_set():
+                print(f"⏹️  [{worker_id}] Job {job.id} cancelled (lease lost)")
+            else:
+                queue.fail(job.id, worker_id, f"{type(e).__name__}: {e}")
+                print(f"❌ [{worker_id}] Job {job.id} failed: {e}")
+        else:
+            # complete() only succeeds while this worker still holds the lease
+            if not lost.is_set() and queue.complete(job.id, worker_id, result):
+                print(f"✅ [{worker_id}] Job {job.id} done: {result['video_path']}")
+            else:
+                print(f"⚠️  [{worker_id}] Job {job.id} finished after losing its lease; result discarded")
+        finally:
+            done.set()
+            heartbeat.join()
+
+
+class WorkerPool:
+    """Supervise long-lived worker processes, restarting any that die."""
+
+    def __init__(
+        self,
+        queue_path: str = DEFAULT_QUEUE_PATH,
+        workers: Optional[int] = None,
+        poll_interval: float = POLL_INTERVAL,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        metrics_port: Optional[int] = None,
+    ):
+        """
+        Args:
+            queue_path: SQLite queue shared with the producers.
+            workers: Number of worker processes (default: `default_worker_count()`).
+            poll_interval: Seconds idle workers wait between queue checks.
+            lease_seconds: Lease length; a crashed worker's job is retried after this.
+            metrics_port: First port for per-worker Prometheus metrics (None: off).
+        """
+        self.queue_path = str(queue_path)
+        self.workers = workers or default_worker_count()
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.metrics_port = metrics_port
+        self.stop = multiprocessing.Event()
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self._ports: Dict[str, Optional[int]] = {}
+
+    def _spawn(self, worker_id: str):
+        if worker_id not in self._ports:
+            # A restarted worker takes over the port of the one it replaces
+            self._ports[worker_id] = None if self.metrics_port is None else self.metrics_port + len(self._ports)
+        process = multiprocessing.Process(
+            target=worker_loop,
+            args=(self.queue_path, worker_id, self.stop, self.poll_interval, self.lease_seconds,
+                  self._ports[worker_id]),
+            name=worker_id,
+        )
+        process.start()
+        self.processes[worker_id] = process
+
+    def run(self):
+        """Start the workers and block until stopped (Ctrl+C or SIGTERM)."""
+        JobQueue(self.queue_path)  # Create the database before the workers race to
+        host = socket.gethostname()
+        print(f"🚀 Starting {self.workers} worker(s) on {self.queue_path}")
+        signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        for i in range(self.workers):
+            self._spawn(f"{host}-{os.getpid()}-w{i}")
+
+        try:
+            while not self.stop.is_set():
+                for worker_id, process in list(self.processes.items()):
+                    if not process.is_alive():
+                        print(f"⚠️  Worker {worker_id} exited ({process.exitcode}), restarting")
+                        self._spawn(worker_id)
+                self.stop.wait(1.0)
+            print("⏹️  Stopping after the current jobs finish (Ctrl+C again to abort)")
+            for process in self.processes.values():
+                process.join()
+        except KeyboardInterrupt:
+            if not self.stop.is_set():
+                self.stop.set()
+                print("⏹️  Stopping after the current jobs finish (Ctrl+C again to abort)")
+                try:
+                    for process in self.processes.values():
+                        process.join()
+                    return
+                except KeyboardInterrupt:
+                    pass
+            for process in self.processes.values():
+                self._abort(process)
+            for process in self.processes.values():
+                process.join()
+
+    @staticmethod
+    def _abort(process: multiprocessing.Process):
+        """Stop a worker now, along with the ffmpeg processes in its session."""
+        if hasattr(os, "killpg") and process.pid:
+            try:
+                os.killpg(process.pid, signal.SIGTERM)  # The worker leads its own process group
+                return
+            except OSError:
+                pass
+        process.terminate()
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    parser = argparse.ArgumentParser(description="Run or feed the batch video production queue.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite queue file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help=f"Worker processes (default: {default_worker_count()})")
+    parser.add_argument("--lease", type=float, default=DEFAULT_LEASE_SECONDS,
+                        help="Seconds before a silent worker's job is handed to another")
+    parser.add_argument("--enqueue", metavar="CSV", help="Queue one job per row and exit")
+    parser.add_argument("--batch", help="Batch name for --enqueue")
+    parser.add_argument("--publish", action="store_true",
+                        help="Upload --enqueue'd videos to YouTube (off by default; a publish_to_youtube column wins)")
+    parser.add_argument("--status", action="store_true", help="Print job counts and exit")
+    parser.add_argument("--once", action="store_true", help="Run queued jobs in this process, then exit")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Serve Prometheus metrics here (worker i uses port + i)")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue)
+    if args.enqueue:
+        ids = enqueue_csv(args.enqueue, queue, batch=args.batch, publish_to_youtube=args.publish)
+        print(f"📋 Queued {len(ids)} job(s)")
+    elif args.status:
+        for batch in [None] + queue.batches():
+            print(f"{batch or 'all'}: {queue.counts(batch)}")
+    elif args.once:
+        worker_loop(args.queue, f"{socket.gethostname()}-{os.getpid()}", lease_seconds=args.lease,
+                    metrics_port=args.metrics_port)
+    else:
+        WorkerPool(args.queue, args.workers, lease_seconds=args.lease, metrics_port=args.metrics_port).run()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,71 +5,124 @@ Orchestrates:
 2. Voice synthesis (ElevenLabs)
 3. Video composition (FFmpeg)
 4. YouTube publishing (n8n/Make)
+
+Visuals and voice don't depend on each other, so they run concurrently
+via the stage executor. Each stage result is cached under a hash of its
+inputs, so rerunning a project resumes from the first stage that changed.
+Stage timings, bytes, retries and cache hits are traced to trace.jsonl.
 """
 import os
+import re
 import json
+import hashlib
+import threading
 from pathlib import Path
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 from datetime import datetime
 
+from . import telemetry
+from .stage_cache import StageCache, hash_file, hash_inputs, load_metadata
+from .stage_executor import Stage, StageExecutor
+
 
 class VideoProductionOrchestrator:
     """High-level orchestration for complete video production pipeline."""
     
+    # Per-stage timeouts in seconds (None = no timeout)
+    DEFAULT_STAGE_TIMEOUTS = {
+        "enhancement": 120,
+        "visuals": 1800,
+        "voice": 900,
+        "composition": 3600,
+        "youtube": 600,
+    }
+    
+    # Inputs that affect stage outputs (part of each stage's cache key)
+    ENHANCEMENT_PARAMS = {
+        "target_duration_seconds": 600,
+        "tone": "professional",
+        "style": "documentary",
+        "enhance_hook": True,
+        "enhance_cta": True,
+    }
+    VISUALS_WORKFLOW = "ultimate_pipeline.json"
+    VOICE_SETTINGS = {"stability": 0.5, "similarity": 0.75, "model_id": "eleven_multilingual_v2"}
+    # Synthesize narration as parallel sentence/paragraph chunks
+    VOICE_CHUNKING = {"chunked": True, "max_concurrency": 4}
+    COMPOSITION_PARAMS = {"fps": 24, "title_duration": 3.0}
+    # Shared resource each stage occupies when run under a batch_scheduler.ResourceScheduler
+    STAGE_RESOURCES = {"visuals": "gpu", "voice": "tts", "composition": "cpu"}
+    
     def __init__(
         self,
         project_name: str,
         output_dir: str = "projects/",
         comfyui_url: str = "http://localhost:8188",
+        stage_timeouts: Optional[Dict[str, Optional[float]]] = None,
+        progress_callback: Optional[Callable] = None,
     ):
         """
         Args:
             project_name: Name of the project (e.g., "daily_video_2026-02-07").
             output_dir: Base directory for all project outputs.
-            comfyui_url: ComfyUI API endpoint.
+            comfyui_url: ComfyUI API endpoint (comma-separate several to load-balance).
+            stage_timeouts: Overrides for DEFAULT_STAGE_TIMEOUTS, keyed by stage name.
+            progress_callback: Receives video_composer.EncodeProgress events while encoding.
         """
         self.project_name = project_name
         self.output_dir = Path(output_dir) / project_name
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.comfyui_url = comfyui_url
+        self.stage_timeouts = {**self.DEFAULT_STAGE_TIMEOUTS, **(stage_timeouts or {})}
+        self._log_lock = threading.Lock()
+        self.progress_callback = progress_callback
         
         self.log_file = self.output_dir / "production.log"
+        self.trace_file = self.output_dir / "trace.jsonl"
+        self.tracer = telemetry.Tracer(self.trace_file, project=project_name)
         self.metadata_file = self.output_dir / "metadata.json"
         
-        self.metadata = {
+        # Resume from a previous run of this project if metadata exists
+        self.metadata = load_metadata(self.metadata_file) or {
             "project_name": project_name,
             "created_at": datetime.now().isoformat(),
             "stages": {},
         }
+        self.stage_cache = StageCache(self.metadata, self.metadata_file)
 
     def _log(self, stage: str, message: str, status: str = "INFO"):
         """Log production events."""
         log_entry = f"[{datetime.now().isoformat()}] [{stage}] {status}: {message}"
-        print(log_entry)
-        with open(self.log_file, "a") as f:
-            f.write(log_entry + "\n")
+        with self._log_lock:
+            print(log_entry)
+            with open(self.log_file, "a") as f:
+                f.write(log_entry + "\n")
 
     def _stage_script_enhancement(self, script: str, channel_template: str) -> str:
         """Enhance script using AI for maximum engagement."""
+        cache_key = hash_inputs("enhancement", script, self.ENHANCEMENT_PARAMS)
+        cached = self.stage_cache.lookup("enhancement", cache_key)
+        if cached is not None:
+            self._log("ENHANCE", "Using cached enhanced script")
+            return cached["enhanced_script"]
+        
         try:
             from . import script_enhancer
             
             enhancer = script_enhancer.ScriptEnhancer()
             result = enhancer.enhance_script(
                 script=script,
-                target_duration_seconds=600,
-                tone="professional",
-                style="documentary",
-                enhance_hook=True,
-                enhance_cta=True,
+                **self.ENHANCEMENT_PARAMS,
             )
             
             enhanced = result.get("enhanced_script", script)
-            self.metadata["stages"]["enhancement"] = {
-                "status": "success",
-                "improvements": result.get("improvements_made", []),
-                "engagement_score": result.get("engagement_score", 0),
-            }
+            self.stage_cache.record(
+                "enhancement",
+                cache_key,
+                {"enhanced_script": enhanced},
+                improvements=result.get("improvements_made", []),
+                engagement_score=result.get("engagement_score", 0),
+            )
             
             self._log("ENHANCE", f"Script enhanced - engagement score: {result.get('engagement_score', 0)}")
             return enhanced
@@ -89,6 +142,13 @@ class VideoProductionOrchestrator:
         schedule_publish_at: Optional[str] = None,
         publish_to_youtube: bool = True,
         enhance_script: bool = True,
+        encode_segments: int = 1,
+        stream_frames: bool = False,
+        encode_profile: str = "standard",
+        tts_backend: str = "elevenlabs",
+        resources=None,
+        priority: int = 0,
+        cancel_event=None,
     ) -> Dict:
         """Complete video production from script to YouTube publication.
         
@@ -103,6 +163,19 @@ class VideoProductionOrchestrator:
             schedule_publish_at: ISO 8601 timestamp to schedule publishing.
             publish_to_youtube: Whether to publish automatically.
             enhance_script: Whether to enhance script with AI optimization.
+            encode_segments: Split the final encode into this many parallel segments.
+            stream_frames: Pipe frames that are still in memory straight to ffmpeg
+                instead of round-tripping through PNG files (frames ComfyUI
+                already saved to disk are composed from those files).
+            encode_profile: Encode profile for the final video ("draft" renders a
+                fast 540p preview, "archival" a high-quality master).
+            tts_backend: Narration engine ("local" renders offline placeholder
+                audio with exact timing, e.g. for drafts and dry runs).
+            resources: Resource pools shared with other productions (see
+                `batch_scheduler.BatchScheduler`); stages wait for a slot.
+            priority: This production's place in the resource queues (lower goes first).
+            cancel_event: threading.Event that aborts the production when set;
+                running encodes are stopped (see `StageExecutor`).
             
         Returns:
             Dict with paths and status of all generated files.
@@ -110,40 +183,75 @@ class VideoProductionOrchestrator:
         try:
             self._log("ORCHESTRATOR", f"Starting production for '{title}'")
             
+            stages = []
+            
             # Stage 0: Script Enhancement (Optional)
-            enhanced_script = script
-            if enhance_script:
+            def run_enhancement(deps):
                 self._log("STAGE_0", "Enhancing script...")
-                enhanced_script = self._stage_script_enhancement(script, channel_template)
+                return self._stage_script_enhancement(script, channel_template)
             
-            # Stage 1: Visual Generation
-            self._log("STAGE_1", "Generating visuals...")
-            visuals_result = self._stage_visuals(enhanced_script, channel_template, visual_style)
+            script_deps = []
+            if enhance_script:
+                stages.append(self._make_stage("enhancement", run_enhancement))
+                script_deps = ["enhancement"]
+            
+            # Stages 1 & 2: Visual Generation and Voice Synthesis (run concurrently)
+            def run_visuals(deps):
+                self._log("STAGE_1", "Generating visuals...")
+                return self._stage_visuals(
+                    deps.get("enhancement", script),
+                    channel_template,
+                    visual_style,
+                    keep_in_memory=stream_frames,
+                )
             
-            # Stage 2: Voice Synthesis
-            self._log("STAGE_2", "Synthesizing voice...")
-            audio_result = self._stage_voice(enhanced_script, voice_id)
+            def run_voice(deps):
+                self._log("STAGE_2", "Synthesizing voice...")
+                return self._stage_voice(deps.get("enhancement", script), voice_id, tts_backend)
+            
+            stages.append(self._make_stage("visuals", run_visuals, script_deps))
+            stages.append(self._make_stage("voice", run_voice, script_deps))
             
             # Stage 3: Video Composition
-            self._log("STAGE_3", "Composing video...")
-            video_result = self._stage_composition(
-                visuals_result["frames"],
-                audio_result["audio_path"],
-                title=title,
-            )
+            def run_composition(deps):
+                self._log("STAGE_3", "Composing video...")
+                return self._stage_composition(
+                    deps["visuals"]["frames"],
+                    deps["voice"]["audio_path"],
+                    title=title,
+                    script=deps.get("enhancement", script),
+                    encode_segments=encode_segments,
+                    images=deps["visuals"].get("images"),
+                    encode_profile=encode_profile,
+                    timing_path=deps["voice"].get("timing_path"),
+                )
+            
+            stages.append(self._make_stage("composition", run_composition, ["visuals", "voice"]))
             
             # Stage 4: YouTube Publishing
-            publish_result = {}
-            if publish_to_youtube:
+            def run_publish(deps):
                 self._log("STAGE_4", "Publishing to YouTube...")
-                publish_result = self._stage_youtube_publish(
-                    video_result["video_path"],
+                return self._stage_youtube_publish(
+                    deps["composition"]["video_path"],
                     title=title,
                     description=description,
                     tags=tags,
                     schedule_publish_at=schedule_publish_at,
                 )
             
+            if publish_to_youtube:
+                stages.append(self._make_stage("youtube", run_publish, ["composition"]))
+            
+            self.tracer.attributes["channel"] = channel_template
+            with self.tracer.span("production", kind="production", title=title):
+                results = StageExecutor(
+                    resources=resources, priority=priority, cancel_event=cancel_event
+                ).run(stages)
+            visuals_result = {k: v for k, v in results["visuals"].items() if k != "images"}
+            audio_result = results["voice"]
+            video_result = results["composition"]
+            publish_result = results.get("youtube", {})
+            
             # Compile final result
             final_result = {
                 "status": "success",
@@ -153,9 +261,12 @@ class VideoProductionOrchestrator:
                 "video": video_result,
                 "youtube": publish_result,
                 "logs": str(self.log_file),
+                "trace": str(self.trace_file),
             }
             
             self._save_metadata(final_result)
+            timings = ", ".join(f"{name} {seconds:.1f}s" for name, seconds in self.tracer.summary().items())
+            self._log("ORCHESTRATOR", f"Stage timings: {timings}")
             self._log("ORCHESTRATOR", f"✅ Production complete! Video: {video_result['video_path']}")
             
             return final_result
@@ -164,110 +275,279 @@ class VideoProductionOrchestrator:
             self._log("ORCHESTRATOR", f"❌ Production failed: {e}", status="ERROR")
             raise
 
-    def _stage_visuals(self, script: str, template: str, style: str) -> Dict:
-        """Generate visuals using ComfyUI."""
+    def _on_encode_progress(self, event):
+        """Forward encode progress to the caller and log finished encodes."""
+        if self.progress_callback:
+            self.progress_callback(event)
+        if event.done:
+            speed = f"{event.speed:.2f}x realtime" if event.speed else "unknown speed"
+            self._log("COMPOSITION", f"{event.label}: {event.frame} frames at {event.fps:.1f} fps, {speed}")
+
+    def _make_stage(self, name: str, func, deps: List[str] = None) -> Stage:
+        """Build a pipeline stage with its configured timeout and resource, traced as a span."""
+        resource = self.STAGE_RESOURCES.get(name)
+        
+        def traced(deps):
+            with self.tracer.span(name, kind="stage", resource=resource):
+                return func(deps)
+        
+        return Stage(
+            name=name,
+            func=traced,
+            deps=deps or [],
+            timeout=self.stage_timeouts.get(name),
+            resource=resource,
+        )
+
+    def _stage_visuals(
+        self,
+        script: str,
+        template: str,
+        style: str,
+        keep_in_memory: bool = False,
+    ) -> Dict:
+        """Generate visuals using ComfyUI.
+        
+        Frames are streamed straight into visuals/. With `keep_in_memory`,
+        their lazy image handles are also returned under "images" (and the
+        stage is not cached).
+        """
         from . import generator
         
+        prompt = script[:500]  # First 500 chars as visual prompt
+        cache_key = hash_inputs("visuals", prompt, style, template, self.VISUALS_WORKFLOW)
+        cached = None if keep_in_memory else self.stage_cache.lookup("visuals", cache_key)
+        if cached is not None:
+            self._log("VISUALS", f"Using {cached['count']} cached frames")
+            return cached
+        
         try:
+            frames_dir = self.output_dir / "visuals"
+            frames_dir.mkdir(exist_ok=True)
             outputs = generator.generate_visuals(
                 channel=template,
                 style=style,
-                prompt=script[:500],  # First 500 chars as visual prompt
+                prompt=prompt,
                 use_comfyui=True,
                 comfy_url=self.comfyui_url,
+                output_dir=str(frames_dir),
             )
+            frame_paths = [str(img.path) for img in outputs]
             
-            # Save frames
-            frames_dir = self.output_dir / "visuals"
-            frames_dir.mkdir(exist_ok=True)
-            frame_paths = []
-            for i, img in enumerate(outputs):
-                frame_path = frames_dir / f"frame_{i:04d}.png"
-                img.save(frame_path)
-                frame_paths.append(str(frame_path))
+            if keep_in_memory:
+                return {
+                    "images": outputs,
+                    "frames": frame_paths,
+                    "frames_dir": str(frames_dir),
+                    "count": len(outputs),
+                }
             
-            self.metadata["stages"]["visuals"] = {
-                "status": "success",
-                "frame_count": len(frame_paths),
-                "frames_dir": str(frames_dir),
-            }
-            
-            return {
+            result = {
                 "frames": frame_paths,
                 "frames_dir": str(frames_dir),
                 "count": len(frame_paths),
             }
+            self.stage_cache.record(
+                "visuals",
+                cache_key,
+                result,
+                artifacts=frame_paths,
+                frame_count=len(frame_paths),
+                frames_dir=str(frames_dir),
+            )
+            
+            return result
         except Exception as e:
             self._log("VISUALS", f"Generation failed: {e}", status="WARN")
             # Return dummy frames on failure
             return {"frames": [], "frames_dir": "", "count": 0}
 
-    def _stage_voice(self, script: str, voice_id: str) -> Dict:
-        """Synthesize voice using ElevenLabs."""
+    def _stage_voice(self, script: str, voice_id: str, backend: str = "elevenlabs") -> Dict:
+        """Synthesize voice (ElevenLabs by default)."""
         from . import tts
         
+        cache_key = hash_inputs(
+            "voice", script, voice_id, self.VOICE_SETTINGS, self.VOICE_CHUNKING, backend
+        )
+        cached = self.stage_cache.lookup("voice", cache_key)
+        if cached is not None:
+            self._log("VOICE", "Using cached narration")
+            return cached
+        
         try:
-            audio_path = tts.synthesize_script(
+            narration = tts.synthesize_narration(
                 script=script,
                 output_dir=str(self.output_dir / "audio"),
                 voice_id=voice_id,
+                **self.VOICE_SETTINGS,
+                **self.VOICE_CHUNKING,
+                backend=backend,
             )
+            audio_path = narration["audio_path"]
             
-            self.metadata["stages"]["voice"] = {
-                "status": "success",
-                "audio_path": audio_path,
-                "voice_id": voice_id,
-            }
+            result = {"audio_path": audio_path, "timing_path": narration["timing_path"]}
+            self.stage_cache.record(
+                "voice",
+                cache_key,
+                result,
+                artifacts=[audio_path, narration["timing_path"]],
+                audio_path=audio_path,
+                voice_id=voice_id,
+                tts_backend=backend,
+                tts_cache=tts.default_tts_cache().stats(),
+            )
             
-            return {"audio_path": audio_path}
+            return result
         except Exception as e:
             self._log("VOICE", f"Synthesis failed: {e}", status="ERROR")
+            self.stage_cache.mark_failed("voice", str(e))
             raise
 
-    def _stage_composition(self, frames: List[str], audio_path: str, title: str = "") -> Dict:
-        """Compose video from frames + audio."""
+    def _stage_composition(
+        self,
+        frames: List[str],
+        audio_path: str,
+        title: str = "",
+        encode_segments: int = 1,
+        images: Optional[List] = None,
+        script: str = "",
+        encode_profile: str = "standard",
+        timing_path: Optional[str] = None,
+    ) -> Dict:
+        """Compose a slideshow video from still frames + narration.
+        
+        Each still is shown for a share of the narration length, with image
+        changes snapped to the script's paragraph (scene) boundaries. Scene
+        times come from the narration timing map when one is available,
+        otherwise they are estimated from paragraph lengths.
+        If `images` include in-memory pictures (not yet written to disk) they
+        are streamed to ffmpeg and `frames` is ignored; a lossless copy is
+        archived under visuals/. Images already saved as files (`ComfyOutput`)
+        go through the concat demuxer like `frames`, without being decoded here.
+        """
         from . import video_composer
+        from .comfy_client import ComfyOutput
         
         try:
-            if not frames:
+            if not frames and not images:
                 raise ValueError("No frames generated")
+            if images and all(isinstance(img, ComfyOutput) for img in images):
+                # Already encoded files: streaming would only add a decode + raw pipe
+                frames, images = [str(img.path) for img in images], None
             
-            composer = video_composer.VideoComposer()
+            composer = video_composer.VideoComposer(progress_callback=self._on_encode_progress)
             
-            # Create main video
-            video_path = str(self.output_dir / "final_video.mp4")
-            composer.create_simple_video(
-                image_sequence=frames,
+            timing = None
+            if timing_path and os.path.isfile(timing_path):
+                with open(timing_path) as f:
+                    timing = json.load(f)
+            
+            if timing and timing["paragraphs"]:
+                narration_seconds = timing["duration"]
+                # Each scene lasts from its first word until the next scene starts
+                starts = [0.0] + [p["start"] for p in timing["paragraphs"][1:]]
+                scene_weights = [b - a for a, b in zip(starts, starts[1:] + [narration_seconds])]
+            else:
+                narration_seconds = composer.get_video_info(audio_path)["duration_seconds"]
+                if not narration_seconds:
+                    raise RuntimeError(f"Could not determine narration length of {audio_path}")
+                scene_weights = [len(p) for p in re.split(r"\n\s*\n", script) if p.strip()]
+            image_count = len(images) if images else len(frames)
+            
+            # Non-standard profiles get their own file so a draft never replaces the upload
+            if encode_profile == "standard":
+                output_name = "final_video_youtube.mp4"
+            else:
+                output_name = f"final_video_{encode_profile}.mp4"
+            
+            plan = video_composer.CompositionPlan(
+                images=frames,
                 audio_path=audio_path,
-                output_path=video_path,
-                fps=24,
-                title=title,
+                output_path=str(self.output_dir / output_name),
+                fps=self.COMPOSITION_PARAMS["fps"],
+                source_fps=video_composer.SLIDESHOW_FPS,
+                durations=video_composer.slideshow_durations(
+                    image_count, narration_seconds, scene_weights
+                ),
+                segments=encode_segments,
+                profile=encode_profile,
             )
-            
-            # Add title overlay if provided
             if title:
-                titled_path = str(self.output_dir / "final_video_titled.mp4")
-                composer.add_overlay_text(
-                    video_path=video_path,
+                plan.overlays.append(video_composer.TextOverlay(
                     text=title,
-                    output_path=titled_path,
                     position="top_center",
-                    duration=3.0,
+                    duration=self.COMPOSITION_PARAMS["title_duration"],
+                ))
+            
+            if images:
+                frame_hashes = [
+                    hash_file(img.path) if isinstance(img, ComfyOutput)
+                    else hashlib.sha256(img.tobytes()).hexdigest()
+                    for img in images
+                ]
+            else:
+                frame_hashes = [hash_file(f) for f in frames]
+            cache_key = hash_inputs(
+                "composition",
+                frame_hashes,
+                hash_file(audio_path),
+                title,
+                self.COMPOSITION_PARAMS,
+                plan.fps,
+                plan.source_fps,
+                plan.durations,
+                plan.video_args,
+                plan.audio_args,
+                plan.output_height,
+                plan.segments,
+            )
+            cached = self.stage_cache.lookup("composition", cache_key)
+            if cached is not None:
+                self._log("COMPOSITION", "Using cached video")
+                return cached
+            
+            input_files = [img.path for img in images if isinstance(img, ComfyOutput)] if images else list(frames)
+            telemetry.add(bytes_in=sum(os.path.getsize(f) for f in input_files + [audio_path]))
+            
+            # Images, title overlay, audio and YouTube encode in a single ffmpeg pass
+            if images:
+                # Decode one frame at a time so a batch of 4K stills never sits in RAM
+                youtube_path = composer.compose_frames(
+                    (img.load() if isinstance(img, ComfyOutput) else img for img in images),
+                    plan,
+                    archive_path=str(self.output_dir / "visuals" / "frames.mkv"),
                 )
-                video_path = titled_path
+            else:
+                youtube_path = composer.compose(plan)
             
-            # Export for YouTube
-            youtube_path = str(self.output_dir / "final_video_youtube.mp4")
-            composer.export_for_youtube(video_path, youtube_path)
+            # Sanity-check the render (probe results are cached per file)
+            media_info = {}
+            try:
+                for problem in composer.validate_media(youtube_path, expected_duration=narration_seconds):
+                    self._log("COMPOSITION", problem, status="WARN")
+                info = composer.probe(youtube_path)
+                media_info = {
+                    "duration_seconds": info["duration_seconds"],
+                    "resolution": f"{info['width']}x{info['height']}",
+                    "bit_rate": info["bit_rate"],
+                }
+            except RuntimeError as e:
+                self._log("COMPOSITION", f"Could not validate output: {e}", status="WARN")
             
-            self.metadata["stages"]["composition"] = {
-                "status": "success",
-                "video_path": youtube_path,
-            }
+            result = {"video_path": youtube_path}
+            self.stage_cache.record(
+                "composition",
+                cache_key,
+                result,
+                artifacts=[youtube_path],
+                video_path=youtube_path,
+                **media_info,
+            )
             
-            return {"video_path": youtube_path}
+            return result
         except Exception as e:
             self._log("COMPOSITION", f"Composition failed: {e}", status="ERROR")
+            self.stage_cache.mark_failed("composition", str(e))
             raise
 
     def _stage_youtube_publish(
@@ -281,6 +561,15 @@ class VideoProductionOrchestrator:
         """Publish to YouTube via webhook."""
         from . import youtube_publisher
         
+        # Avoid publishing the same video twice when resuming a run
+        cache_key = hash_inputs(
+            "youtube", hash_file(video_path), title, description, tags, schedule_publish_at
+        )
+        cached = self.stage_cache.lookup("youtube", cache_key)
+        if cached is not None:
+            self._log("YOUTUBE", "Already published - skipping")
+            return cached
+        
         try:
             publisher = youtube_publisher.YouTubePublisher()
             
@@ -306,10 +595,7 @@ class VideoProductionOrchestrator:
                 schedule_publish_at=schedule_publish_at,
             )
             
-            self.metadata["stages"]["youtube"] = {
-                "status": "success",
-                "webhook_response": result,
-            }
+            self.stage_cache.record("youtube", cache_key, result, webhook_response=result)
             
             return result
         except Exception as e:
@@ -320,9 +606,7 @@ class VideoProductionOrchestrator:
         """Save production metadata to JSON."""
         self.metadata["completed_at"] = datetime.now().isoformat()
         self.metadata["result"] = result
-        
-        with open(self.metadata_file, "w") as f:
-            json.dump(self.metadata, f, indent=2)
+        self.stage_cache.save()
 
     def get_production_status(self) -> Dict:
         """Get current production status and metadata."""
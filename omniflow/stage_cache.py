@@ -0,0 +1,139 @@
+"""Content-addressed stage cache for resumable video production.
+
+Every stage result is stored under a key hashed from the stage's inputs:
+- Script enhancement: script + enhancement parameters
+- Visuals: prompt + style + workflow
+- Narration: text + voice_id + voice settings
+- Composition: input file hashes + encoder arguments
+
+Stage state lives in the project's metadata.json and is written after every
+stage, so a rerun (or a crashed batch) skips stages whose artifacts are still valid.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from . import telemetry
+
+
+def hash_inputs(*parts: Any) -> str:
+    """Hash arbitrary JSON-serializable stage inputs into a cache key."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_file_hashes: Dict[tuple, str] = {}
+_file_hashes_lock = threading.Lock()
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents, memoized by path + mtime + size."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            return _file_hashes[memo_key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    with _file_hashes_lock:
+        _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+class StageCache:
+    """Track stage results and their artifacts inside project metadata."""
+
+    def __init__(self, metadata: Dict, metadata_file: Path):
+        """
+        Args:
+            metadata: The orchestrator's metadata dict (must contain a "stages" dict).
+            metadata_file: Where metadata.json is persisted.
+        """
+        self.metadata = metadata
+        self.metadata_file = Path(metadata_file)
+        self._lock = threading.RLock()
+
+    def lookup(self, stage: str, key: str) -> Optional[Any]:
+        """Return the cached result for `stage` if its key matches and artifacts are intact."""
+        with self._lock:
+            entry = self.metadata["stages"].get(stage)
+        if not entry or entry.get("status") != "success" or entry.get("cache_key") != key:
+            telemetry.record_cache(False)
+            return None
+
+        for artifact in entry.get("artifacts", []):
+            path = artifact["path"]
+            if not os.path.isfile(path) or os.path.getsize(path) != artifact["size"]:
+                telemetry.record_cache(False)
+                return None
+
+        telemetry.record_cache(True)
+        return entry.get("result")
+
+    def record(
+        self,
+        stage: str,
+        key: str,
+        result: Any,
+        artifacts: Iterable[str] = (),
+        **details,
+    ):
+        """Store a successful stage result and persist metadata immediately.
+
+        Args:
+            stage: Stage name.
+            key: Cache key from `hash_inputs`.
+            result: JSON-serializable stage result.
+            artifacts: Files the result depends on (validated on lookup).
+            **details: Extra fields to keep in the stage entry.
+        """
+        entry = {
+            **details,
+            "status": "success",
+            "cache_key": key,
+            "completed_at": datetime.now().isoformat(),
+            "artifacts": [{"path": str(p), "size": os.path.getsize(p)} for p in artifacts],
+            "result": result,
+        }
+        telemetry.add(bytes_out=sum(artifact["size"] for artifact in entry["artifacts"]))
+        with self._lock:
+            self.metadata["stages"][stage] = entry
+            self.save()
+
+    def mark_failed(self, stage: str, error: str):
+        """Record a failed stage and persist metadata."""
+        with self._lock:
+            self.metadata["stages"][stage] = {
+                "status": "failed",
+                "error": error,
+                "failed_at": datetime.now().isoformat(),
+            }
+            self.save()
+
+    def save(self):
+        """Atomically write metadata.json."""
+        with self._lock:
+            tmp_file = self.metadata_file.with_suffix(".json.tmp")
+            with open(tmp_file, "w") as f:
+                json.dump(self.metadata, f, indent=2, default=str)
+            os.replace(tmp_file, self.metadata_file)
+
+
+def load_metadata(metadata_file: Path) -> Optional[Dict]:
+    """Load existing project metadata, or None if missing/corrupt."""
+    try:
+        with open(metadata_file) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(metadata.get("stages"), dict):
+        return None
+    return metadata
@@ -0,0 +1,202 @@
+"""Dependency-graph execution of production pipeline stages.
+
+Handles:
+- Running stages as soon as the stages they depend on have finished
+- Running independent stages (e.g. visuals and voice) at the same time
+- Per-stage timeouts
+- Cancelling outstanding stages when one stage fails
+- Optionally holding a shared resource slot (GPU, TTS, CPU) while a stage runs
+
+Stages run in a copy of the caller's context, so context variables such as
+the current telemetry span carry over into them. The executor's cancel event
+is one of them: long-running work inside a stage (ffmpeg encodes, chunk
+retries) checks `current_cancel_event()` and stops once it is set.
+"""
+import contextvars
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+class StageTimeoutError(TimeoutError):
+    """Raised when a stage runs longer than its timeout."""
+
+
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "omniflow_cancel_event", default=None
+)
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """Cancel event of the stage running in this context (None outside a StageExecutor)."""
+    return _cancel_event.get()
+
+
+def raise_if_cancelled(what: str = "Stage"):
+    """Raise CancelledError if the current stage has been cancelled."""
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise CancelledError(f"{what} cancelled")
+
+
+@dataclass
+class Stage:
+    """A single pipeline stage.
+
+    `func` receives a dict mapping each dependency name to that stage's result.
+    `resource` names the resource class the stage occupies (see batch_scheduler).
+    """
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    deps: List[str] = field(default_factory=list)
+    timeout: Optional[float] = None
+    resource: Optional[str] = None
+
+
+class StageExecutor:
+    """Run a set of stages as a dependency graph on a thread pool.
+
+    Stages mostly wait on remote services (ComfyUI, ElevenLabs) or on ffmpeg
+    subprocesses, so threads are enough to overlap them.
+
+    Python threads cannot be killed: on failure or timeout, stages that have not
+    started are cancelled and `cancel_event` is set. Running stages stop
+    cooperatively (ffmpeg subprocesses are terminated by `VideoComposer._run`);
+    the executor waits up to `cancel_grace` seconds for them before returning.
+    Setting `cancel_event` from outside cancels the whole run the same way.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        resources=None,
+        priority: int = 0,
+        cancel_event: Optional[threading.Event] = None,
+        cancel_grace: float = 10.0,
+    ):
+        """
+        Args:
+            max_workers: Maximum number of stages running at the same time.
+            resources: Optional `batch_scheduler.ResourceScheduler`; a stage whose
+                resource it manages waits for a slot before running. Its timeout
+                counts from when it gets the slot.
+            priority: Queue position for those slots (lower goes first).
+            cancel_event: Event to cancel the run from outside (default: a private one).
+            cancel_grace: Seconds to wait for running stages to stop after a cancel.
+        """
+        self.max_workers = max_workers
+        self.resources = resources
+        self.priority = priority
+        self._owns_cancel_event = cancel_event is None
+        self.cancel_event = cancel_event or threading.Event()
+        self.cancel_grace = cancel_grace
+
+    def _call(self, stage: Stage, dep_results: Dict[str, Any], started: Dict[str, float]) -> Any:
+        _cancel_event.set(self.cancel_event)  # Runs in its own context copy
+        if self.resources is None or stage.resource not in self.resources:
+            raise_if_cancelled(f"Stage '{stage.name}'")
+            started[stage.name] = time.monotonic()
+            return stage.func(dep_results)
+        with self.resources.slot(stage.resource, self.priority):
+            raise_if_cancelled(f"Stage '{stage.name}'")
+            started[stage.name] = time.monotonic()
+            return stage.func(dep_results)
+
+    def _validate(self, stages: Dict[str, Stage]):
+        """Reject unknown dependencies and cycles."""
+        for stage in stages.values():
+            for dep in stage.deps:
+                if dep not in stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at stage '{name}'")
+            visiting.add(name)
+            for dep in stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in stages:
+            visit(name)
+
+    def run(self, stages: List[Stage]) -> Dict[str, Any]:
+        """Execute all stages, respecting dependencies.
+
+        Args:
+            stages: Stages to run. Names must be unique.
+
+        Returns:
+            Dict mapping stage name to its result.
+
+        Raises:
+            StageTimeoutError: If a stage exceeds its timeout.
+            CancelledError: If `cancel_event` was set from outside.
+            Exception: The first exception raised by any stage.
+        """
+        by_name = {s.name: s for s in stages}
+        if len(by_name) != len(stages):
+            raise ValueError("Stage names must be unique")
+        self._validate(by_name)
+
+        if self._owns_cancel_event:
+            self.cancel_event.clear()
+        results: Dict[str, Any] = {}
+        pending = dict(by_name)
+        running = {}  # future -> stage
+        started: Dict[str, float] = {}  # stage name -> monotonic start (after any resource wait)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage")
+        try:
+            while pending or running:
+                # Start every stage whose dependencies are satisfied
+                for name, stage in list(pending.items()):
+                    if all(dep in results for dep in stage.deps):
+                        dep_results = {dep: results[dep] for dep in stage.deps}
+                        context = contextvars.copy_context()
+                        running[pool.submit(context.run, self._call, stage, dep_results, started)] = stage
+                        del pending[name]
+
+                deadlines = [
+                    started[s.name] + s.timeout for s in running.values()
+                    if s.timeout and s.name in started
+                ]
+                wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                if not self._owns_cancel_event or any(
+                    s.timeout and s.name not in started for s in running.values()
+                ):
+                    # Watch for an outside cancel, and give stages still waiting for
+                    # their slot (no deadline yet) a deadline soon after they get it
+                    wait_for = min(wait_for if wait_for is not None else 1.0, 1.0)
+                done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+                if self.cancel_event.is_set():
+                    raise CancelledError("Production cancelled")
+
+                for future in done:
+                    stage = running.pop(future)
+                    results[stage.name] = future.result()
+
+                now = time.monotonic()
+                for stage in running.values():
+                    if stage.timeout and stage.name in started and now >= started[stage.name] + stage.timeout:
+                        raise StageTimeoutError(
+                            f"Stage '{stage.name}' timed out after {stage.timeout}s"
+                        )
+        except BaseException:
+            self.cancel_event.set()
+            # Give running stages a moment to notice the cancel (and stop their
+            # subprocesses) instead of leaving them writing into the project dir
+            wait(running, timeout=self.cancel_grace)
+            raise
+        finally:
+            # Don't block on a stage that ignores the cancel
+            pool.shutdown(wait=not self.cancel_event.is_set(), cancel_futures=True)
+
+        return results
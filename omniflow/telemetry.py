@@ -0,0 +1,255 @@
+"""Structured timing and counters for productions: trace spans and metrics.
+
+A span covers one unit of work (a production, a pipeline stage, an HTTP
+call) and records:
+- wall time, and CPU time of the thread that ran it
+- bytes in/out, retries (including those of its child spans), and cache hits/misses
+- status ("ok" or "error") and free-form attributes
+
+Spans nest through a context variable. `StageExecutor` copies the context
+into its worker threads and the HTTP layer's event loop inherits it, so
+calls made inside a stage become children of that stage's span. The
+orchestrator appends every finished span as one JSON line to trace.jsonl
+next to production.log.
+
+Every span also feeds an in-process metrics registry. `start_metrics_server`
+serves it in the Prometheus text format, aggregated per kind, name and
+channel.
+"""
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+
+COUNTERS = ("bytes_in", "bytes_out", "retries", "cache_hits", "cache_misses")
+
+
+@dataclass
+class Span:
+    """One timed unit of work."""
+    name: str
+    kind: str
+    tracer: "Tracer" = field(repr=False)
+    trace_id: str
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    parent: Optional["Span"] = field(default=None, repr=False)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    counters: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(COUNTERS, 0))
+    child_retries: float = 0  # Retries of the calls made inside this span
+    status: str = "ok"
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    wall_seconds: float = 0.0
+    cpu_seconds: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **counts: float):
+        """Increase counters, e.g. `span.add(bytes_out=1024, retries=1)`."""
+        with self._lock:  # A stage's chunk threads and HTTP calls update it concurrently
+            for name, value in counts.items():
+                self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, **attributes: Any):
+        """Attach attributes (status codes, file names, ...)."""
+        self.attributes.update(attributes)
+
+    def to_record(self) -> Dict[str, Any]:
+        """JSON-serializable form written to trace.jsonl."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.started_at,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cpu_seconds": round(self.cpu_seconds, 4) if self.cpu_seconds is not None else None,
+            "status": self.status,
+            "error": self.error,
+            **self.counters,
+            "retries": self.counters["retries"] + self.child_retries,
+            **self.tracer.attributes,
+            "attributes": self.attributes,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("omniflow_span", default=None)
+
+
+class Tracer:
+    """Creates root spans and exports finished spans to a JSON-lines file and the metrics registry."""
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, **attributes: Any):
+        """
+        Args:
+            path: trace.jsonl to append finished spans to (None keeps them in memory only).
+            **attributes: Written into every record, e.g. project and channel.
+                "channel" is also a metrics label.
+        """
+        self.path = Path(path) if path else None
+        self.attributes = attributes
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", measure_cpu: bool = True, **attributes: Any) -> Iterator[Span]:
+        """Time a block as a span of this tracer, child of the current span if it belongs to this tracer."""
+        parent = _current.get()
+        if parent is not None and parent.tracer is not self:
+            parent = None
+        span = Span(
+            name=name,
+            kind=kind,
+            tracer=self,
+            trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+            parent=parent,
+            attributes=attributes,
+        )
+        token = _current.set(span)
+        started = time.perf_counter()
+        cpu_started = time.thread_time() if measure_cpu else None
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.wall_seconds = time.perf_counter() - started
+            if cpu_started is not None:
+                span.cpu_seconds = time.thread_time() - cpu_started
+            _current.reset(token)
+            if parent is not None:
+                with parent._lock:
+                    parent.child_retries += span.counters["retries"] + span.child_retries
+            self._export(span)
+
+    def _export(self, span: Span):
+        record = span.to_record()
+        metrics.observe(span)
+        with self._lock:
+            self.spans.append(record)
+            if self.path is not None:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def summary(self, kind: str = "stage") -> Dict[str, float]:
+        """Wall seconds per span name for finished spans of `kind`."""
+        with self._lock:
+            return {r["name"]: r["wall_seconds"] for r in self.spans if r["kind"] == kind}
+
+
+# Spans outside any production (e.g. bridge calls) only reach the metrics registry
+_default_tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def span(name: str, kind: str = "internal", measure_cpu: bool = True, **attributes: Any):
+    """Context manager for a child of the current span (or a metrics-only span if there is none)."""
+    parent = _current.get()
+    tracer = parent.tracer if parent is not None else _default_tracer
+    return tracer.span(name, kind, measure_cpu=measure_cpu, **attributes)
+
+
+def add(**counts: float):
+    """Increase counters on the current span (no-op outside a span)."""
+    current = _current.get()
+    if current is not None:
+        current.add(**counts)
+
+
+def record_cache(hit: bool):
+    """Count a cache lookup on the current span."""
+    add(**{"cache_hits" if hit else "cache_misses": 1})
+
+
+class MetricsRegistry:
+    """Running totals of finished spans, keyed by (kind, name, channel)."""
+
+    def __init__(self):
+        self._totals: Dict[tuple, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, span: Span):
+        key = (span.kind, span.name, str(span.tracer.attributes.get("channel", "")))
+        with self._lock:
+            totals = self._totals.setdefault(
+                key, {"count": 0, "errors": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, **dict.fromkeys(COUNTERS, 0)}
+            )
+            totals["count"] += 1
+            totals["errors"] += span.status != "ok"
+            totals["wall_seconds"] += span.wall_seconds
+            totals["cpu_seconds"] += span.cpu_seconds or 0.0
+            for name in COUNTERS:
+                totals[name] += span.counters.get(name, 0)
+
+    def snapshot(self) -> Dict[tuple, Dict[str, float]]:
+        with self._lock:
+            return {key: dict(totals) for key, totals in self._totals.items()}
+
+    def render(self) -> str:
+        """Prometheus text exposition format."""
+        families = [
+            ("omniflow_span_seconds", "summary", "Wall time of finished spans", None),
+            ("omniflow_span_errors_total", "counter", "Spans that raised", "errors"),
+            ("omniflow_span_cpu_seconds_total", "counter", "CPU time of the thread running the span", "cpu_seconds"),
+            ("omniflow_bytes_in_total", "counter", "Bytes received or read", "bytes_in"),
+            ("omniflow_bytes_out_total", "counter", "Bytes sent or written", "bytes_out"),
+            ("omniflow_retries_total", "counter", "Retried attempts", "retries"),
+            ("omniflow_cache_hits_total", "counter", "Cache lookups that hit", "cache_hits"),
+            ("omniflow_cache_misses_total", "counter", "Cache lookups that missed", "cache_misses"),
+        ]
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+        for metric, metric_type, help_text, field_name in families:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for (kind, name, channel), totals in snapshot:
+                labels = f'kind="{_escape(kind)}",name="{_escape(name)}",channel="{_escape(channel)}"'
+                if field_name is None:
+                    lines.append(f"{metric}_count{{{labels}}} {totals['count']}")
+                    lines.append(f"{metric}_sum{{{labels}}} {totals['wall_seconds']:.6f}")
+                else:
+                    lines.append(f"{metric}{{{labels}}} {totals[field_name]:g}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve /metrics for Prometheus from a background thread; returns the server (call shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="omniflow-metrics", daemon=True).start()
+    print(f"📈 Metrics on http://{host}:{server.server_port}/metrics")
+    return server
@@ -1,25 +1,201 @@
-"""ElevenLabs TTS integration for voice generation."""
+"""ElevenLabs TTS integration for voice generation.
+
+Engines implement `TTSBackend`; besides ElevenLabs there is an offline
+`LocalTTS` for previews and tests.
+"""
+import base64
+import contextlib
+import contextvars
+import hashlib
+import json
+import math
 import os
-import requests
-from typing import Optional
+import re
+import shutil
+import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from array import array
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+from . import telemetry
+from .disk_cache import DEFAULT_CACHE_DIR, DiskCache
+from .http_client import HTTPClient, HTTPStatusError, RequestError, get_http_client
+from .stage_cache import hash_inputs
+from .stage_executor import raise_if_cancelled
+
+
+# Chunked synthesis defaults
+CHUNK_MAX_CHARS = 1000  # Well below the per-request character limit
+CHUNK_CONCURRENCY = 4
+CHUNK_RETRIES = 2
+CHUNK_RETRY_BACKOFF = 1.0  # Seconds, doubled after each failed round
+CHUNK_GAP_SECONDS = 0.35  # Pause inserted between chunks
+# Explicit output format so chunks and generated gaps share one MP3 stream layout
+OUTPUT_FORMAT = "mp3_44100_128"
+OUTPUT_SAMPLE_RATE = 44100
+DEFAULT_MODEL_ID = "eleven_multilingual_v2"
+API_URL = os.getenv("ELEVENLABS_API_URL", "https://api.elevenlabs.io/v1")  # Override for proxies or local stubs
+
+# Synthesized audio cache (shared by every project on this machine)
+TTS_CACHE_DIR = os.path.join(DEFAULT_CACHE_DIR, "tts")
+TTS_CACHE_MAX_BYTES = int(os.getenv("OMNIFLOW_TTS_CACHE_MB", "500")) * 1024 * 1024
+ALIGNMENT_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+# HTTP client settings
+REQUEST_TIMEOUT = (10, 300)  # (connect, read) seconds; long narrations stream for a while
+VOICES_TTL = 600  # Seconds to reuse the voice list
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])[\"')\]]*\s+")
+_WORD = re.compile(r"\S+")
+
+
+_default_cache: Optional[DiskCache] = None
+_default_alignment_cache: Optional[DiskCache] = None
+_default_cache_lock = threading.Lock()
+
 
-class ElevenLabsTTS:
-    """Simple wrapper for ElevenLabs text-to-speech API."""
+_voices_cache: Dict[tuple, tuple] = {}  # (api_url, api_key) -> (fetched_at, voices)
+_voices_lock = threading.Lock()
+
+
+def default_tts_cache() -> DiskCache:
+    """The process-wide TTS audio cache (created on first use)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = DiskCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES, suffix=".mp3")
+        return _default_cache
+
+
+def default_alignment_cache() -> DiskCache:
+    """The process-wide cache of character alignments (same keys as the audio cache)."""
+    global _default_alignment_cache
+    with _default_cache_lock:
+        if _default_alignment_cache is None:
+            _default_alignment_cache = DiskCache(
+                os.path.join(TTS_CACHE_DIR, "alignment"), ALIGNMENT_CACHE_MAX_BYTES, suffix=".json"
+            )
+        return _default_alignment_cache
+
+
+def tts_cache_key(
+    text: str,
+    voice_id: str,
+    stability: float,
+    similarity: float,
+    model_id: str,
+) -> str:
+    """Cache key for synthesized audio; whitespace differences don't change it."""
+    return hash_inputs(
+        "tts", " ".join(text.split()), voice_id, stability, similarity, model_id, OUTPUT_FORMAT
+    )
+
+
+class TTSBackend(ABC):
+    """Interface shared by the text-to-speech engines.
     
-    def __init__(self, api_key: Optional[str] = None):
+    Chunked synthesis, the timing map and the orchestrator only use these
+    members, so engines are interchangeable per run (see `get_tts_backend`).
+    """
+    name = ""
+    extension = ".mp3"  # Audio container written by `synthesize_to_file`
+    sample_rate = OUTPUT_SAMPLE_RATE
+    # Encoder args for gaps, so they can be stream-copied between chunks
+    silence_args = ["-c:a", "libmp3lame", "-b:a", "128k"]
+    # True if `synthesize_with_timestamps` is free (no extra request or cost)
+    exact_timing = False
+    # Constant bitrate of `synthesize_to_file` output (bits/s), to time a file without ffprobe
+    bit_rate: Optional[int] = 128000
+
+    @abstractmethod
+    def synthesize_to_file(
+        self,
+        text: str,
+        output_path: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        stability: float = 0.5,
+        similarity: float = 0.75,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
+    ) -> str:
+        """Synthesize `text` into `output_path` and return the path."""
+
+    def synthesize_with_timestamps(
+        self,
+        text: str,
+        output_path: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        stability: float = 0.5,
+        similarity: float = 0.75,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
+    ) -> Optional[Dict]:
+        """Synthesize `text` and return its character alignment.
+        
+        Engines without alignment support return None, so word times are
+        estimated from the chunk duration instead.
+        """
+        self.synthesize_to_file(
+            text, output_path, voice_id, stability, similarity, previous_text, next_text
+        )
+        return None
+
+
+class ElevenLabsTTS(TTSBackend):
+    """Simple wrapper for ElevenLabs text-to-speech API.
+    
+    Requests go through the shared asyncio client (`http_client`), so
+    consecutive calls (e.g. narration chunks) reuse the TCP/TLS connection,
+    and audio is streamed to disk instead of being buffered in memory.
+    """
+    name = "elevenlabs"
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_id: str = DEFAULT_MODEL_ID,
+        cache: Optional[DiskCache] = None,
+        http: Optional[HTTPClient] = None,
+        alignment_cache: Optional[DiskCache] = None,
+    ):
+        """
+        Args:
+            api_key: ElevenLabs key (default: $ELEVENLABS_API_KEY).
+            model_id: ElevenLabs model used for synthesis.
+            cache: Audio cache consulted before calling the API (None = no caching).
+            http: HTTP client to use (default: the process-wide shared client).
+            alignment_cache: Cache for `synthesize_with_timestamps` alignments
+                (only used together with `cache`).
+        """
+        self.model_id = model_id
+        self.cache = cache
+        self.alignment_cache = alignment_cache
         self.api_key = api_key or os.getenv("ELEVENLABS_API_KEY")
         if not self.api_key:
             raise ValueError("ELEVENLABS_API_KEY not set. Get a free tier key from https://elevenlabs.io/")
-        self.api_url = "https://api.elevenlabs.io/v1"
+        self.api_url = API_URL
+        self.http = http or get_http_client()
 
-    def get_voices(self):
-        """Fetch available voices."""
+    def get_voices(self, max_age: float = VOICES_TTL):
+        """Fetch available voices (cached for `max_age` seconds; 0 to refresh)."""
+        cache_key = (self.api_url, self.api_key)
+        with _voices_lock:
+            cached = _voices_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        
         url = f"{self.api_url}/voices"
-        resp = requests.get(url, headers={"xi-api-key": self.api_key})
+        resp = self.http.get(url, headers={"xi-api-key": self.api_key}, timeout=REQUEST_TIMEOUT)
         resp.raise_for_status()
-        return resp.json()
+        voices = resp.json()
+        with _voices_lock:
+            _voices_cache[cache_key] = (time.monotonic(), voices)
+        return voices
 
     def synthesize(
         self,
@@ -28,6 +204,8 @@ class ElevenLabsTTS:
         stability: float = 0.5,
         similarity: float = 0.75,
         output_path: Optional[str] = None,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
     ) -> bytes:
         """Generate audio from text.
         
@@ -37,34 +215,653 @@ class ElevenLabsTTS:
             stability: Voice stability (0.0–1.0).
             similarity: Speaker similarity (0.0–1.0).
             output_path: Optional file path to save audio.
+            previous_text: Text spoken before `text` (keeps intonation continuous across chunks).
+            next_text: Text spoken after `text`.
             
+        Use `synthesize_to_file` when the audio doesn't need to be in memory.
+        
         Returns:
             Audio bytes (MP3 format).
         """
-        url = f"{self.api_url}/text-to-speech/{voice_id}"
+        if output_path:
+            self.synthesize_to_file(
+                text, output_path, voice_id, stability, similarity, previous_text, next_text
+            )
+            return Path(output_path).read_bytes()
+        
+        cache_key = self._cache_key(text, voice_id, stability, similarity)
+        cached_path = self.cache.get(cache_key) if cache_key else None
+        if cached_path is not None:
+            return cached_path.read_bytes()
+        
+        audio = self._request(text, voice_id, stability, similarity, previous_text, next_text).content
+        if cache_key:
+            self.cache.put_bytes(cache_key, audio)
+        return audio
+
+    def synthesize_to_file(
+        self,
+        text: str,
+        output_path: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        stability: float = 0.5,
+        similarity: float = 0.75,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
+    ) -> str:
+        """Generate audio from text, streaming it straight to `output_path`.
+        
+        `previous_text`/`next_text` only nudge intonation, so they are not part
+        of the cache key: a recurring line reuses its audio in any context.
+        
+        Returns:
+            Path to the audio file.
+        """
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        cache_key = self._cache_key(text, voice_id, stability, similarity)
+        cached_path = self.cache.get(cache_key) if cache_key else None
+        if cached_path is not None:
+            shutil.copyfile(cached_path, output_path)
+            return output_path
+        
+        # Streamed via a temp name, so an interrupted stream never leaves a truncated file
+        self._request(
+            text, voice_id, stability, similarity, previous_text, next_text, dest_path=output_path
+        )
+        
+        if cache_key:
+            self.cache.put_file(cache_key, output_path)
+        return output_path
+
+    def synthesize_with_timestamps(
+        self,
+        text: str,
+        output_path: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        stability: float = 0.5,
+        similarity: float = 0.75,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
+    ) -> Dict:
+        """Generate audio plus the provider's character-level alignment.
+        
+        The /with-timestamps endpoint returns the audio base64-encoded inside
+        JSON, so unlike `synthesize_to_file` the response is buffered.
+        
+        Returns:
+            Dict with "characters", "starts" and "ends" (seconds) lists.
+        """
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        cache_key = self._cache_key(text, voice_id, stability, similarity)
+        if cache_key and self.alignment_cache is not None:
+            cached_alignment = self.alignment_cache.get(cache_key)
+            cached_path = self.cache.get(cache_key) if cached_alignment else None
+            if cached_path is not None:
+                shutil.copyfile(cached_path, output_path)
+                return json.loads(cached_alignment.read_text())
+        
+        data = self._request(
+            text, voice_id, stability, similarity, previous_text, next_text, "/with-timestamps"
+        ).json()
+        
+        tmp_path = f"{output_path}.part"
+        with open(tmp_path, "wb") as f:
+            f.write(base64.b64decode(data["audio_base64"]))
+        os.replace(tmp_path, output_path)
+        
+        raw = data.get("alignment") or {}
+        alignment = {
+            "characters": raw.get("characters", []),
+            "starts": raw.get("character_start_times_seconds", []),
+            "ends": raw.get("character_end_times_seconds", []),
+        }
+        if cache_key:
+            self.cache.put_file(cache_key, output_path)
+            if self.alignment_cache is not None:
+                self.alignment_cache.put_bytes(cache_key, json.dumps(alignment).encode("utf-8"))
+        return alignment
+
+    def _cache_key(self, text, voice_id, stability, similarity) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return tts_cache_key(text, voice_id, stability, similarity, self.model_id)
+
+    def _request(
+        self, text, voice_id, stability, similarity, previous_text, next_text, endpoint="", dest_path=None
+    ):
+        """POST a synthesis request (its audio streamed to `dest_path`, if given)."""
+        url = f"{self.api_url}/text-to-speech/{voice_id}{endpoint}"
         headers = {"xi-api-key": self.api_key}
         payload = {
             "text": text,
+            "model_id": self.model_id,
             "voice_settings": {
                 "stability": stability,
                 "similarity_boost": similarity,
             },
         }
+        if previous_text:
+            payload["previous_text"] = previous_text
+        if next_text:
+            payload["next_text"] = next_text
         
-        resp = requests.post(url, json=payload, headers=headers)
+        # Failed chunks are retried per round by synthesize_chunked, not per request
+        resp = self.http.post(
+            url,
+            json=payload,
+            headers=headers,
+            params={"output_format": OUTPUT_FORMAT},
+            timeout=REQUEST_TIMEOUT,
+            dest_path=dest_path,
+        )
         resp.raise_for_status()
+        return resp
+
+
+class LocalTTS(TTSBackend):
+    """Offline engine that renders each character as a short tone or silence.
+    
+    The output is not speech: it gives previews, tests and batch dry runs a
+    narration track with deterministic, exactly known timing, without network
+    access or an API key. Pitch is derived from the voice ID.
+    """
+    name = "local"
+    extension = ".wav"
+    sample_rate = 22050
+    silence_args = ["-c:a", "pcm_s16le"]
+    exact_timing = True
+    bit_rate = 22050 * 16
+
+    def __init__(self, seconds_per_char: float = 0.065, sentence_pause: float = 0.3):
+        """
+        Args:
+            seconds_per_char: Duration of every character (roughly speaking pace).
+            sentence_pause: Extra silence after sentence-ending punctuation.
+        """
+        self.seconds_per_char = seconds_per_char
+        self.sentence_pause = sentence_pause
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _tone(frequency: int, sample_rate: int) -> bytes:
+        """One second of a 16-bit mono sine wave (whole cycles, so it tiles cleanly)."""
+        samples = array("h", (
+            int(3000 * math.sin(2 * math.pi * frequency * k / sample_rate))
+            for k in range(sample_rate)
+        ))
+        return samples.tobytes()
+
+    def synthesize_to_file(
+        self,
+        text: str,
+        output_path: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        stability: float = 0.5,
+        similarity: float = 0.75,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
+    ) -> str:
+        self.synthesize_with_timestamps(text, output_path, voice_id)
+        return output_path
+
+    def synthesize_with_timestamps(
+        self,
+        text: str,
+        output_path: str,
+        voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+        stability: float = 0.5,
+        similarity: float = 0.75,
+        previous_text: Optional[str] = None,
+        next_text: Optional[str] = None,
+    ) -> Dict:
+        base_frequency = 160 + int(hashlib.md5(voice_id.encode("utf-8")).hexdigest(), 16) % 120
+        pcm = bytearray()
+        starts, ends = [], []
+        position = 0
+        for char in text:
+            seconds = self.seconds_per_char
+            if char in ".!?…":
+                seconds += self.sentence_pause
+            count = round(seconds * self.sample_rate)
+            if char.isspace() or not char.isalnum():
+                pcm += bytes(2 * count)
+            else:
+                tone = self._tone(base_frequency + (ord(char) % 12) * 15, self.sample_rate)
+                pcm += (tone * (count // self.sample_rate + 1))[:2 * count]
+            starts.append(position / self.sample_rate)
+            position += count
+            ends.append(position / self.sample_rate)
         
-        if output_path:
-            Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-            with open(output_path, "wb") as f:
-                f.write(resp.content)
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{output_path}.part"
+        with wave.open(tmp_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.sample_rate)
+            f.writeframes(bytes(pcm))
+        os.replace(tmp_path, output_path)
+        
+        return {"characters": list(text), "starts": starts, "ends": ends}
+
+
+TTS_BACKENDS: Dict[str, type] = {
+    ElevenLabsTTS.name: ElevenLabsTTS,
+    LocalTTS.name: LocalTTS,
+}
+
+
+def get_tts_backend(name: str = "elevenlabs", **options) -> TTSBackend:
+    """Create a TTS engine by name ("elevenlabs" or "local").
+    
+    Args:
+        name: Key into TTS_BACKENDS.
+        **options: Passed to the engine's constructor.
+    """
+    try:
+        backend_class = TTS_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown TTS backend '{name}' (choose from: {', '.join(TTS_BACKENDS)})"
+        ) from None
+    return backend_class(**options)
+
+
+def split_script(script: str, max_chars: int = CHUNK_MAX_CHARS) -> List[str]:
+    """Split a script into synthesis chunks at paragraph and sentence boundaries.
+    
+    Paragraphs are kept whole when they fit in `max_chars`; longer paragraphs
+    are packed sentence by sentence. A single sentence longer than `max_chars`
+    is split at word boundaries.
+    """
+    return [chunk for _, chunk in _chunk_script(script, max_chars)]
+
+
+def _chunk_script(script: str, max_chars: int) -> List[Tuple[int, str]]:
+    """`split_script`, with the index of the paragraph each chunk came from."""
+    chunks = []
+    paragraphs = [" ".join(p.split()) for p in re.split(r"\n\s*\n", script)]
+    for index, paragraph in enumerate(p for p in paragraphs if p):
+        if len(paragraph) <= max_chars:
+            chunks.append((index, paragraph))
+            continue
+        
+        current = ""
+        for sentence in _SENTENCE_END.split(paragraph):
+            pieces = [sentence]
+            if len(sentence) > max_chars:
+                pieces, words = [], ""
+                for word in sentence.split():
+                    if words and len(words) + 1 + len(word) > max_chars:
+                        pieces.append(words)
+                        words = word
+                    else:
+                        words = f"{words} {word}" if words else word
+                pieces.append(words)
+            for piece in pieces:
+                if current and len(current) + 1 + len(piece) > max_chars:
+                    chunks.append((index, current))
+                    current = piece
+                else:
+                    current = f"{current} {piece}" if current else piece
+        if current:
+            chunks.append((index, current))
+    return chunks
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Connection problems, rate limits and server errors are worth retrying."""
+    if isinstance(error, HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, RequestError)
+
+
+def timing_path_for(audio_path: str) -> str:
+    """Where the timing map for `audio_path` is stored (narration.mp3 -> narration.timing.json)."""
+    return str(Path(audio_path).with_suffix(".timing.json"))
+
+
+def _sentence_spans(text: str) -> List[Tuple[int, int, int]]:
+    """(paragraph, start, end) character spans of each sentence in `text`."""
+    spans, paragraph = [], 0
+    for block in re.finditer(r"(?:(?!\n\s*\n).)+", text, re.S):
+        if not block.group().strip():
+            continue
+        cursor = block.start()
+        ends = [m.end() for m in _SENTENCE_END.finditer(text, block.start(), block.end())]
+        for end in ends + [block.end()]:
+            piece = text[cursor:end]
+            if piece.strip():
+                start = cursor + len(piece) - len(piece.lstrip())
+                spans.append((paragraph, start, cursor + len(piece.rstrip())))
+            cursor = end
+        paragraph += 1
+    return spans
+
+
+def build_timing(
+    chunks: List[str],
+    durations: List[float],
+    gap_seconds: float = 0.0,
+    paragraphs: Optional[List[int]] = None,
+    alignments: Optional[List[Optional[Dict]]] = None,
+) -> Dict:
+    """Build a sentence/word timing map for narration joined from `chunks`.
+    
+    Chunk offsets come from the measured chunk durations plus the gaps between
+    them. Inside a chunk, times come from the provider's character alignment
+    when available, otherwise they are spread evenly over the characters.
+    
+    Args:
+        chunks: Chunk texts in narration order.
+        durations: Measured length of each chunk's audio in seconds.
+        gap_seconds: Silence inserted between chunks.
+        paragraphs: Script paragraph index of each chunk (default: one per chunk).
+        alignments: Per-chunk {"characters", "starts", "ends"} dicts, or None.
+        
+    Returns:
+        Timing map with "duration", "source", "paragraphs" and "sentences"
+        (each sentence carrying its "words"); times are in seconds.
+    """
+    sentences = []
+    offset = 0.0
+    aligned = 0
+    for index, text in enumerate(chunks):
+        duration = durations[index]
+        alignment = alignments[index] if alignments else None
+        if alignment and alignment.get("characters"):
+            text = "".join(alignment["characters"])
+            starts, ends = alignment["starts"], alignment["ends"]
+            aligned += 1
+        else:
+            step = duration / max(1, len(text))
+            starts = [k * step for k in range(len(text))]
+            ends = [(k + 1) * step for k in range(len(text))]
         
-        return resp.content
+        base = paragraphs[index] if paragraphs else index
+        for paragraph, start, end in _sentence_spans(text):
+            words = [
+                {
+                    "text": m.group(),
+                    "start": round(offset + starts[m.start()], 3),
+                    "end": round(offset + ends[m.end() - 1], 3),
+                }
+                for m in _WORD.finditer(text, start, end)
+            ]
+            sentences.append({
+                "text": text[start:end],
+                "paragraph": base + paragraph,
+                "start": round(offset + starts[start], 3),
+                "end": round(offset + ends[end - 1], 3),
+                "words": words,
+            })
+        offset += duration + gap_seconds
+    
+    by_paragraph: Dict[int, Dict] = {}
+    for sentence in sentences:
+        entry = by_paragraph.setdefault(
+            sentence["paragraph"], {"index": sentence["paragraph"], "start": sentence["start"]}
+        )
+        entry["end"] = sentence["end"]
+    
+    if not aligned:
+        source = "estimated"
+    elif aligned == len(chunks):
+        source = "alignment"
+    else:
+        source = "mixed"
+    
+    return {
+        "duration": round(max(0.0, offset - gap_seconds), 3),
+        "source": source,
+        "paragraphs": list(by_paragraph.values()),
+        "sentences": sentences,
+    }
+
+
+def _audio_duration(tts: TTSBackend, path: str) -> float:
+    """Probe a synthesized file's length, or estimate it from its size if ffmpeg is missing."""
+    from .video_composer import VideoComposer
+    
+    try:
+        duration = VideoComposer().get_video_info(path)["duration_seconds"]
+    except (RuntimeError, OSError):
+        duration = None
+    if duration is None and tts.bit_rate:
+        duration = os.path.getsize(path) * 8 / tts.bit_rate
+    if duration is None:
+        raise RuntimeError(f"Could not determine duration of {path}")
+    return duration
 
 
-def synthesize_script(script: str, output_dir: str = "outputs/audio", voice_id: str = None) -> str:
-    """Helper: synthesize an entire script and save to file."""
-    tts = ElevenLabsTTS()
-    output_path = f"{output_dir}/narration.mp3"
-    tts.synthesize(script, voice_id=voice_id or "21m00Tcm4TlvDq8ikWAM", output_path=output_path)
+def synthesize_chunked(
+    tts: TTSBackend,
+    chunks: List[str],
+    output_path: str,
+    voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+    stability: float = 0.5,
+    similarity: float = 0.75,
+    max_concurrency: int = CHUNK_CONCURRENCY,
+    retries: int = CHUNK_RETRIES,
+    gap_seconds: float = CHUNK_GAP_SECONDS,
+    paragraphs: Optional[List[int]] = None,
+    alignment: bool = False,
+) -> str:
+    """Synthesize chunks concurrently and join them into one audio file.
+    
+    Only chunks that failed are resubmitted on a retry round. The chunk files
+    and a silent gap are joined in order with a stream copy (no re-encode).
+    A timing map (see `build_timing`) is written to `timing_path_for(output_path)`.
+    
+    A single chunk is streamed straight to `output_path` (or copied from the
+    TTS cache) and doesn't need ffmpeg: it is timed by probing the file, or
+    from its size at the engine's constant bitrate when ffprobe is missing.
+    ffmpeg is only required to join several chunks.
+    
+    Args:
+        tts: Client used for every chunk.
+        chunks: Text chunks in narration order (see `split_script`).
+        output_path: Where to write the joined narration.
+        voice_id: ElevenLabs voice ID.
+        stability: Voice stability (0.0–1.0).
+        similarity: Speaker similarity (0.0–1.0).
+        max_concurrency: Maximum requests in flight.
+        retries: Extra rounds for chunks that failed with a transient error.
+        gap_seconds: Silence between chunks (0 to join back to back).
+        paragraphs: Script paragraph index of each chunk, recorded in the timing map.
+        alignment: Request character timestamps from the provider instead of
+            estimating word times from chunk durations (always on for engines
+            with `exact_timing`).
+        
+    Returns:
+        Path to the joined narration.
+    """
+    from .video_composer import VideoComposer
+    
+    if not chunks:
+        raise ValueError("No text to synthesize")
+    
+    single = len(chunks) == 1
+    composer = None if single else VideoComposer()
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    alignment = alignment or tts.exact_timing
+    
+    with composer.workspace() if composer else contextlib.nullcontext() as work_dir:
+        if single:
+            chunk_paths = [output_path]
+        else:
+            chunk_paths = [
+                str(work_dir / f"chunk_{i:04d}{tts.extension}") for i in range(len(chunks))
+            ]
+        alignments: List[Optional[Dict]] = [None] * len(chunks)
+
+        def synthesize_one(index: int):
+            raise_if_cancelled(f"Chunk {index}")
+            synthesize = tts.synthesize_with_timestamps if alignment else tts.synthesize_to_file
+            result = synthesize(
+                chunks[index],
+                chunk_paths[index],
+                voice_id=voice_id,
+                stability=stability,
+                similarity=similarity,
+                previous_text=chunks[index - 1] if index > 0 else None,
+                next_text=chunks[index + 1] if index + 1 < len(chunks) else None,
+            )
+            if alignment:
+                alignments[index] = result
+        
+        pending = list(range(len(chunks)))
+        errors: Dict[int, Exception] = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency), thread_name_prefix="tts") as pool:
+            for attempt in range(retries + 1):
+                if attempt:
+                    time.sleep(CHUNK_RETRY_BACKOFF * 2 ** (attempt - 1))
+                    raise_if_cancelled("Narration")
+                    telemetry.add(retries=len(pending))
+                # Each chunk runs in a copy of this context so its requests join the stage's trace
+                futures = {
+                    index: pool.submit(contextvars.copy_context().run, synthesize_one, index)
+                    for index in pending
+                }
+                errors = {}
+                for index, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        errors[index] = e
+                pending = [i for i in pending if i in errors]
+                if not pending or not all(_is_retryable(e) for e in errors.values()):
+                    break
+        
+        if errors:
+            index = min(errors)
+            raise RuntimeError(
+                f"Synthesis failed for {len(errors)} of {len(chunks)} chunks "
+                f"(chunk {index}: {errors[index]})"
+            ) from errors[index]
+        
+        if single:
+            ends = (alignments[0] or {}).get("ends")
+            durations = [ends[-1] if ends else _audio_duration(tts, output_path)]
+        else:
+            durations = []
+            for path in chunk_paths:
+                duration = composer.get_video_info(path)["duration_seconds"]
+                if duration is None:
+                    raise RuntimeError(f"Could not determine duration of {path}")
+                durations.append(duration)
+        
+        if not single:
+            parts = chunk_paths
+            if gap_seconds > 0:
+                gap_path = composer.create_silence(
+                    str(work_dir / f"gap{tts.extension}"),
+                    gap_seconds,
+                    sample_rate=tts.sample_rate,
+                    audio_args=tts.silence_args,
+                )
+                parts = [chunk_paths[0]]
+                for path in chunk_paths[1:]:
+                    parts += [gap_path, path]
+            composer.concatenate_videos(parts, output_path)
+    
+    timing = build_timing(
+        chunks,
+        durations,
+        gap_seconds=0.0 if single else gap_seconds,
+        paragraphs=paragraphs,
+        alignments=alignments if alignment else None,
+    )
+    timing["audio_path"] = output_path
+    with open(timing_path_for(output_path), "w") as f:
+        json.dump(timing, f, indent=2, ensure_ascii=False)
+    
     return output_path
+
+
+def synthesize_narration(
+    script: str,
+    output_dir: str = "outputs/audio",
+    voice_id: str = None,
+    stability: float = 0.5,
+    similarity: float = 0.75,
+    chunked: bool = False,
+    max_concurrency: int = CHUNK_CONCURRENCY,
+    model_id: str = DEFAULT_MODEL_ID,
+    use_cache: bool = True,
+    alignment: bool = False,
+    backend: str = "elevenlabs",
+) -> Dict:
+    """Synthesize a script to `{output_dir}/narration.<ext>` plus its timing map.
+    
+    With `chunked=True` the script is split at sentence/paragraph boundaries
+    and the chunks are synthesized in parallel (see `synthesize_chunked`).
+    ElevenLabs audio is reused from the shared TTS cache unless `use_cache`
+    is False; `backend="local"` renders offline (see `LocalTTS`).
+    
+    Returns:
+        Dict with "audio_path", "timing_path" and the "timing" map.
+    """
+    options = {}
+    if backend == ElevenLabsTTS.name:
+        options = {
+            "model_id": model_id,
+            "cache": default_tts_cache() if use_cache else None,
+            "alignment_cache": default_alignment_cache() if use_cache else None,
+        }
+    tts = get_tts_backend(backend, **options)
+    output_path = f"{output_dir}/narration{tts.extension}"
+    if chunked:
+        indexed = _chunk_script(script, CHUNK_MAX_CHARS)
+        chunks = [chunk for _, chunk in indexed]
+        paragraphs = [index for index, _ in indexed]
+    else:
+        chunks, paragraphs = [script], [0]
+    
+    synthesize_chunked(
+        tts,
+        chunks,
+        output_path,
+        voice_id=voice_id or "21m00Tcm4TlvDq8ikWAM",
+        stability=stability,
+        similarity=similarity,
+        max_concurrency=max_concurrency,
+        paragraphs=paragraphs,
+        alignment=alignment,
+    )
+    
+    timing_path = timing_path_for(output_path)
+    with open(timing_path) as f:
+        timing = json.load(f)
+    return {"audio_path": output_path, "timing_path": timing_path, "timing": timing}
+
+
+def synthesize_script(
+    script: str,
+    output_dir: str = "outputs/audio",
+    voice_id: str = None,
+    stability: float = 0.5,
+    similarity: float = 0.75,
+    chunked: bool = False,
+    max_concurrency: int = CHUNK_CONCURRENCY,
+    model_id: str = DEFAULT_MODEL_ID,
+    use_cache: bool = True,
+    backend: str = "elevenlabs",
+) -> str:
+    """Helper: synthesize an entire script and save to file.
+    
+    See `synthesize_narration` for the options and the timing map written
+    alongside the audio.
+    """
+    return synthesize_narration(
+        script,
+        output_dir=output_dir,
+        voice_id=voice_id,
+        stability=stability,
+        similarity=similarity,
+        chunked=chunked,
+        max_concurrency=max_concurrency,
+        model_id=model_id,
+        use_cache=use_cache,
+        backend=backend,
+    )["audio_path"]
@@ -5,23 +5,368 @@ Handles:
 - Adding titles, overlays, transitions
 - Watermarks and branding
 - Exporting for YouTube (optimal codec/bitrate)
+- Single-pass composition plans (images + overlays + audio + final encode)
+- Segment-parallel encoding across CPU cores
+- Streaming in-memory frames to ffmpeg over stdin (no PNG round-trip)
+- Still-image slideshows with per-image durations
+- Per-job scratch workspaces so many renders can run side by side
+- Cached ffprobe media probes (duration, streams, keyframes, A/V sync)
+- Live encode progress events from `ffmpeg -progress`
 """
 import subprocess
+import copy
 import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Dict, Tuple
 import json
 
+from .stage_executor import current_cancel_event
+
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """Named x264/AAC settings trading encode speed against quality."""
+    name: str
+    preset: str
+    crf: int
+    height: Optional[int] = None  # Downscale to this height (None = source resolution)
+    level: str = "4.1"
+    audio_bitrate: str = "128k"
+
+    def video_args(self) -> List[str]:
+        """ffmpeg video encoder arguments."""
+        return [
+            "-c:v", "libx264",
+            "-profile:v", "high",
+            "-level", self.level,
+            "-preset", self.preset,
+            "-crf", str(self.crf),  # Lower = better quality
+            "-pix_fmt", "yuv420p",  # Ensure YouTube compatibility
+        ]
+
+    def audio_args(self) -> List[str]:
+        """ffmpeg audio encoder arguments."""
+        return ["-c:a", "aac", "-b:a", self.audio_bitrate]
+
+
+ENCODE_PROFILES: Dict[str, EncodeProfile] = {
+    # Fast previews: 540p, ultrafast x264
+    "draft": EncodeProfile("draft", preset="ultrafast", crf=28, height=540, audio_bitrate="96k"),
+    # YouTube-recommended encode: H.264 High@4.1 + AAC in MP4
+    "standard": EncodeProfile("standard", preset="slow", crf=18),
+    # Masters kept for re-editing: near-transparent quality, no size concerns
+    "archival": EncodeProfile("archival", preset="veryslow", crf=12, level="5.1", audio_bitrate="320k"),
+}
+DEFAULT_ENCODE_PROFILE = "standard"
+
+
+def get_encode_profile(name: str) -> EncodeProfile:
+    """Look up an encode profile by name."""
+    try:
+        return ENCODE_PROFILES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown encode profile '{name}' (choose from: {', '.join(ENCODE_PROFILES)})"
+        ) from None
+
+
+YOUTUBE_VIDEO_ARGS = ENCODE_PROFILES["standard"].video_args()
+YOUTUBE_AUDIO_ARGS = ENCODE_PROFILES["standard"].audio_args()
+
+# drawtext x/y expressions for each overlay position
+OVERLAY_POSITIONS = {
+    "top_center": ("(w-text_w)/2", "50"),
+    "top_left": ("50", "50"),
+    "center": ("(w-text_w)/2", "(h-text_h)/2"),
+    "bottom_center": ("(w-text_w)/2", "h-text_h-50"),
+}
+
+DEFAULT_FONT_FILE = "/Windows/Fonts/Arial.ttf"
+
+# Source framerate for still-image slideshows: stills are sampled at this rate
+# for overlays and scaling, then repeated up to the plan's output rate (which
+# stays normal, so keyframes and seeking behave), and x264 codes the repeats as skips.
+SLIDESHOW_FPS = 2
+
+
+# Lines of ffmpeg stderr kept for error messages (older lines are dropped)
+STDERR_TAIL_LINES = 200
+
+# Seconds between checks of a running encode's cancel event
+CANCEL_POLL_INTERVAL = 0.2
+
+# Probe results keyed by (path, mtime, size, keyframes), shared by all composers
+PROBE_CACHE_SIZE = 512
+_probe_cache: "OrderedDict[tuple, Dict]" = OrderedDict()
+_probe_cache_lock = threading.Lock()
+
+
+def _to_number(value: Any, cast=float) -> Optional[float]:
+    """Convert an ffprobe field to a number, or None if missing/invalid."""
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _frame_rate(value: Optional[str]) -> Optional[float]:
+    """Convert an ffprobe rate like "30000/1001" to fps."""
+    if not value or "/" not in value:
+        return _to_number(value)
+    num, den = (_to_number(v) for v in value.split("/", 1))
+    return num / den if num and den else None
+
+
+def _parse_probe(path: str, data: Dict) -> Dict:
+    """Summarize `ffprobe -show_format -show_streams` JSON output."""
+    fmt = data.get("format", {})
+    streams = []
+    for st in data.get("streams", []):
+        stream = {
+            "index": st.get("index"),
+            "codec_type": st.get("codec_type"),
+            "codec_name": st.get("codec_name"),
+            "profile": st.get("profile"),
+            "duration_seconds": _to_number(st.get("duration")),
+            "bit_rate": _to_number(st.get("bit_rate"), int),
+        }
+        if st.get("codec_type") == "video":
+            stream.update({
+                "width": st.get("width"),
+                "height": st.get("height"),
+                "fps": _frame_rate(st.get("avg_frame_rate")),
+                "pix_fmt": st.get("pix_fmt"),
+                "frame_count": _to_number(st.get("nb_frames"), int),
+                "attached_pic": bool(st.get("disposition", {}).get("attached_pic")),
+            })
+        elif st.get("codec_type") == "audio":
+            stream.update({
+                "sample_rate": _to_number(st.get("sample_rate"), int),
+                "channels": st.get("channels"),
+            })
+        streams.append(stream)
+    
+    video = next(
+        (st for st in streams if st["codec_type"] == "video" and not st["attached_pic"]), None
+    )
+    audio = next((st for st in streams if st["codec_type"] == "audio"), None)
+    
+    return {
+        "path": path,
+        "format_name": fmt.get("format_name"),
+        "duration_seconds": _to_number(fmt.get("duration")),
+        "size_bytes": _to_number(fmt.get("size"), int),
+        "bit_rate": _to_number(fmt.get("bit_rate"), int),
+        "streams": streams,
+        "video": video,
+        "audio": audio,
+        "width": video["width"] if video else None,
+        "height": video["height"] if video else None,
+        "video_codec": video["codec_name"] if video else None,
+        "audio_codec": audio["codec_name"] if audio else None,
+    }
+
+
+def slideshow_durations(
+    count: int,
+    total_duration: float,
+    scene_weights: Optional[List[float]] = None,
+) -> List[float]:
+    """Split a narration length into per-image display durations.
+    
+    Without scene weights the images share the time equally. With weights
+    (e.g. the character count of each script paragraph), image changes are
+    snapped to the nearest scene boundary so cuts land between scenes.
+    
+    Args:
+        count: Number of images.
+        total_duration: Length of the narration in seconds.
+        scene_weights: Relative length of each scene, in script order.
+        
+    Returns:
+        List of `count` durations summing to `total_duration`.
+    """
+    if count <= 0:
+        return []
+    
+    boundaries = []
+    if scene_weights and sum(scene_weights) > 0:
+        total_weight = float(sum(scene_weights))
+        acc = 0.0
+        for weight in scene_weights[:-1]:
+            acc += weight
+            boundaries.append(acc / total_weight)
+    
+    cuts = [0.0]
+    for k in range(1, count):
+        target = k / count
+        cut = target
+        if boundaries:
+            nearest = min(boundaries, key=lambda b: abs(b - target))
+            # Only snap within half an image slot, and never backwards
+            if abs(nearest - target) <= 0.5 / count and nearest > cuts[-1]:
+                cut = nearest
+        cuts.append(cut)
+    cuts.append(1.0)
+    
+    return [(cuts[i + 1] - cuts[i]) * total_duration for i in range(count)]
+
+
+def _escape_filter_value(value: str) -> str:
+    """Escape a filter option value for use inside an ffmpeg filtergraph.
+
+    Values go through two parsers: the filter's option parser and the
+    filtergraph parser, so special characters are escaped for each in turn.
+    """
+    for ch in ("\\", "'", ":"):
+        value = value.replace(ch, "\\" + ch)
+    return "".join("\\" + ch if ch in "\\'[],;" else ch for ch in value)
+
+
+@dataclass
+class EncodeProgress:
+    """One progress report from a running ffmpeg encode."""
+    label: str  # Which encode (e.g. "FFmpeg composition", "FFmpeg segment 2")
+    frame: int
+    fps: float
+    speed: Optional[float]  # Multiple of realtime
+    out_time_seconds: float
+    bitrate_kbps: Optional[float]
+    total_size: Optional[int]  # Bytes written so far
+    done: bool
+    duration: Optional[float] = None  # Expected output length, if known
+
+    @property
+    def percent(self) -> Optional[float]:
+        """Completion percentage, if the output duration is known."""
+        if self.done:
+            return 100.0
+        if not self.duration:
+            return None
+        return min(100.0, 100.0 * self.out_time_seconds / self.duration)
+
+    @classmethod
+    def from_fields(cls, fields: Dict[str, str], label: str, duration: Optional[float]) -> "EncodeProgress":
+        """Build an event from one block of `-progress` key=value lines."""
+        out_time_us = _to_number(fields.get("out_time_us") or fields.get("out_time_ms"), int)
+        return cls(
+            label=label,
+            frame=_to_number(fields.get("frame"), int) or 0,
+            fps=_to_number(fields.get("fps")) or 0.0,
+            speed=_to_number(fields.get("speed", "").rstrip("x")),
+            out_time_seconds=max(0, out_time_us or 0) / 1_000_000,
+            bitrate_kbps=_to_number(fields.get("bitrate", "").replace("kbits/s", "")),
+            total_size=_to_number(fields.get("total_size"), int),
+            done=fields.get("progress") == "end",
+            duration=duration,
+        )
+
+
+@dataclass
+class TextOverlay:
+    """A text overlay drawn during composition."""
+    text: str
+    position: str = "top_center"
+    duration: float = 5.0  # Seconds from the start of the video
+    font_size: int = 48
+
+
+@dataclass
+class CompositionPlan:
+    """Everything needed to render a final video in one ffmpeg pass.
+
+    Image input, text overlays, audio muxing and the YouTube-spec encode are
+    combined into a single invocation instead of one encode per step.
+    """
+    images: List[str]
+    output_path: str
+    audio_path: Optional[str] = None
+    fps: int = 24
+    overlays: List[TextOverlay] = field(default_factory=list)
+    # Encoder args (default: taken from `profile`)
+    video_args: Optional[List[str]] = None
+    audio_args: Optional[List[str]] = None
+    # Slideshow mode: seconds to show each image (default: one frame per image)
+    durations: Optional[List[float]] = None
+    # Slideshow mode: rate the stills are processed at before being repeated up
+    # to `fps` (default: `fps`)
+    source_fps: Optional[float] = None
+    # Parallel encoding: >1 splits the timeline into independently encoded segments
+    segments: int = 1
+    max_workers: Optional[int] = None  # Concurrent segment encodes (default: segments)
+    thread_budget: Optional[int] = None  # Total encoder threads (default: CPU count)
+    profile: str = DEFAULT_ENCODE_PROFILE  # Key into ENCODE_PROFILES
+
+    def __post_init__(self):
+        encode = get_encode_profile(self.profile)
+        if self.video_args is None:
+            self.video_args = encode.video_args()
+        if self.audio_args is None:
+            self.audio_args = encode.audio_args()
+
+    @property
+    def output_height(self) -> Optional[int]:
+        """Height to scale the video to, if the profile downscales."""
+        return get_encode_profile(self.profile).height
+
+    @property
+    def image_durations(self) -> List[float]:
+        """Display time of each image in seconds."""
+        if self.durations is not None:
+            if len(self.durations) != len(self.images):
+                raise ValueError("durations must have one entry per image")
+            return list(self.durations)
+        return [1.0 / self.fps] * len(self.images)
+
+    @property
+    def duration(self) -> float:
+        """Length of the video timeline in seconds."""
+        return sum(self.image_durations)
+
 
 class VideoComposer:
     """Compose professional videos from images, audio, and metadata."""
     
-    def __init__(self, ffmpeg_path: str = "ffmpeg"):
+    def __init__(
+        self,
+        ffmpeg_path: str = "ffmpeg",
+        font_file: str = DEFAULT_FONT_FILE,
+        scratch_dir: Optional[str] = None,
+        use_tmpfs: bool = False,
+        ffprobe_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[EncodeProgress], None]] = None,
+    ):
         """
         Args:
             ffmpeg_path: Path to ffmpeg executable (assumes in PATH by default).
+            ffprobe_path: Path to ffprobe (default: next to ffmpeg_path).
+            font_file: TrueType font used for text overlays.
+            scratch_dir: Parent directory for per-job workspaces
+                (default: $OMNIFLOW_SCRATCH_DIR, else the system temp dir).
+            use_tmpfs: Put workspaces on /dev/shm when available and no
+                scratch_dir is given.
+            progress_callback: Subscribed to encode progress events (see `subscribe`).
         """
         self.ffmpeg_path = ffmpeg_path
+        if not ffprobe_path:
+            ffmpeg_dir, ffmpeg_name = os.path.split(ffmpeg_path)
+            ffprobe_path = os.path.join(ffmpeg_dir, ffmpeg_name.replace("ffmpeg", "ffprobe", 1))
+        self.ffprobe_path = ffprobe_path
+        self.font_file = font_file
+        self.scratch_dir = scratch_dir or os.getenv("OMNIFLOW_SCRATCH_DIR")
+        if not self.scratch_dir and use_tmpfs and os.path.isdir("/dev/shm"):
+            self.scratch_dir = "/dev/shm"
+        self._progress_subscribers: List[Callable[[EncodeProgress], None]] = []
+        self._subscribers_lock = threading.Lock()
+        if progress_callback:
+            self.subscribe(progress_callback)
         self._check_ffmpeg()
 
     def _check_ffmpeg(self):
@@ -34,6 +379,414 @@ class VideoComposer:
                 "Install from https://ffmpeg.org/download.html and ensure it's in PATH."
             )
 
+    @contextmanager
+    def workspace(self) -> Iterator[Path]:
+        """Allocate a private scratch directory for one job, removed on exit.
+        
+        Concat lists, segments and other intermediates live here, so
+        concurrent renders never share file names.
+        """
+        if self.scratch_dir:
+            Path(self.scratch_dir).mkdir(parents=True, exist_ok=True)
+        path = Path(tempfile.mkdtemp(prefix="omniflow-job-", dir=self.scratch_dir))
+        try:
+            yield path
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def subscribe(self, callback: Callable[[EncodeProgress], None]) -> Callable[[], None]:
+        """Receive EncodeProgress events from every encode this composer runs.
+        
+        Callbacks run on a background reader thread and must be quick;
+        exceptions they raise are ignored.
+        
+        Returns:
+            A function that unsubscribes the callback.
+        """
+        with self._subscribers_lock:
+            self._progress_subscribers.append(callback)
+        
+        def unsubscribe():
+            with self._subscribers_lock:
+                if callback in self._progress_subscribers:
+                    self._progress_subscribers.remove(callback)
+        
+        return unsubscribe
+
+    def _emit_progress(self, event: EncodeProgress):
+        """Deliver a progress event to all subscribers."""
+        with self._subscribers_lock:
+            subscribers = list(self._progress_subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                pass  # A broken UI callback must not abort the encode
+
+    def _read_progress(self, stream, label: str, duration: Optional[float]):
+        """Parse `-progress` key=value blocks from ffmpeg stdout into events."""
+        fields = {}
+        for raw in iter(stream.readline, b""):
+            line = raw.decode(errors="replace").strip()
+            if "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            fields[key] = value
+            if key == "progress":
+                self._emit_progress(EncodeProgress.from_fields(fields, label, duration))
+                fields = {}
+
+    @staticmethod
+    def _read_stderr(stream, tail: deque):
+        """Keep only the last lines of ffmpeg stderr."""
+        for raw in iter(stream.readline, b""):
+            tail.append(raw.decode(errors="replace").rstrip())
+
+    def _run(
+        self,
+        cmd: List[str],
+        error_label: str = "FFmpeg",
+        duration: Optional[float] = None,
+        stdin_chunks: Optional[Iterable[bytes]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ):
+        """Run an ffmpeg command, emitting progress events as it encodes.
+        
+        Args:
+            cmd: ffmpeg argument list (starting with the executable).
+            error_label: Used in progress events and error messages.
+            duration: Expected output length, for progress percentages.
+            stdin_chunks: Optional data to stream to ffmpeg's stdin.
+            cancel_event: ffmpeg is terminated once this is set (default: the
+                cancel event of the pipeline stage running this call, if any).
+            
+        Raises:
+            RuntimeError: With the tail of stderr if ffmpeg fails.
+            CancelledError: If the encode was cancelled.
+        """
+        cancel_event = cancel_event or current_cancel_event()
+        cmd = [cmd[0], "-nostats", "-progress", "pipe:1", *cmd[1:]]
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE if stdin_chunks is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+        readers = [
+            threading.Thread(
+                target=self._read_progress, args=(proc.stdout, error_label, duration), daemon=True
+            ),
+            threading.Thread(target=self._read_stderr, args=(proc.stderr, stderr_tail), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        
+        try:
+            if stdin_chunks is not None:
+                try:
+                    for chunk in stdin_chunks:
+                        if cancel_event is not None and cancel_event.is_set():
+                            break
+                        proc.stdin.write(chunk)
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass  # ffmpeg exited early; its error is reported below
+            while cancel_event is not None:
+                try:
+                    proc.wait(timeout=CANCEL_POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel_event.is_set():
+                        proc.terminate()
+                        try:
+                            proc.wait(timeout=2)
+                        except subprocess.TimeoutExpired:
+                            proc.kill()  # Still flushing its encoder; the output is discarded anyway
+                        break
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            returncode = proc.wait()
+            for reader in readers:
+                reader.join()
+        
+        if cancel_event is not None and cancel_event.is_set():
+            raise CancelledError(f"{error_label} cancelled")
+        if returncode != 0:
+            raise RuntimeError(f"{error_label} failed: " + "\n".join(stderr_tail))
+
+    def _drawtext_filter(self, overlay: TextOverlay) -> str:
+        """Build a drawtext filter for a text overlay."""
+        x, y = OVERLAY_POSITIONS.get(overlay.position, OVERLAY_POSITIONS["top_center"])
+        options = [
+            ("text", overlay.text),
+            ("expansion", "none"),
+            ("fontfile", self.font_file),
+            ("fontsize", str(overlay.font_size)),
+            ("fontcolor", "white"),
+            ("box", "1"),
+            ("boxcolor", "black@0.5"),
+            ("x", x),
+            ("y", y),
+            ("enable", f"lt(t,{overlay.duration})"),
+        ]
+        return "drawtext=" + ":".join(f"{k}={_escape_filter_value(v)}" for k, v in options)
+
+    def build_composition_command(
+        self,
+        plan: CompositionPlan,
+        image_list: Optional[str] = None,
+        segment: Optional[Tuple[float, float]] = None,
+        output_path: Optional[str] = None,
+        threads: Optional[int] = None,
+        input_args: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Build the single ffmpeg invocation for a composition plan.
+        
+        Args:
+            plan: What to render.
+            image_list: Concat demuxer file listing `plan.images`.
+            segment: Optional (start, end) in seconds to render video-only.
+            output_path: Override for `plan.output_path` (used for segments).
+            threads: Encoder thread limit.
+            input_args: Video input arguments replacing the image list (e.g. a pipe).
+            
+        Returns:
+            ffmpeg argument list.
+        """
+        with_audio = plan.audio_path and segment is None
+        cmd = [self.ffmpeg_path]
+        cmd += input_args or ["-f", "concat", "-safe", "0", "-i", image_list]
+        if with_audio:
+            cmd += ["-i", plan.audio_path]
+        
+        filters = []
+        source_fps = plan.source_fps or plan.fps
+        if plan.durations is not None:
+            # Expand stills to a constant (low) framerate first so overlays are frame-exact
+            filters.append(f"fps={source_fps}")
+        filters += [self._drawtext_filter(o) for o in plan.overlays]
+        if plan.output_height:
+            # Scale after the overlays so drafts look like the full-size render
+            filters.append(f"scale=-2:{plan.output_height}")
+        if plan.durations is not None and source_fps != plan.fps:
+            # Repeat the processed stills up to the output rate; trims below are frame-exact
+            filters.append(f"fps={plan.fps}")
+        if segment:
+            # Trim after the overlays so their timing stays relative to the full video
+            start, end = segment
+            filters.append(f"trim=start={start:.6f}:end={end:.6f},setpts=PTS-STARTPTS")
+        if filters:
+            cmd += ["-vf", ",".join(filters)]
+        
+        cmd += ["-map", "0:v", "-r", str(plan.fps)]
+        cmd += plan.video_args
+        if plan.durations is not None and "-tune" not in plan.video_args:
+            cmd += ["-tune", "stillimage"]
+        if threads:
+            cmd += ["-threads", str(threads)]
+        if with_audio:
+            cmd += ["-map", "1:a"] + plan.audio_args
+        elif segment:
+            cmd += ["-an"]
+        
+        cmd += [
+            "-movflags", "+faststart",  # Let YouTube start processing before the upload completes
+            "-y",
+            output_path or plan.output_path,
+        ]
+        return cmd
+
+    def compose(self, plan: CompositionPlan) -> str:
+        """Render a composition plan with one ffmpeg encode.
+        
+        With `plan.segments > 1` the timeline is encoded in parallel segments
+        and joined with a stream copy (see `_compose_segmented`).
+        
+        Args:
+            plan: Images, overlays, audio and encoder settings.
+            
+        Returns:
+            Path to the rendered video.
+        """
+        if not plan.images:
+            raise ValueError("Composition plan has no images")
+        
+        Path(plan.output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        with self.workspace() as work_dir:
+            image_list = str(work_dir / "images.txt")
+            self._create_image_list(plan.images, image_list, durations=plan.image_durations)
+            
+            if plan.segments > 1:
+                self._compose_segmented(plan, image_list, work_dir)
+            else:
+                self._run(
+                    self.build_composition_command(plan, image_list),
+                    "FFmpeg composition",
+                    duration=plan.duration,
+                )
+        
+        return plan.output_path
+
+    def compose_frames(
+        self,
+        frames: Iterable[Any],
+        plan: CompositionPlan,
+        archive_path: Optional[str] = None,
+    ) -> str:
+        """Render in-memory frames by streaming raw RGB to ffmpeg's stdin.
+        
+        Frames are consumed lazily, so encoding starts as soon as the first
+        frame exists and nothing is written to or read back from PNG files.
+        `plan.images` and `plan.segments` are ignored. If `plan.durations` is
+        set, each frame is a still held for its duration (sent at `plan.source_fps`
+        and repeated up to `plan.fps` by ffmpeg).
+        
+        Args:
+            frames: Iterable of PIL images or HxWx3 uint8 NumPy arrays.
+            plan: Overlays, audio, fps and encoder settings.
+            archive_path: Optional path for a lossless FFV1 (.mkv) copy of the raw frames.
+            
+        Returns:
+            Path to the rendered video.
+        """
+        repeats = None
+        input_fps = plan.fps
+        if plan.durations is not None:
+            input_fps = plan.source_fps or plan.fps
+            repeats = [max(1, round(d * input_fps)) for d in plan.durations]
+        
+        frames = iter(frames)
+        try:
+            first_frame, size = self._raw_frame(next(frames))
+        except StopIteration:
+            raise ValueError("No frames to compose")
+        
+        input_args = [
+            "-f", "rawvideo",
+            "-pix_fmt", "rgb24",
+            "-s", f"{size[0]}x{size[1]}",
+            "-framerate", str(input_fps),
+            "-i", "pipe:0",
+        ]
+        cmd = self.build_composition_command(plan, input_args=input_args)
+        if archive_path:
+            Path(archive_path).parent.mkdir(parents=True, exist_ok=True)
+            cmd += ["-map", "0:v", "-c:v", "ffv1", "-y", archive_path]
+        Path(plan.output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        def raw_chunks():
+            for _ in range(repeats[0] if repeats else 1):
+                yield first_frame
+            for index, frame in enumerate(frames, start=1):
+                data, frame_size = self._raw_frame(frame)
+                if frame_size != size:
+                    raise ValueError(f"Frame size {frame_size} differs from first frame {size}")
+                if repeats:
+                    if index >= len(repeats):
+                        raise ValueError("More frames than plan.durations entries")
+                    for _ in range(repeats[index]):
+                        yield data
+                else:
+                    yield data
+        
+        self._run(
+            cmd,
+            "FFmpeg frame streaming",
+            duration=sum(plan.durations) if plan.durations else None,
+            stdin_chunks=raw_chunks(),
+        )
+        
+        return plan.output_path
+
+    @staticmethod
+    def _raw_frame(frame: Any) -> Tuple[bytes, Tuple[int, int]]:
+        """Convert a PIL image or NumPy array to packed RGB24 bytes and (width, height)."""
+        if hasattr(frame, "mode") and hasattr(frame, "size"):  # PIL image
+            if frame.mode != "RGB":
+                frame = frame.convert("RGB")
+            return frame.tobytes(), frame.size
+        
+        shape = getattr(frame, "shape", None)
+        if shape is None or len(shape) != 3 or shape[2] != 3:
+            raise ValueError("Frames must be PIL images or HxWx3 arrays")
+        if str(frame.dtype) != "uint8":
+            frame = frame.clip(0, 255).astype("uint8")
+        return frame.tobytes(), (shape[1], shape[0])
+
+    @staticmethod
+    def _segment_bounds(
+        duration: float,
+        fps: int,
+        segments: int,
+        image_durations: Optional[List[float]] = None,
+    ) -> List[Tuple[float, float]]:
+        """Split a timeline into `segments` ranges that start on frame boundaries.
+        
+        Each segment is a separate encode, so it always opens with a keyframe.
+        For slideshows, cuts snap to the nearest image change so no still is
+        split across two segments.
+        """
+        total_frames = max(1, round(duration * fps))
+        segments = max(1, min(segments, total_frames))
+        cuts = [round(total_frames * i / segments) for i in range(segments + 1)]
+        
+        if image_durations:
+            changes, acc = [], 0.0
+            for d in image_durations[:-1]:
+                acc += d
+                changes.append(round(acc * fps))
+            for i in range(1, segments):
+                nearest = min(changes, key=lambda c: abs(c - cuts[i]), default=cuts[i])
+                if cuts[i - 1] < nearest < cuts[i + 1]:
+                    cuts[i] = nearest
+            cuts = sorted(set(cuts))
+        
+        return [(cuts[i] / fps, cuts[i + 1] / fps) for i in range(len(cuts) - 1)]
+
+    def _compose_segmented(self, plan: CompositionPlan, image_list: str, work_dir: Path):
+        """Encode the plan as parallel video-only segments, then join + mux audio.
+        
+        Each segment is its own ffmpeg process, so the worker pool only has to
+        start them and wait; `max_workers` bounds how many run at once and the
+        thread budget is split evenly between them.
+        """
+        bounds = self._segment_bounds(
+            plan.duration, plan.fps, plan.segments, plan.durations and plan.image_durations
+        )
+        workers = max(1, min(plan.max_workers or len(bounds), len(bounds)))
+        thread_budget = plan.thread_budget or os.cpu_count() or 1
+        threads = max(1, thread_budget // workers)
+        
+        segment_paths = [str(work_dir / f"segment_{i:04d}.mp4") for i in range(len(bounds))]
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encode") as pool:
+            futures = [
+                pool.submit(
+                    self._run,
+                    self.build_composition_command(
+                        plan, image_list, segment=bound, output_path=path, threads=threads
+                    ),
+                    f"FFmpeg segment {i}",
+                    bound[1] - bound[0],
+                    cancel_event=current_cancel_event(),  # Pool threads don't inherit the stage context
+                )
+                for i, (bound, path) in enumerate(zip(bounds, segment_paths))
+            ]
+            for future in futures:
+                future.result()
+        
+        self.concatenate_videos(
+            segment_paths,
+            plan.output_path,
+            audio_path=plan.audio_path,
+            audio_args=plan.audio_args,
+        )
+
     def create_simple_video(
         self,
         image_sequence: List[str],
@@ -41,47 +794,43 @@ class VideoComposer:
         output_path: str,
         fps: int = 24,
         title: Optional[str] = None,
+        image_durations: Optional[List[float]] = None,
+        profile: str = DEFAULT_ENCODE_PROFILE,
     ) -> str:
-        """Create a simple video from image sequence + audio.
+        """Create a slideshow video from still images + audio.
         
         Args:
             image_sequence: List of image file paths (in order).
             audio_path: Path to audio file (MP3/AAC).
             output_path: Where to save the output video.
-            fps: Frames per second.
-            title: Optional title to overlay on first frame.
+            fps: Output frames per second (stills are processed at SLIDESHOW_FPS
+                and repeated up to this rate).
+            title: Optional title to overlay on the first image.
+            image_durations: Seconds per image (default: audio length split evenly).
+            profile: Encode profile name (see ENCODE_PROFILES).
             
         Returns:
             Path to generated video.
         """
-        # Create a temporary image concatenation file
-        concat_file = "/tmp/image_list.txt"
-        self._create_image_list(image_sequence, concat_file)
+        if image_durations is None:
+            audio_duration = self.get_video_info(audio_path)["duration_seconds"]
+            if not audio_duration:
+                raise RuntimeError(f"Could not determine duration of {audio_path}")
+            image_durations = slideshow_durations(len(image_sequence), audio_duration)
         
-        # FFmpeg command to create video from images + audio
-        cmd = [
-            self.ffmpeg_path,
-            "-framerate", str(fps),
-            "-i", image_sequence[0].replace("%d", "%0" + str(len(str(len(image_sequence)))) + "d"),
-            "-i", audio_path,
-            "-c:v", "libx264",
-            "-profile:v", "high",
-            "-level", "4.1",
-            "-preset", "slow",  # Quality-focused
-            "-crf", "18",  # Lower = better quality
-            "-c:a", "aac",
-            "-b:a", "128k",
-            "-pix_fmt", "yuv420p",  # Ensure YouTube compatibility
-            "-y",  # Overwrite output
-            output_path,
-        ]
-        
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"FFmpeg failed: {e.stderr.decode()}")
+        plan = CompositionPlan(
+            images=image_sequence,
+            output_path=output_path,
+            audio_path=audio_path,
+            fps=fps,
+            source_fps=SLIDESHOW_FPS,
+            durations=image_durations,
+            profile=profile,
+        )
+        if title:
+            plan.overlays.append(TextOverlay(text=title, duration=image_durations[0]))
         
-        return output_path
+        return self.compose(plan)
 
     def add_overlay_text(
         self,
@@ -91,6 +840,7 @@ class VideoComposer:
         position: str = "top_center",
         duration: float = 5.0,
         font_size: int = 48,
+        profile: str = DEFAULT_ENCODE_PROFILE,
     ) -> str:
         """Add text overlay to video.
         
@@ -101,34 +851,29 @@ class VideoComposer:
             position: top_center, top_left, center, bottom_center, etc.
             duration: How long to display the text (seconds).
             font_size: Font size.
+            profile: Encode profile name (see ENCODE_PROFILES).
             
         Returns:
             Path to output video.
         """
-        position_map = {
-            "top_center": "(w-text_w)/2, 50",
-            "top_left": "50, 50",
-            "center": "(w-text_w)/2, (h-text_h)/2",
-            "bottom_center": "(w-text_w)/2, h-text_h-50",
-        }
-        
-        xy = position_map.get(position, position_map["top_center"])
-        
-        filter_str = f"drawtext=text='{text}':fontfile=/Windows/Fonts/Arial.ttf:fontsize={font_size}:fontcolor=white:box=1:boxcolor=black@0.5:x={xy}:enable='lt(t,{duration})'"
+        encode = get_encode_profile(profile)
+        filter_str = self._drawtext_filter(
+            TextOverlay(text=text, position=position, duration=duration, font_size=font_size)
+        )
+        if encode.height:
+            filter_str += f",scale=-2:{encode.height}"
         
         cmd = [
             self.ffmpeg_path,
             "-i", video_path,
             "-vf", filter_str,
+            *encode.video_args(),
             "-c:a", "copy",
             "-y",
             output_path,
         ]
         
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"FFmpeg overlay failed: {e.stderr.decode()}")
+        self._run(cmd, "FFmpeg overlay")
         
         return output_path
 
@@ -136,36 +881,82 @@ class VideoComposer:
         self,
         video_paths: List[str],
         output_path: str,
+        audio_path: Optional[str] = None,
+        audio_args: Optional[List[str]] = None,
     ) -> str:
-        """Concatenate multiple videos into one.
+        """Concatenate multiple videos into one (stream copy, no re-encode).
         
         Args:
             video_paths: List of video file paths.
             output_path: Output file.
+            audio_path: Optional audio track to mux in place of the inputs' audio.
+            audio_args: Encoder args for `audio_path` (default: YouTube AAC).
             
         Returns:
             Path to concatenated video.
         """
-        # Create concat demux file
-        concat_file = "/tmp/concat.txt"
-        with open(concat_file, "w") as f:
-            for vp in video_paths:
-                f.write(f"file '{vp}'\n")
+        with self.workspace() as work_dir:
+            # Create concat demux file
+            concat_file = str(work_dir / "concat.txt")
+            with open(concat_file, "w") as f:
+                for vp in video_paths:
+                    f.write(f"file {self._concat_quote(vp)}\n")
+            
+            cmd = [
+                self.ffmpeg_path,
+                "-f", "concat",
+                "-safe", "0",
+                "-i", concat_file,
+            ]
+            if audio_path:
+                cmd += [
+                    "-i", audio_path,
+                    "-map", "0:v",
+                    "-map", "1:a",
+                    "-c:v", "copy",
+                    *(audio_args or YOUTUBE_AUDIO_ARGS),
+                    "-movflags", "+faststart",
+                ]
+            else:
+                cmd += ["-c", "copy"]
+            cmd += ["-y", output_path]
+            
+            self._run(cmd, "FFmpeg concat")
+        
+        return output_path
+
+    def create_silence(
+        self,
+        output_path: str,
+        seconds: float,
+        sample_rate: int = 44100,
+        channels: int = 1,
+        audio_args: Optional[List[str]] = None,
+    ) -> str:
+        """Write a silent audio clip (e.g. a gap to concatenate between narration chunks).
         
+        Args:
+            output_path: Output file.
+            seconds: Length of the silence.
+            sample_rate: Must match the clips it is joined with for a stream-copy concat.
+            channels: 1 (mono) or 2 (stereo).
+            audio_args: Encoder args (default: 128k MP3).
+            
+        Returns:
+            Path to the silent clip.
+        """
+        layout = "mono" if channels == 1 else "stereo"
         cmd = [
             self.ffmpeg_path,
-            "-f", "concat",
-            "-safe", "0",
-            "-i", concat_file,
-            "-c", "copy",
+            "-f", "lavfi",
+            "-i", f"anullsrc=r={sample_rate}:cl={layout}",
+            "-t", f"{seconds:.3f}",
+            *(audio_args or ["-c:a", "libmp3lame", "-b:a", "128k"]),
             "-y",
             output_path,
         ]
         
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"FFmpeg concat failed: {e.stderr.decode()}")
+        self._run(cmd, "FFmpeg silence")
         
         return output_path
 
@@ -173,6 +964,7 @@ class VideoComposer:
         self,
         input_path: str,
         output_path: str,
+        profile: str = DEFAULT_ENCODE_PROFILE,
     ) -> str:
         """Export video optimized for YouTube.
         
@@ -181,38 +973,166 @@ class VideoComposer:
         - Codec: H.264 (video), AAC (audio)
         - Bitrate: 15-25 Mbps for 1080p
         - Resolution: 1920x1080 (16:9)
+        
+        `profile` picks the encode settings ("draft" for quick 540p previews,
+        "archival" for masters); the default matches the recommendations above.
         """
-        cmd = [
-            self.ffmpeg_path,
-            "-i", input_path,
-            "-c:v", "libx264",
-            "-preset", "slow",
-            "-crf", "18",
-            "-profile:v", "high",
-            "-level", "4.1",
-            "-c:a", "aac",
-            "-b:a", "128k",
-            "-pix_fmt", "yuv420p",
+        encode = get_encode_profile(profile)
+        cmd = [self.ffmpeg_path, "-i", input_path]
+        if encode.height:
+            cmd += ["-vf", f"scale=-2:{encode.height}"]
+        cmd += [
+            *encode.video_args(),
+            *encode.audio_args(),
+            "-movflags", "+faststart",
             "-y",
             output_path,
         ]
         
-        try:
-            subprocess.run(cmd, check=True, capture_output=True)
-        except subprocess.CalledProcessError as e:
-            raise RuntimeError(f"YouTube export failed: {e.stderr.decode()}")
+        self._run(cmd, "YouTube export")
         
         return output_path
 
-    def _create_image_list(self, images: List[str], output_file: str):
-        """Create ffmpeg concat demux file for images."""
+    def _create_image_list(
+        self,
+        images: List[str],
+        output_file: str,
+        durations: Optional[List[float]] = None,
+    ):
+        """Create ffmpeg concat demux file for images.
+        
+        Args:
+            images: Image paths in display order.
+            output_file: Where to write the list.
+            durations: Seconds each image is shown (omit for a plain list).
+        """
         Path(output_file).parent.mkdir(parents=True, exist_ok=True)
         with open(output_file, "w") as f:
-            for img in images:
-                f.write(f"file '{img}'\n")
+            for i, img in enumerate(images):
+                f.write(f"file {self._concat_quote(img)}\n")
+                if durations is not None:
+                    f.write(f"duration {durations[i]:.6f}\n")
+            if durations is not None and images:
+                # The concat demuxer ignores the last entry's duration unless it is repeated
+                f.write(f"file {self._concat_quote(images[-1])}\n")
+
+    @staticmethod
+    def _concat_quote(path: str) -> str:
+        """Quote a path for a concat demuxer file."""
+        path = os.path.abspath(path).replace("\\", "/")
+        return "'" + path.replace("'", "'\\''") + "'"
+
+    def probe(self, path: str, keyframes: bool = False) -> Dict:
+        """Probe a media file with a single `ffprobe -print_format json` run.
+        
+        Results are cached by path + mtime + size, so repeated duration,
+        stream and sync checks on the same file cost no extra subprocess.
+        
+        Args:
+            path: Media file to inspect.
+            keyframes: Also build the video keyframe index (scans all packets).
+            
+        Returns:
+            Dict with duration_seconds, size_bytes, bit_rate, format_name,
+            streams, video/audio stream summaries, width/height, codecs and
+            (if requested) keyframe timestamps in seconds.
+        """
+        st = os.stat(path)
+        cache_key = (os.path.abspath(path), st.st_mtime_ns, st.st_size, keyframes)
+        with _probe_cache_lock:
+            if cache_key in _probe_cache:
+                _probe_cache.move_to_end(cache_key)
+                return copy.deepcopy(_probe_cache[cache_key])
+        
+        data = self._ffprobe_json(["-show_format", "-show_streams", path])
+        info = _parse_probe(path, data)
+        
+        if keyframes:
+            packets = self._ffprobe_json([
+                "-select_streams", "v:0",
+                "-show_entries", "packet=pts_time,flags",
+                path,
+            ]).get("packets", [])
+            info["keyframes"] = [
+                _to_number(p.get("pts_time")) for p in packets
+                if "K" in p.get("flags", "") and p.get("pts_time") is not None
+            ]
+        
+        with _probe_cache_lock:
+            _probe_cache[cache_key] = info
+            while len(_probe_cache) > PROBE_CACHE_SIZE:
+                _probe_cache.popitem(last=False)
+        return copy.deepcopy(info)
+
+    def _ffprobe_json(self, args: List[str]) -> Dict:
+        """Run ffprobe with JSON output and return the parsed result."""
+        cmd = [self.ffprobe_path, "-v", "error", "-print_format", "json", *args]
+        try:
+            result = subprocess.run(cmd, capture_output=True, check=True)
+        except FileNotFoundError:
+            raise RuntimeError(f"ffprobe not found at '{self.ffprobe_path}'")
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"ffprobe failed: {e.stderr.decode(errors='replace')}")
+        return json.loads(result.stdout or b"{}")
+
+    def validate_media(
+        self,
+        path: str,
+        require_audio: bool = True,
+        expected_duration: Optional[float] = None,
+        tolerance: float = 0.5,
+    ) -> List[str]:
+        """Check streams, duration and audio/video sync of a rendered file.
+        
+        Args:
+            path: Media file to check.
+            require_audio: Whether a missing audio stream is a problem.
+            expected_duration: Duration the file should have (seconds).
+            tolerance: Allowed duration / A-V drift in seconds.
+            
+        Returns:
+            List of human-readable problems (empty if the file looks good).
+        """
+        info = self.probe(path)
+        problems = []
+        
+        if not info["video"]:
+            problems.append("No video stream")
+        if require_audio and not info["audio"]:
+            problems.append("No audio stream")
+        
+        duration = info["duration_seconds"]
+        if expected_duration is not None and duration is not None:
+            if abs(duration - expected_duration) > tolerance:
+                problems.append(f"Duration {duration:.2f}s, expected {expected_duration:.2f}s")
+        
+        video_duration = info["video"] and info["video"]["duration_seconds"]
+        audio_duration = info["audio"] and info["audio"]["duration_seconds"]
+        if video_duration and audio_duration and abs(video_duration - audio_duration) > tolerance:
+            problems.append(
+                f"Audio/video out of sync: video {video_duration:.2f}s, audio {audio_duration:.2f}s"
+            )
+        
+        return problems
 
     def get_video_info(self, video_path: str) -> Dict:
-        """Get video metadata (duration, resolution, codec, etc.)."""
+        """Get video metadata (duration, resolution, codec, etc.).
+        
+        Uses the cached ffprobe probe; falls back to parsing `ffmpeg -i`
+        for the duration if ffprobe is unavailable or can't read the file.
+        
+        Returns:
+            Dict with duration_seconds (None if unknown, e.g. a missing file)
+            and raw_output (the probe summary as JSON, or ffmpeg's output on
+            the fallback), plus the `probe` fields when ffprobe succeeded.
+        """
+        try:
+            info = self.probe(video_path)
+            info["raw_output"] = json.dumps(info)
+            return info
+        except (RuntimeError, OSError):
+            pass
+        
         cmd = [
             self.ffmpeg_path,
             "-i", video_path,
@@ -8,9 +8,10 @@ Handles:
 """
 import os
 import json
-import requests
 from typing import Optional, List, Dict
 
+from .http_client import RequestError, get_http_client
+
 
 class YouTubePublisher:
     """Publish videos to YouTube with metadata."""
@@ -78,10 +79,11 @@ class YouTubePublisher:
         }
         
         try:
-            response = requests.post(self.webhook_url, json=payload, timeout=30)
+            # Not retried: a resent webhook could publish the video twice
+            response = get_http_client().post(self.webhook_url, json=payload, timeout=30)
             response.raise_for_status()
             return response.json()
-        except requests.exceptions.RequestException as e:
+        except (RequestError, ValueError) as e:
             raise RuntimeError(f"Webhook request failed: {e}")
 
     def publish_via_api(
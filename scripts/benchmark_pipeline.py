@@ -0,0 +1,625 @@
+"""Offline end-to-end throughput benchmark for the production pipeline.
+
+Starts local stand-ins for every remote service in a separate process:
+- ComfyUI: /prompt, /queue, /history, /view, /ws (events) and /run; each node
+  runs one job at a time, like a single GPU
+- ElevenLabs: /v1/text-to-speech (with and without timestamps), real MP3 audio
+- n8n/Make: the YouTube publishing webhook
+
+Latency, error rate and image size are configurable. The benchmark then
+drives `VideoProductionOrchestrator.produce_video` (through `BatchScheduler`)
+and `DragonAiComfyUIBridge.process_batch` at increasing concurrency. For each
+level it reports videos/hour, p50/p95 latency per stage (from the trace.jsonl
+spans) and peak RSS. Each level runs in a fresh process, so its peak RSS
+is its own rather than the highest of all levels so far. Nothing is sent
+to paid APIs.
+
+    python scripts/benchmark_pipeline.py --concurrency 1,2,4 --videos 6
+    python scripts/benchmark_pipeline.py --comfy-nodes 2 --error-rate 0.05 --json bench.json
+    python scripts/benchmark_pipeline.py --baseline bench.json   # exit 1 on a throughput or memory regression
+
+Script enhancement (OpenAI) is skipped. Requires ffmpeg on PATH.
+"""
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+@dataclass
+class StubSettings:
+    """Behaviour of the stand-in services."""
+    comfy_latency: float = 2.0  # Seconds of "GPU" time per job
+    tts_latency: float = 0.3  # Seconds per synthesis request
+    tts_seconds_per_char: float = 0.06  # Narration length produced per character
+    webhook_latency: float = 0.2
+    error_rate: float = 0.0  # Fraction of requests (or ComfyUI jobs) that fail
+    image_size: Tuple[int, int] = (1280, 720)
+    images_per_job: int = 4
+    seed: int = 0
+
+
+# ----------------------------------------------------------------------------
+# Stub servers
+# ----------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stub: "_StubServer" = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, body: Any, content_type: str = "application/json", status: int = 200):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_GET(self):
+        self.stub.handle_get(self, urlsplit(self.path))
+
+    def do_POST(self):
+        self.stub.handle_post(self, urlsplit(self.path))
+
+
+class _StubServer:
+    """A threaded HTTP server whose requests are handled by this object."""
+
+    def __init__(self, settings: StubSettings, seed: int = 0):
+        self.settings = settings
+        self._random = random.Random(settings.seed + seed)
+        self._random_lock = threading.Lock()
+        handler = type("Handler", (_Handler,), {"stub": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def fails(self) -> bool:
+        with self._random_lock:
+            return self._random.random() < self.settings.error_rate
+
+    def handle_get(self, request: _Handler, url):
+        request.reply(b"ok", "text/plain")
+
+    def handle_post(self, request: _Handler, url):
+        request.reply({"error": "not found"}, status=404)
+
+
+class ComfyUIStub(_StubServer):
+    """One ComfyUI node: queued prompts run one at a time and report over /ws."""
+
+    def __init__(self, settings: StubSettings, seed: int = 0):
+        super().__init__(settings, seed)
+        self.gpu = threading.Lock()  # /run and queued prompts share the "GPU"
+        self.jobs: "queue.Queue[Tuple[str, str]]" = queue.Queue()
+        self.pending: List[str] = []
+        self.running: Optional[str] = None
+        self.history: Dict[str, Dict] = {}
+        self.clients: Dict[str, Any] = {}  # client_id -> socket
+        self.lock = threading.Lock()
+        self.image = self._noise_png(seed)
+        threading.Thread(target=self._work, daemon=True).start()
+
+    def _noise_png(self, seed: int) -> bytes:
+        """Incompressible image, so the transferred payload matches --image-size."""
+        from PIL import Image
+
+        width, height = self.settings.image_size
+        pixels = random.Random(seed).randbytes(width * height * 3)
+        buffer = io.BytesIO()
+        Image.frombytes("RGB", (width, height), pixels).save(buffer, "PNG", compress_level=1)
+        return buffer.getvalue()
+
+    def handle_get(self, request, url):
+        query = parse_qs(url.query)
+        if url.path == "/ws":
+            return self._websocket(request, query.get("clientId", [""])[0])
+        if url.path == "/queue":
+            with self.lock:
+                return request.reply({
+                    "queue_running": [[0, self.running]] if self.running else [],
+                    "queue_pending": [[i, p] for i, p in enumerate(self.pending)],
+                })
+        if url.path.startswith("/history/"):
+            prompt_id = url.path.rsplit("/", 1)[1]
+            with self.lock:
+                entry = self.history.get(prompt_id)
+            return request.reply({prompt_id: entry} if entry else {})
+        if url.path == "/view":
+            if not query.get("filename", [""])[0].startswith("bench_"):
+                return request.reply(b"", "image/png", status=404)
+            return request.reply(self.image, "image/png")
+        request.reply(b"ok", "text/plain")
+
+    def handle_post(self, request, url):
+        body = request.read_json()
+        if url.path in ("/prompt", "/api/prompt"):
+            prompt_id = uuid.uuid4().hex
+            with self.lock:
+                self.pending.append(prompt_id)
+                number = len(self.history) + len(self.pending)
+            self.jobs.put((prompt_id, body.get("client_id", "")))
+            return request.reply({"prompt_id": prompt_id, "number": number})
+        if url.path == "/run":
+            with self.gpu:
+                time.sleep(self.settings.comfy_latency)
+            if self.fails():
+                return request.reply({"error": "CUDA out of memory"}, status=503)
+            image = base64.b64encode(self.image).decode()
+            return request.reply({"images": [image] * self.settings.images_per_job})
+        request.reply({"error": "not found"}, status=404)
+
+    def _work(self):
+        while True:
+            prompt_id, client_id = self.jobs.get()
+            with self.lock:
+                self.pending.remove(prompt_id)
+                self.running = prompt_id
+            self._send(client_id, "execution_start", {"prompt_id": prompt_id})
+            with self.gpu:
+                steps = 4
+                for step in range(steps):
+                    time.sleep(self.settings.comfy_latency / steps)
+                    self._send(client_id, "progress", {"value": step + 1, "max": steps, "prompt_id": prompt_id, "node": "3"})
+
+            if self.fails():
+                with self.lock:
+                    self.history[prompt_id] = {"outputs": {}, "status": {"status_str": "error", "completed": False}}
+                    self.running = None
+                self._send(client_id, "execution_error", {"prompt_id": prompt_id, "exception_message": "Injected failure"})
+                continue
+
+            images = [
+                {"filename": f"bench_{prompt_id}_{i:02d}.png", "subfolder": "", "type": "output"}
+                for i in range(self.settings.images_per_job)
+            ]
+            output = {"images": images}
+            with self.lock:
+                self.history[prompt_id] = {"outputs": {"9": output}, "status": {"status_str": "success", "completed": True}}
+                self.running = None
+            self._send(client_id, "executed", {"node": "9", "output": output, "prompt_id": prompt_id})
+            self._send(client_id, "execution_success", {"prompt_id": prompt_id})
+            self._send(client_id, "executing", {"node": None, "prompt_id": prompt_id})
+
+    def _websocket(self, request: _Handler, client_id: str):
+        key = request.headers["Sec-WebSocket-Key"]
+        accept = base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+        request.send_response(101)
+        request.send_header("Upgrade", "websocket")
+        request.send_header("Connection", "Upgrade")
+        request.send_header("Sec-WebSocket-Accept", accept)
+        request.end_headers()
+        request.wfile.flush()
+        with self.lock:
+            self.clients[client_id] = request.connection
+        try:
+            while request.connection.recv(1024):  # Hold the connection until the client closes it
+                pass
+        except OSError:
+            pass
+        with self.lock:
+            self.clients.pop(client_id, None)
+        request.close_connection = True
+
+    def _send(self, client_id: str, kind: str, data: Dict):
+        """Send one unmasked text frame to a connected client."""
+        payload = json.dumps({"type": kind, "data": data}).encode()
+        size = len(payload)
+        if size < 126:
+            header = bytes([0x81, size])
+        elif size < 65536:
+            header = bytes([0x81, 126]) + struct.pack(">H", size)
+        else:
+            header = bytes([0x81, 127]) + struct.pack(">Q", size)
+        with self.lock:
+            connection = self.clients.get(client_id)
+            if connection is not None:
+                try:
+                    connection.sendall(header + payload)
+                except OSError:
+                    pass
+
+
+class ElevenLabsStub(_StubServer):
+    """Text-to-speech API returning silent MP3s as long as the text would take to read."""
+
+    def handle_get(self, request, url):
+        if url.path == "/v1/voices":
+            return request.reply({"voices": [{"voice_id": "21m00Tcm4TlvDq8ikWAM", "name": "Rachel"}]})
+        request.reply(b"ok", "text/plain")
+
+    def handle_post(self, request, url):
+        if not url.path.startswith("/v1/text-to-speech/"):
+            return request.reply({"error": "not found"}, status=404)
+        text = request.read_json().get("text", "")
+        time.sleep(self.settings.tts_latency)
+        if self.fails():
+            return request.reply({"detail": "Service busy"}, status=503)
+
+        seconds = max(0.5, round(len(text) * self.settings.tts_seconds_per_char, 1))
+        audio = _silent_mp3(seconds)
+        if not url.path.endswith("/with-timestamps"):
+            return request.reply(audio, "audio/mpeg")
+        step = seconds / max(1, len(text))
+        request.reply({
+            "audio_base64": base64.b64encode(audio).decode(),
+            "alignment": {
+                "characters": list(text),
+                "character_start_times_seconds": [i * step for i in range(len(text))],
+                "character_end_times_seconds": [(i + 1) * step for i in range(len(text))],
+            },
+        })
+
+
+@lru_cache(maxsize=256)
+def _silent_mp3(seconds: float) -> bytes:
+    return subprocess.run(
+        ["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "anullsrc=r=44100:cl=mono", "-t", str(seconds),
+         "-c:a", "libmp3lame", "-b:a", "128k", "-f", "mp3", "pipe:1"],
+        capture_output=True,
+        check=True,
+    ).stdout
+
+
+class WebhookStub(_StubServer):
+    """n8n/Make webhook that "uploads" the video."""
+
+    def handle_post(self, request, url):
+        request.read_json()
+        time.sleep(self.settings.webhook_latency)
+        if self.fails():
+            return request.reply({"error": "Upload quota exceeded"}, status=500)
+        video_id = uuid.uuid4().hex[:11]
+        request.reply({"videoId": video_id, "url": f"https://youtu.be/{video_id}", "status": "uploaded"})
+
+
+def serve_stubs(settings: StubSettings, comfy_nodes: int, ready, stop):
+    """Process entry point: start every stub, report their URLs, serve until `stop` is set."""
+    comfy = [ComfyUIStub(settings, seed=i) for i in range(comfy_nodes)]
+    tts = ElevenLabsStub(settings, seed=100)
+    webhook = WebhookStub(settings, seed=200)
+    ready.put({
+        "comfyui": [node.url for node in comfy],
+        "elevenlabs": f"{tts.url}/v1",
+        "webhook": f"{webhook.url}/webhook",
+    })
+    stop.wait()
+
+
+# ----------------------------------------------------------------------------
+# Measurement
+# ----------------------------------------------------------------------------
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linearly interpolated percentile (None for no values)."""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * q / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return round(values[low] + (values[high] - values[low]) * (k - low), 3)
+
+
+def latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    return {"p50": percentile(values, 50), "p95": percentile(values, 95), "count": len(values)}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident memory of this process so far, in MB (ffmpeg children not included)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 2**20, 1)
+        except (ImportError, AttributeError):
+            return None
+    scale = 2**20 if sys.platform == "darwin" else 2**10  # ru_maxrss is bytes on macOS, KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+
+@contextlib.contextmanager
+def pipeline_output(log_path: Path, verbose: bool):
+    """Send the pipeline's progress prints to a log file unless verbose."""
+    if verbose:
+        yield
+        return
+    with open(log_path, "a", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        yield
+
+
+def make_script(token: str, paragraphs: int) -> str:
+    """A unique script (so no cache can answer it) of a few short paragraphs."""
+    lines = [
+        f"Scene {i + 1} of benchmark {token} opens on a quiet city at dawn. "
+        f"The narrator explains why this moment matters for benchmark {token}."
+        for i in range(paragraphs)
+    ]
+    return "\n\n".join(lines)
+
+
+def bench_produce(urls: Dict, concurrency: int, args, workdir: Path) -> Dict[str, Any]:
+    """Produce `args.videos` videos with `concurrency` of them in flight."""
+    from omniflow.batch_scheduler import BatchScheduler
+
+    output_dir = workdir / f"produce_c{concurrency}"
+    token = f"{concurrency}-{uuid.uuid4().hex[:6]}"
+    videos = [
+        {
+            "script": make_script(f"{token}-{i}", args.paragraphs),
+            "title": f"Benchmark {token} #{i}",
+            "description": "Offline pipeline benchmark",
+            "enhance_script": False,
+            "publish_to_youtube": args.publish,
+            "encode_profile": args.profile,
+            "tts_backend": "elevenlabs",
+        }
+        for i in range(args.videos)
+    ]
+    with pipeline_output(workdir / "pipeline.log", args.verbose):
+        batch = BatchScheduler(
+            output_dir=str(output_dir),
+            comfyui_url=",".join(urls["comfyui"]),
+            max_in_flight=concurrency,
+        ).run(videos)
+
+    spans: List[Dict] = []
+    for trace in output_dir.glob("*/trace.jsonl"):
+        with open(trace, encoding="utf-8") as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    stage_names = sorted({s["name"] for s in spans if s["kind"] == "stage"})
+    return {
+        "suite": "produce",
+        "concurrency": concurrency,
+        "count": len(videos),
+        "succeeded": sum(1 for r in batch["results"] if r.get("status") == "success"),
+        "elapsed": batch["elapsed"],
+        "videos_per_hour": batch["videos_per_hour"],
+        "latency": latency_summary([s["wall_seconds"] for s in spans if s["kind"] == "production" and s["status"] == "ok"]),
+        "stages": {
+            name: latency_summary([s["wall_seconds"] for s in spans if s["kind"] == "stage" and s["name"] == name])
+            for name in stage_names
+        },
+        "retries": sum(s["retries"] for s in spans if s["kind"] == "production"),
+        "utilization": {name: stats["utilization"] for name, stats in batch["utilization"].items()},
+    }
+
+
+def bench_batch(urls: Dict, concurrency: int, args, workdir: Path) -> Dict[str, Any]:
+    """Run `args.jobs` workflows through the bridge with `concurrency` queued in ComfyUI."""
+    from dragon_ai_comfyui_bridge import DragonAiComfyUIBridge, GeneratorConfig
+
+    with pipeline_output(workdir / "pipeline.log", args.verbose):
+        bridge = DragonAiComfyUIBridge(
+            dragon_ai_url=urls["comfyui"][0],  # Only health-checked
+            comfyui_url=",".join(urls["comfyui"]),
+            output_dir=str(workdir / f"batch_c{concurrency}"),
+            cache_results=False,
+        )
+        configs = [
+            GeneratorConfig(args.generator, {"theme": "benchmark", "seed": concurrency * 100000 + i})
+            for i in range(args.jobs)
+        ]
+        started = time.monotonic()
+        results = bridge.process_batch(configs, max_in_flight=concurrency)
+        elapsed = time.monotonic() - started
+
+    succeeded = [r for r in results if r["outputs"]]
+    return {
+        "suite": "batch",
+        "concurrency": concurrency,
+        "count": len(configs),
+        "succeeded": len(succeeded),
+        "elapsed": round(elapsed, 2),
+        "videos_per_hour": round(len(succeeded) * 3600 / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency": latency_summary([r["seconds"] for r in succeeded]),
+        "stages": {},
+    }
+
+
+def _run_level(bench, urls: Dict, concurrency: int, args, workdir: Path, results):
+    """Process entry point: run one level and report it with this process's peak RSS."""
+    try:
+        result = bench(urls, concurrency, args, workdir)
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+        raise
+    result["peak_rss_mb"] = peak_rss_mb()
+    results.put(result)
+
+
+def run_level(bench, urls: Dict, concurrency: int, args, workdir: Path) -> Dict[str, Any]:
+    """Run `bench` at one concurrency level in a fresh (spawned) process.
+
+    ru_maxrss never goes down, so measuring every level in one process would
+    report the largest level so far instead of each level's own peak.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_run_level, args=(bench, urls, concurrency, args, workdir, results))
+    process.start()
+    try:
+        while True:
+            try:
+                result = results.get(timeout=1)
+                break
+            except queue.Empty:
+                if not process.is_alive():
+                    raise RuntimeError(f"{bench.__name__} c={concurrency} exited with code {process.exitcode}")
+    finally:
+        process.join()
+    if "error" in result:
+        raise RuntimeError(f"{bench.__name__} c={concurrency} failed: {result['error']}")
+    return result
+
+
+def print_result(result: Dict[str, Any]):
+    latency = result["latency"]
+    rss = result.get("peak_rss_mb")
+    print(
+        f"{result['suite']:<8} c={result['concurrency']:<3} {result['succeeded']}/{result['count']} ok  "
+        f"{result['elapsed']:>7.1f}s  {result['videos_per_hour']:>8.1f}/h  "
+        f"p50 {_seconds(latency['p50'])}  p95 {_seconds(latency['p95'])}  "
+        f"peak RSS {rss if rss is not None else 'n/a'} MB"
+    )
+    for name, stats in result["stages"].items():
+        print(f"{'':<14}{name:<12} p50 {_seconds(stats['p50'])}  p95 {_seconds(stats['p95'])}")
+    if result.get("utilization"):
+        busy = ", ".join(f"{name} {value:.0%}" for name, value in result["utilization"].items())
+        print(f"{'':<14}busy: {busy}  retries: {result['retries']}")
+
+
+def _seconds(value: Optional[float]) -> str:
+    return f"{value:6.2f}s" if value is not None else "   n/a "
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Levels whose throughput dropped, or whose peak RSS grew, more than `tolerance` against the baseline run."""
+    previous = {(r["suite"], r["concurrency"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result["suite"], result["concurrency"]))
+        if not before:
+            continue
+        level = f"{result['suite']} c={result['concurrency']}"
+        if result["videos_per_hour"] < before["videos_per_hour"] * (1 - tolerance):
+            regressions.append(f"{level}: {result['videos_per_hour']}/h vs {before['videos_per_hour']}/h")
+        rss, rss_before = result.get("peak_rss_mb"), before.get("peak_rss_mb")
+        if rss is not None and rss_before and rss > rss_before * (1 + tolerance):
+            regressions.append(f"{level}: peak RSS {rss} MB vs {rss_before} MB")
+    return regressions
+
+
+def _size(value: str) -> Tuple[int, int]:
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline throughput benchmark with stubbed ComfyUI, ElevenLabs and webhook.")
+    parser.add_argument("--suite", choices=("produce", "batch", "all"), default="all",
+                        help="produce: produce_video via BatchScheduler; batch: bridge process_batch")
+    parser.add_argument("--concurrency", default="1,2,4", help="Comma-separated concurrency levels")
+    parser.add_argument("--videos", type=int, default=4, help="Videos per level (produce suite)")
+    parser.add_argument("--jobs", type=int, default=8, help="Workflows per level (batch suite)")
+    parser.add_argument("--paragraphs", type=int, default=3, help="Script paragraphs per video")
+    parser.add_argument("--profile", default="draft", help="Encode profile for produce_video")
+    parser.add_argument("--no-publish", dest="publish", action="store_false", help="Skip the webhook stage")
+    parser.add_argument("--generator", default="gospel", help="Bridge generator type (batch suite)")
+    parser.add_argument("--comfy-nodes", type=int, default=1, help="Stub ComfyUI nodes (GPUs)")
+    parser.add_argument("--comfy-latency", type=float, default=StubSettings.comfy_latency, help="Seconds per ComfyUI job")
+    parser.add_argument("--tts-latency", type=float, default=StubSettings.tts_latency, help="Seconds per TTS request")
+    parser.add_argument("--webhook-latency", type=float, default=StubSettings.webhook_latency)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of stub requests/jobs that fail")
+    parser.add_argument("--image-size", type=_size, default=StubSettings.image_size, help="Generated image size, e.g. 1920x1080")
+    parser.add_argument("--images", type=int, default=StubSettings.images_per_job, help="Images per ComfyUI job")
+    parser.add_argument("--workdir", help="Where projects and caches go (default: a temp dir, removed afterwards)")
+    parser.add_argument("--verbose", action="store_true", help="Show pipeline output instead of logging it")
+    parser.add_argument("--json", dest="json_path", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare throughput and peak RSS against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed throughput drop / peak RSS growth vs the baseline")
+    args = parser.parse_args(argv)
+
+    if not shutil.which("ffmpeg"):
+        print("❌ ffmpeg not found on PATH")
+        return 2
+
+    settings = StubSettings(
+        comfy_latency=args.comfy_latency,
+        tts_latency=args.tts_latency,
+        webhook_latency=args.webhook_latency,
+        error_rate=args.error_rate,
+        image_size=args.image_size,
+        images_per_job=args.images,
+    )
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="omniflow-bench-"))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    # Stubs get their own process so their CPU and memory don't count against the pipeline
+    ready, stop = multiprocessing.Queue(), multiprocessing.Event()
+    stubs = multiprocessing.Process(target=serve_stubs, args=(settings, args.comfy_nodes, ready, stop), daemon=True)
+    stubs.start()
+    urls = ready.get(timeout=60)
+
+    # Point the pipeline at the stubs; read by omniflow at import time
+    os.environ.update({
+        "OMNIFLOW_CACHE_DIR": str(workdir / "cache"),
+        "OMNIFLOW_COMFY_OUTPUT_DIR": str(workdir / "comfyui"),
+        "ELEVENLABS_API_URL": urls["elevenlabs"],
+        "ELEVENLABS_API_KEY": "benchmark",
+        "YOUTUBE_WEBHOOK_URL": urls["webhook"],
+    })
+
+    print(f"🏁 Benchmarking {args.suite} at concurrency {levels} ({args.comfy_nodes} ComfyUI node(s), "
+          f"{settings.comfy_latency}s/job, error rate {settings.error_rate:.0%})")
+    print(f"   Work dir: {workdir}")
+    suites = {"produce": [bench_produce], "batch": [bench_batch], "all": [bench_produce, bench_batch]}[args.suite]
+    results = []
+    try:
+        for bench in suites:
+            for level in levels:
+                result = run_level(bench, urls, level, args, workdir)
+                print_result(result)
+                results.append(result)
+    finally:
+        with pipeline_output(workdir / "pipeline.log", args.verbose):  # Bridges report their streams closing
+            stop.set()
+            stubs.join(timeout=5)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": asdict(settings), "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.json_path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(results, json.load(f)["results"], args.tolerance)
+        if regressions:
+            print(f"❌ Regressed more than {args.tolerance:.0%}:")
+            for line in regressions:
+                print(f"   {line}")
+            return 1
+        print("✅ No throughput or memory regression against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
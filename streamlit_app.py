@@ -275,7 +275,7 @@ with tab2:
                     )
                     st.success("✅ Generation complete!")
                     for i, img in enumerate(outputs):
-                        st.image(img, caption=f"Frame {i+1}")
+                        st.image(str(img.path) if hasattr(img, "path") else img, caption=f"Frame {i+1}")
                 except Exception as e:
                     st.error(f"❌ Failed: {e}")
     
@@ -1243,8 +1243,12 @@ with tab_multi:
     tab_batch, tab_analytics = st.tabs(["Batch Upload", "Analytics"])
     
     with tab_batch:
+        from omniflow.job_queue import JobQueue
+        from omniflow.job_worker import default_worker_count, payload_from_row
+        
         st.subheader("📤 Batch Generate Videos")
         st.markdown("Upload CSV with multiple scripts and generate videos overnight")
+        job_queue = JobQueue()
         
         uploaded_file = st.file_uploader("Upload CSV (script, title, description columns)", type="csv")
         
@@ -1254,9 +1258,55 @@ with tab_multi:
             st.write(f"📋 Loaded {len(df)} videos")
             st.dataframe(df.head())
             
+            batch_name = st.text_input("Batch name", value=f"batch_{datetime.now():%Y%m%d_%H%M}")
+            publish_batch = st.checkbox("Publish each video to YouTube", value=False)
+            
             if st.button("🚀 Start Batch Generation"):
-                st.info("Batch generation would start videos in queue")
-                st.write("Feature coming soon - generates videos 24/7")
+                defaults = {"publish_to_youtube": publish_batch}
+                payloads = [p for p in (payload_from_row(row, defaults) for row in df.to_dict("records")) if p]
+                job_ids = job_queue.enqueue_many(payloads, batch=batch_name)
+                st.success(f"✅ Queued {len(job_ids)} videos in batch '{batch_name}'")
+                st.info(
+                    "Videos are produced by the background workers, so this tab can be closed. "
+                    f"Start them with: `python -m omniflow.job_worker --workers {default_worker_count()}`"
+                )
+        
+        # Queue status (read-only; the workers do the production)
+        st.subheader("📊 Queue Status")
+        batches = job_queue.batches()
+        if not batches:
+            st.caption("No batches queued yet")
+        else:
+            selected_batch = st.selectbox("Batch", batches)
+            counts = job_queue.counts(selected_batch)
+            total = sum(counts.values())
+            
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Queued", counts["queued"])
+            col2.metric("Running", counts["running"])
+            col3.metric("Done", counts["done"])
+            col4.metric("Failed", counts["failed"])
+            st.progress((counts["done"] + counts["failed"]) / total if total else 0.0)
+            
+            st.dataframe([
+                {
+                    "Job": job.id,
+                    "Title": job.payload.get("title", ""),
+                    "Status": job.status,
+                    "Attempts": job.attempts,
+                    "Video": (job.result or {}).get("video_path", ""),
+                    "Error": job.error or "",
+                }
+                for job in job_queue.jobs(batch=selected_batch)
+            ])
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.button("🔄 Refresh Status")
+            with col2:
+                if counts["failed"] and st.button("🔁 Retry Failed Jobs"):
+                    retried = job_queue.retry_failed(selected_batch)
+                    st.success(f"Re-queued {retried} jobs")
     
     with tab_analytics:
         st.subheader("📈 Channel Analytics")
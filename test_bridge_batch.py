@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Bridge Batch Test
+Runs process_batch against a simulated ComfyUI where one prompt never completes
+and checks the batch gives up on it without leaking its node slot; also checks
+that submissions fail over on server errors and never leak a slot, and that
+finished job state is bounded
+"""
+
+import json
+import tempfile
+import threading
+
+from dragon_ai_comfyui_bridge import DragonAiComfyUIBridge, GeneratorConfig
+from omniflow.http_client import HTTPResponse
+
+
+def _make_bridge(output_dir):
+    """Bridge whose ComfyUI side is simulated: prompt 1 finishes, prompt 2 hangs"""
+    bridge = DragonAiComfyUIBridge(
+        comfyui_url="http://comfyui.invalid:8188",
+        output_dir=output_dir,
+        cache_results=False,
+    )
+    bridge.FALLBACK_POLL_INTERVAL = 0.1
+    bridge._servers_ready = lambda: True
+    bridge._ensure_event_stream = lambda comfyui_url=None: True
+    bridge._poll_history = lambda prompt_id: None
+    bridge._job_result = lambda prompt_id, config: {"prompt_id": prompt_id, "status": "complete"}
+
+    submitted = []
+
+    def submit(config):
+        node = bridge.node_pool.acquire(None)
+        prompt_id = f"prompt-{len(submitted) + 1}"
+        submitted.append(prompt_id)
+        bridge._bind_job(prompt_id, node.url)
+        if prompt_id == "prompt-1":
+            threading.Timer(0.2, bridge._dispatch_event, [
+                {"type": "execution_success", "data": {"prompt_id": prompt_id}}
+            ]).start()
+        return prompt_id
+
+    bridge._prepare_and_submit = submit
+    return bridge
+
+
+def test_batch_gives_up_on_stuck_prompt():
+    """A prompt that never completes is abandoned: slot released, job state dropped"""
+    print("\n" + "="*80)
+    print("TEST: BATCH WITH A PROMPT THAT NEVER COMPLETES")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        bridge = _make_bridge(output_dir)
+        bridge.node_pool.refresh = lambda force=False: None  # No real ComfyUI to check
+        configs = [GeneratorConfig("gospel", {}), GeneratorConfig("tech", {})]
+
+        results = bridge.process_batch(configs, max_in_flight=2, timeout=1)
+
+        assert [r["prompt_id"] for r in results] == ["prompt-1"], f"Unexpected results: {results}"
+        assert "prompt-2" not in bridge.processing_jobs, "Stuck prompt still tracked"
+        assert bridge.node_pool.nodes[0].in_flight == 0, "Stuck prompt still holds its node slot"
+
+        # A late event for the abandoned prompt must not bring its state back
+        bridge._dispatch_event({"type": "progress", "data": {"prompt_id": "prompt-2", "value": 1, "max": 2}})
+        assert "prompt-2" not in bridge.processing_jobs, "Late event re-created the stuck prompt"
+
+    print("✅ PASS | Stuck prompt abandoned, node slot released")
+    return True
+
+
+class _FakeHTTP:
+    """Answers /api/prompt with a canned reply per node"""
+
+    def __init__(self, replies):
+        self.replies = replies  # node URL -> (status, body)
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        node_url = url.rsplit("/api/prompt", 1)[0]
+        self.calls.append(node_url)
+        status, body = self.replies[node_url]
+        return HTTPResponse(status, url, content=body.encode())
+
+
+def test_submit_fails_over_and_releases_slots():
+    """A 5xx node is skipped for the next one; a bad reply doesn't keep the slot"""
+    print("\n" + "="*80)
+    print("TEST: SUBMISSION FAILOVER AND SLOT RELEASE")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        bridge = DragonAiComfyUIBridge(
+            comfyui_urls=["http://gpu-a.invalid:8188", "http://gpu-b.invalid:8188"],
+            output_dir=output_dir,
+            cache_results=False,
+        )
+        bridge.node_pool.refresh = lambda force=False: None
+        bridge._ensure_event_stream = lambda comfyui_url=None: True
+        node_a, node_b = bridge.node_pool.nodes
+        node_b.queue_depth = 1  # Route to gpu-a first
+        workflow = {"1": {"class_type": "KSampler", "inputs": {"seed": 1}}}
+
+        bridge.http = _FakeHTTP({
+            node_a.url: (500, "out of memory"),
+            node_b.url: (200, json.dumps({"prompt_id": "abc"})),
+        })
+        prompt_id = bridge.submit_workflow(workflow, use_cache=False)
+        assert prompt_id == "abc", f"Expected failover to gpu-b, got {prompt_id}"
+        assert bridge.http.calls == [node_a.url, node_b.url], bridge.http.calls
+        assert not node_a.healthy and node_a.in_flight == 0, "Failed node kept its slot"
+        assert node_b.in_flight == 1, "Submitted prompt should hold its slot until it finishes"
+
+        bridge._dispatch_event({"type": "execution_success", "data": {"prompt_id": "abc"}})
+        assert node_b.in_flight == 0, "Finished prompt still holds its slot"
+
+        bridge.http = _FakeHTTP({node_a.url: (200, "not json"), node_b.url: (200, "not json")})
+        assert bridge.submit_workflow(workflow, use_cache=False) is None
+        assert node_a.in_flight == 0 and node_b.in_flight == 0, "Unparseable reply leaked a slot"
+
+    print("✅ PASS | Failed over on 500, no slots leaked")
+    return True
+
+
+def test_finished_jobs_are_bounded():
+    """Finished and abandoned prompts leave processing_jobs; only a few are kept"""
+    print("\n" + "="*80)
+    print("TEST: BOUNDED JOB STATE")
+    print("="*80)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        bridge = DragonAiComfyUIBridge(
+            comfyui_url="http://comfyui.invalid:8188",
+            output_dir=output_dir,
+            cache_results=False,
+        )
+        bridge.FINISHED_JOBS_KEPT = 5
+        for i in range(20):
+            bridge._job(f"prompt-{i}")
+            if i % 2:
+                bridge._finish_job(f"prompt-{i}", True)
+            else:
+                bridge._abandon_job(f"prompt-{i}", "test")
+
+        assert not bridge.processing_jobs, f"Finished prompts still tracked: {list(bridge.processing_jobs)}"
+        assert list(bridge._finished_jobs) == [f"prompt-{i}" for i in range(15, 20)]
+        assert bridge._job("prompt-19")["future"].result() is True, "Recent result no longer available"
+
+    print("✅ PASS | Job state stays bounded")
+    return True
+
+
+if __name__ == "__main__":
+    success = all([
+        test_batch_gives_up_on_stuck_prompt(),
+        test_submit_fails_over_and_releases_slots(),
+        test_finished_jobs_are_bounded(),
+    ])
+    exit(0 if success else 1)